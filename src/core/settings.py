@@ -32,6 +32,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'orders.tenancy.TenantMiddleware',
+    'orders.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -69,6 +71,18 @@ DATABASES = {
     }
 }
 
+# SQLite local (DB_ENGINE=sqlite), para rodar a suíte fora do docker-compose (ex: snapshots de queries)
+if os.environ.get('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        # Espera o lock de escrita em vez de falhar na hora: os testes com pool de processos escrevem em paralelo
+        'OPTIONS': {'timeout': 30},
+        # Banco de teste em arquivo: com o padrão em memória, os processos do fork_pool e o
+        # subprocesso do profile_startup não enxergam o banco de teste
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -83,13 +97,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     
+    # Token bucket atômico no Redis (script Lua), ver orders/throttling.py
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle',
+        'orders.throttling.TokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
+        # Orçamento geral por cliente
         'anon': '100/day',
-        'user': '1000/day'
+        'user': '1000/day',
+        # Orçamento por endpoint (<basename>.<action>), por cliente
+        'order.create': '60/minute',
+        # Orçamento compartilhado por todos os clientes de um tenant (opcional, ex: '6000/minute')
     },
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -101,12 +119,62 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Controle de admissão na criação de pedidos (429 + Retry-After quando o banco está saturado)
+ADMISSION_CONTROL = {
+    'MAX_IN_FLIGHT': int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '50')),
+    'MAX_LOCK_WAITS': int(os.environ.get('ADMISSION_MAX_LOCK_WAITS', '20')),
+    'LOCK_WAIT_SAMPLE_INTERVAL': 0.5,
+    'IN_FLIGHT_TTL': 30,
+    'RETRY_AFTER': 1,
+    # Fatia de MAX_IN_FLIGHT que um único tenant pode ocupar: um tenant barulhento não esgota os demais
+    'MAX_IN_FLIGHT_PER_TENANT': int(os.environ.get('ADMISSION_MAX_IN_FLIGHT_PER_TENANT', '20')),
+}
+
+# Criação de pedidos assíncrona: a API enfileira no Redis e responde 202 (ver orders/intake.py).
+# MODE 'sync' mantém o fluxo síncrono, salvo se o cliente enviar "Prefer: respond-async".
+ORDER_INTAKE = {
+    'MODE': os.environ.get('ORDER_INTAKE_MODE', 'sync'),
+    'WORKERS': int(os.environ.get('ORDER_INTAKE_WORKERS', '4')),
+    'BATCH_SIZE': 200,
+    'IDLE_SLEEP': 0.5,
+    'RESULT_TTL': 86400,
+}
+
+# Estoque por centro de distribuição: pedidos alocam em WarehouseStock (orders/allocation.py)
+INVENTORY = {
+    'MULTI_WAREHOUSE': os.environ.get('MULTI_WAREHOUSE', 'False') == 'True',
+    # Novas tentativas quando outro pedido consome o saldo entre a alocação e a baixa
+    'ALLOCATION_RETRIES': 3,
+}
+
+# Multi-tenant: o tenant vem do header (código do Tenant); sem header vale o tenant padrão
+TENANCY = {
+    'HEADER': 'X-Tenant',
+    'DEFAULT_TENANT': os.environ.get('DEFAULT_TENANT', 'default'),
+    # Rotas sem dados de tenant: não resolvem tenant (nem consultam o banco para isso)
+    'EXEMPT_PATHS': ('/api/v1/health/', '/api/v1/schema/', '/api/v1/docs/', '/admin/'),
+}
+
+# Profiler por amostragem ligado sob demanda pelo endpoint /api/v1/profiling/config/ (ver orders/profiling.py)
+PROFILING = {
+    # Perfis mantidos no Redis (os mais recentes) e por quanto tempo
+    'MAX_PROFILES': 200,
+    'PROFILE_TTL': 86400,
+    # Diretório opcional para gravar também os arquivos .folded (flame graph)
+    'OUTPUT_DIR': os.environ.get('PROFILING_OUTPUT_DIR', ''),
+    # Tempo máximo que o profiler pode ficar ligado em uma ativação (segundos)
+    'MAX_DURATION': 3600,
+}
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'ERP Order Management API',
     'DESCRIPTION': 'Módulo de gestão de pedidos - Teste Técnico Pleno',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
 }
+
+# Schema OpenAPI pré-gerado no build da imagem (manage.py spectacular --file openapi.yaml)
+OPENAPI_SCHEMA_FILE = os.environ.get('OPENAPI_SCHEMA_FILE', str(BASE_DIR / 'openapi.yaml'))
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
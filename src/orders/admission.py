@@ -0,0 +1,129 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection
+from redis.exceptions import RedisError
+from rest_framework.exceptions import Throttled
+from . import redis_client
+from .tenancy import get_current_tenant, tenant_key
+
+logger = logging.getLogger(__name__)
+
+# Registra uma transação em andamento em todos os sorted sets (global e do tenant), descartando antes
+# as que passaram do TTL (worker que morreu sem liberar). Só admite se houver vaga em todos.
+# KEYS: sorted sets. ARGV: token, ttl, limite de cada chave. Devolve 0 se admitiu, senão o índice da chave cheia.
+ADMIT_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local ttl = tonumber(ARGV[2])
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - ttl)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[i + 2]) then
+        return i
+    end
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[1])
+    redis.call('EXPIRE', key, math.ceil(ttl))
+end
+return 0
+"""
+
+
+class AdmissionController:
+    """
+    Controle de admissão para endpoints que abrem transações com lock.
+
+    Recusa a requisição com 429 + Retry-After, antes de tocar no banco, quando:
+    - o número de transações em andamento (todos os workers, via Redis) atinge MAX_IN_FLIGHT;
+    - as do tenant da requisição atingem MAX_IN_FLIGHT_PER_TENANT (um tenant em pico não ocupa
+      todas as vagas e os demais seguem sendo admitidos); ou
+    - o número de transações aguardando lock de linha no MySQL passa de MAX_LOCK_WAITS.
+
+    Assim a latência das requisições já admitidas é protegida em picos.
+    """
+    LOCK_WAITS_SQL = "SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_current_waits'"
+
+    def __init__(self, name):
+        self.name = name
+        self.key = f'admission:{name}:in_flight'
+        self._script = None
+        self._lock_waits = 0
+        self._lock_waits_sampled_at = 0.0
+
+    @property
+    def config(self):
+        return settings.ADMISSION_CONTROL
+
+    def current_lock_waits(self):
+        """
+        Amostra de transações esperando lock no MySQL, reaproveitada por LOCK_WAIT_SAMPLE_INTERVAL segundos.
+        Em outros bancos não há métrica equivalente e o valor é 0.
+        """
+        if connection.vendor != 'mysql':
+            return 0
+
+        now = time.monotonic()
+        if now - self._lock_waits_sampled_at >= self.config['LOCK_WAIT_SAMPLE_INTERVAL']:
+            with connection.cursor() as cursor:
+                cursor.execute(self.LOCK_WAITS_SQL)
+                row = cursor.fetchone()
+            self._lock_waits = int(row[1]) if row else 0
+            self._lock_waits_sampled_at = now
+
+        return self._lock_waits
+
+    def reject(self, reason):
+        payload = {'endpoint': self.name, 'reason': reason}
+        logger.warning(f"ADMISSION REJECTED: {payload}")
+        raise Throttled(
+            wait=self.config['RETRY_AFTER'],
+            detail='Servidor sobrecarregado, tente novamente em instantes.'
+        )
+
+    @contextmanager
+    def admit(self):
+        if self.current_lock_waits() > self.config['MAX_LOCK_WAITS']:
+            self.reject('lock_waits')
+
+        keys, limits = [self.key], [self.config['MAX_IN_FLIGHT']]
+        if get_current_tenant() is not None:
+            keys.append(tenant_key(self.key))
+            limits.append(self.config['MAX_IN_FLIGHT_PER_TENANT'])
+
+        token = uuid.uuid4().hex
+        full = 0
+        try:
+            client = redis_client.get_redis_client()
+            if self._script is None:
+                self._script = client.register_script(ADMIT_SCRIPT)
+            full = int(self._script(
+                keys=keys,
+                args=[token, self.config['IN_FLIGHT_TTL'], *limits],
+                client=client
+            ))
+        except RedisError:
+            # Sem Redis não há visão global; libera em vez de derrubar a criação de pedidos
+            logger.warning('Controle de admissão indisponível (Redis), liberando requisição.', exc_info=True)
+            yield
+            return
+
+        if full:
+            self.reject('in_flight' if full == 1 else 'tenant_in_flight')
+
+        try:
+            yield
+        finally:
+            try:
+                pipe = client.pipeline()
+                for key in keys:
+                    pipe.zrem(key, token)
+                pipe.execute()
+            except RedisError:
+                # O TTL do registro limpa a entrada na próxima admissão
+                logger.warning('Falha ao liberar admissão no Redis.', exc_info=True)
+
+
+order_admission = AdmissionController('order_create')
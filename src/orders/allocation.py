@@ -0,0 +1,230 @@
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from .models import Product, StockMovement, Warehouse, WarehouseRoute, WarehouseStock, OrderItemAllocation
+from .versioned_cache import VersionedCache
+
+
+class InsufficientStock(ValueError):
+    def __init__(self, product_id):
+        super().__init__(f"Estoque insuficiente para o produto {product_id}.")
+        self.product_id = product_id
+
+
+class StockConflict(Exception):
+    """Outro pedido consumiu o saldo entre a leitura e a baixa: a transação deve ser refeita."""
+
+
+class WarehousePreferences(VersionedCache):
+    """
+    Ordem de preferência dos centros por região do cliente, pré-calculada em memória por processo.
+    Rotas (WarehouseRoute) primeiro, depois os centros da própria região e por fim os demais, por prioridade.
+    Versionado como o motor de preços: escritas em Warehouse/WarehouseRoute incrementam a versão no cache.
+    """
+    VERSION_KEY = 'warehouse_preferences_version'
+
+    def __init__(self):
+        super().__init__()
+
+        self.by_region = {}
+        self.default = ()
+
+    def _load(self, now):
+        # Centros de todos os tenants: os candidatos de um pedido vêm do saldo dos produtos dele
+        self.by_region, self.default = self._compile()
+
+    def _compile(self):
+        warehouses = list(Warehouse.objects.filter(is_active=True).order_by('priority', 'id').values_list('id', 'region'))
+        default = tuple(warehouse_id for warehouse_id, _ in warehouses)
+        active = set(default)
+
+        routes = {}
+        for region, warehouse_id in WarehouseRoute.objects.order_by('region', 'rank', 'id').values_list('region', 'warehouse_id'):
+            if warehouse_id in active:
+                routes.setdefault(region, []).append(warehouse_id)
+
+        by_region = {}
+        for region in set(routes) | {region for _, region in warehouses}:
+            ranked = routes.get(region, [])
+            local = [warehouse_id for warehouse_id, warehouse_region in warehouses if warehouse_region == region]
+            preferred = list(dict.fromkeys(ranked + local))
+            by_region[region] = tuple(preferred + [warehouse_id for warehouse_id in default if warehouse_id not in preferred])
+        return by_region, default
+
+    def for_region(self, region: str) -> tuple:
+        self._refresh()
+        return self.by_region.get(region, self.default)
+
+
+warehouse_preferences = WarehousePreferences()
+
+
+def allocate(demand: dict, stock: dict, preference: tuple) -> list:
+    """
+    Distribui a demanda (product_id -> quantidade) pelos centros, minimizando remessas.
+    `stock`: product_id -> {warehouse_id: saldo}. Devolve [(warehouse_id, product_id, quantidade)].
+
+    Guloso por cobertura: a cada passo escolhe o centro que atende sozinho mais linhas
+    (empate: mais unidades, depois a preferência do cliente). Um centro que atende o pedido
+    inteiro sai na primeira rodada. Linhas que nenhum centro atende sozinho são divididas,
+    primeiro entre os centros já escolhidos.
+    """
+    rank = {warehouse_id: position for position, warehouse_id in enumerate(preference)}
+    candidates = sorted(
+        {warehouse_id for balances in stock.values() for warehouse_id in balances},
+        key=lambda warehouse_id: rank.get(warehouse_id, len(rank))
+    )
+
+    remaining = dict(demand)
+    allocations = []
+    chosen = []
+    while remaining:
+        best, best_key, best_lines = None, None, None
+        for warehouse_id in candidates:
+            lines = [
+                product_id for product_id, quantity in remaining.items()
+                if stock.get(product_id, {}).get(warehouse_id, 0) >= quantity
+            ]
+            if not lines:
+                continue
+            key = (len(lines), sum(remaining[product_id] for product_id in lines))
+            if best_key is None or key > best_key:
+                best, best_key, best_lines = warehouse_id, key, lines
+
+        if best is None:
+            break
+
+        chosen.append(best)
+        for product_id in best_lines:
+            allocations.append((best, product_id, remaining.pop(product_id)))
+
+    for product_id, quantity in remaining.items():
+        balances = dict(stock.get(product_id, {}))
+        while quantity:
+            # Primeiro os centros já escolhidos; fora deles, o preferido que cobre o restante, senão o de maior saldo
+            source = next((warehouse_id for warehouse_id in chosen if balances.get(warehouse_id)), None)
+            if source is None:
+                others = [warehouse_id for warehouse_id in candidates if balances.get(warehouse_id)]
+                if not others:
+                    raise InsufficientStock(product_id)
+                source = next(
+                    (warehouse_id for warehouse_id in others if balances[warehouse_id] >= quantity),
+                    max(others, key=lambda warehouse_id: balances[warehouse_id])
+                )
+                chosen.append(source)
+
+            taken = min(quantity, balances.pop(source))
+            allocations.append((source, product_id, taken))
+            quantity -= taken
+
+    return allocations
+
+
+def _delta_case(deltas: dict) -> Case:
+    """
+    CASE com um WHEN por valor de delta (id IN ...), não por linha: as quantidades de um pedido
+    se repetem muito, e montar um WHEN por linha no ORM custava mais que o próprio UPDATE.
+    """
+    ids_by_delta = {}
+    for row_id, delta in deltas.items():
+        ids_by_delta.setdefault(delta, []).append(row_id)
+    return Case(*[When(id__in=ids, then=Value(delta)) for delta, ids in ids_by_delta.items()], default=Value(0))
+
+
+def _update_product_totals(deltas: dict) -> None:
+    # Um único UPDATE, no fim da transação: a linha do produto fica travada pelo menor tempo possível
+    Product.objects.filter(id__in=deltas).update(
+        stock_quantity=F('stock_quantity') + _delta_case(deltas), updated_at=timezone.now()
+    )
+
+
+def _update_warehouse_stock(deltas: dict) -> None:
+    # Um único UPDATE para todas as linhas de saldo
+    WarehouseStock.objects.filter(id__in=deltas).update(quantity=F('quantity') + _delta_case(deltas))
+
+
+class WarehouseAllocator:
+    """
+    Baixa e devolução de estoque por centro de distribuição.
+
+    A alocação é calculada sobre uma leitura sem lock; depois só as linhas escolhidas são travadas,
+    com um SELECT ... FOR UPDATE sempre na ordem do ID da linha (baixa e devolução), e o saldo é conferido.
+    Se um pedido concorrente consumiu o saldo no meio do caminho, StockConflict pede que a transação
+    inteira seja refeita. As baixas vão em um UPDATE por tabela, e o total do produto por último.
+    """
+    def __init__(self, preferences: WarehousePreferences = None):
+        self.preferences = preferences or warehouse_preferences
+
+    def reserve(self, order, lines, region: str = '') -> list:
+        """
+        Aloca e baixa `lines` ([(product_id, quantidade)]) para o pedido.
+        Devolve os movimentos do ledger (um por centro e produto), a gravar pelo chamador.
+        """
+        demand = {}
+        for product_id, quantity in lines:
+            demand[product_id] = demand.get(product_id, 0) + quantity
+
+        stock, row_ids = {}, {}
+        rows = (
+            WarehouseStock.objects
+            .filter(product_id__in=demand, quantity__gt=0, warehouse__is_active=True, warehouse__deleted_at__isnull=True)
+            .values_list('id', 'warehouse_id', 'product_id', 'quantity')
+        )
+        for row_id, warehouse_id, product_id, quantity in rows:
+            stock.setdefault(product_id, {})[warehouse_id] = quantity
+            row_ids[warehouse_id, product_id] = row_id
+
+        allocations = allocate(demand, stock, self.preferences.for_region(region))
+        taken = {row_ids[warehouse_id, product_id]: quantity for warehouse_id, product_id, quantity in allocations}
+
+        locked = self._lock(taken)
+        if any(locked.get(row_id, 0) < quantity for row_id, quantity in taken.items()):
+            raise StockConflict()
+
+        _update_warehouse_stock({row_id: -quantity for row_id, quantity in taken.items()})
+        _update_product_totals({product_id: -quantity for product_id, quantity in demand.items()})
+        OrderItemAllocation.objects.bulk_create([
+            OrderItemAllocation(order=order, warehouse_id=warehouse_id, product_id=product_id, quantity=quantity)
+            for warehouse_id, product_id, quantity in allocations
+        ])
+        return [
+            StockMovement(
+                product_id=product_id, warehouse_id=warehouse_id, delta=-quantity,
+                reason=StockMovement.Reason.ORDER, order=order
+            )
+            for warehouse_id, product_id, quantity in allocations
+        ]
+
+    def release(self, order, user=None) -> list:
+        """Devolve ao centro de origem o que foi alocado ao pedido. Devolve os movimentos do ledger."""
+        allocations = list(order.allocations.values_list('warehouse_id', 'product_id', 'quantity'))
+
+        row_ids = {
+            (warehouse_id, product_id): row_id
+            for row_id, warehouse_id, product_id in WarehouseStock.objects.filter(
+                warehouse_id__in={warehouse_id for warehouse_id, _, _ in allocations},
+                product_id__in={product_id for _, product_id, _ in allocations}
+            ).values_list('id', 'warehouse_id', 'product_id')
+        }
+
+        returned, deltas = {}, {}
+        for warehouse_id, product_id, quantity in allocations:
+            row_id = row_ids[warehouse_id, product_id]
+            returned[row_id] = returned.get(row_id, 0) + quantity
+            deltas[product_id] = deltas.get(product_id, 0) + quantity
+
+        self._lock(returned)
+        _update_warehouse_stock(returned)
+        _update_product_totals(deltas)
+        return [
+            StockMovement(
+                product_id=product_id, warehouse_id=warehouse_id, delta=quantity,
+                reason=StockMovement.Reason.CANCELLATION, order=order, user=user
+            )
+            for warehouse_id, product_id, quantity in allocations
+        ]
+
+    def _lock(self, row_ids) -> dict:
+        # Ordem determinística (ID da linha) em toda transação que trava saldos de centro: sem deadlock entre elas
+        return dict(
+            WarehouseStock.objects.select_for_update().filter(id__in=list(row_ids)).order_by('id').values_list('id', 'quantity')
+        )
@@ -5,4 +5,5 @@ class OrdersConfig(AppConfig):
     name = 'orders'
 
     def ready(self):
-        import orders.signals  
\ No newline at end of file
+        import orders.signals
+        import orders.checks  
\ No newline at end of file
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from .models import Product, Customer
+from .dtos import CreateOrderDTO
+from .versioned_cache import VersionedCache
+
+class CatalogSnapshot(VersionedCache):
+    """
+    Snapshot em memória (por processo) de produtos e clientes inativos.
+    Permite rejeitar pedidos obviamente inválidos antes de abrir transação ou travar linhas.
+    A versão fica no cache compartilhado (Redis): toda escrita em Product/Customer incrementa
+    a versão e os demais processos atualizam o snapshot na próxima verificação.
+
+    Depois da carga inicial, a atualização é incremental: só as linhas com `updated_at` a partir
+    da última leitura (menos uma margem para transações que commitaram atrasadas) são relidas.
+    """
+    VERSION_KEY = 'catalog_snapshot_version'
+
+    # Margem relida a cada atualização incremental: `updated_at` é definido antes do commit
+    REFRESH_OVERLAP = timedelta(seconds=5)
+
+    # Recarga completa periódica, para descartar linhas removidas com hard delete
+    FULL_RELOAD_INTERVAL = 300.0
+
+    def __init__(self):
+        super().__init__()
+        self._loaded_at = 0.0
+        self._refreshed_at = None
+
+        self.products = {}              # id -> (name, is_active)
+        self.inactive_customers = set()  # ids de clientes inativos
+        self.deleted_customers = set()   # ids de clientes com soft delete
+
+    def _load(self, now):
+        # Snapshot por ID, de todos os tenants: é o mesmo para qualquer requisição que o recarregue
+        if not self._loaded or now - self._loaded_at >= self.FULL_RELOAD_INTERVAL:
+            self._full_reload()
+            self._loaded_at = now
+        else:
+            self._incremental_refresh()
+
+    def _full_reload(self):
+        started_at = timezone.now()
+
+        products = {
+            product_id: (name, is_active)
+            for product_id, name, is_active in Product.objects.values_list('id', 'name', 'is_active')
+        }
+        inactive_customers, deleted_customers = set(), set()
+        for customer_id, is_active, deleted_at in (
+            Customer.all_objects.filter(Q(is_active=False) | Q(deleted_at__isnull=False))
+            .values_list('id', 'is_active', 'deleted_at')
+        ):
+            self._place_customer(customer_id, is_active, deleted_at, inactive_customers, deleted_customers)
+
+        self.products = products
+        self.inactive_customers = inactive_customers
+        self.deleted_customers = deleted_customers
+        self._refreshed_at = started_at
+
+    def _incremental_refresh(self):
+        started_at = timezone.now()
+        since = self._refreshed_at - self.REFRESH_OVERLAP
+
+        # Copia antes de alterar: leitores concorrentes continuam vendo um snapshot consistente
+        products = dict(self.products)
+        for product_id, name, is_active, deleted_at in (
+            Product.all_objects.filter(updated_at__gte=since).values_list('id', 'name', 'is_active', 'deleted_at')
+        ):
+            if deleted_at is None:
+                products[product_id] = (name, is_active)
+            else:
+                products.pop(product_id, None)
+
+        inactive_customers, deleted_customers = set(self.inactive_customers), set(self.deleted_customers)
+        for customer_id, is_active, deleted_at in (
+            Customer.all_objects.filter(updated_at__gte=since).values_list('id', 'is_active', 'deleted_at')
+        ):
+            inactive_customers.discard(customer_id)
+            deleted_customers.discard(customer_id)
+            self._place_customer(customer_id, is_active, deleted_at, inactive_customers, deleted_customers)
+
+        self.products = products
+        self.inactive_customers = inactive_customers
+        self.deleted_customers = deleted_customers
+        self._refreshed_at = started_at
+
+    def _place_customer(self, customer_id, is_active, deleted_at, inactive_customers, deleted_customers):
+        if deleted_at is not None:
+            deleted_customers.add(customer_id)
+        elif not is_active:
+            inactive_customers.add(customer_id)
+
+    def pre_validate(self, dto: CreateOrderDTO):
+        """
+        Lança ValueError para pedidos que certamente falhariam dentro da transação.
+        Em caso de rejeição, confirma a versão no cache antes, para não rejeitar com dado velho.
+        """
+        try:
+            self._check(dto)
+        except ValueError:
+            self._refresh(force_check=True)
+            self._check(dto)
+
+    def _check(self, dto: CreateOrderDTO):
+        self._refresh()
+
+        # Mesmas mensagens da validação dentro da transação
+        if dto.customer_id in self.deleted_customers:
+            raise ValueError("Cliente não encontrado.")
+
+        if dto.customer_id in self.inactive_customers:
+            raise ValueError("Cliente inativo não pode realizar pedidos.")
+
+        for item in dto.items:
+            if item.quantity <= 0:
+                raise ValueError("A quantidade do item deve ser maior que zero.")
+
+            product = self.products.get(item.product_id)
+            if product is None:
+                raise ValueError(f"Produto ID {item.product_id} não encontrado.")
+
+            name, is_active = product
+            if not is_active:
+                raise ValueError(f"O produto {name} está inativo e não pode ser vendido.")
+
+
+catalog_snapshot = CatalogSnapshot()
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+@register()
+def redis_cache_check(app_configs, **kwargs):
+    """
+    Throttle, controle de admissão e eventos usam a conexão crua do django-redis.
+    Com outro backend eles ficam desligados (liberam tudo), então avisamos já no boot.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend.startswith('django_redis.'):
+        return []
+
+    return [Warning(
+        'O cache default não usa django-redis: rate limiting, controle de admissão e eventos de pedidos ficarão desativados.',
+        hint="Configure CACHES['default'] com 'django_redis.cache.RedisCache'.",
+        id='orders.W001',
+    )]
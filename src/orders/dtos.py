@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from decimal import Decimal
+from datetime import datetime
+from typing import List, Optional
 
 @dataclass
 class OrderItemDTO:
@@ -9,4 +11,56 @@ class OrderItemDTO:
 @dataclass
 class CreateOrderDTO:
     customer_id: int
-    items: List[OrderItemDTO]
\ No newline at end of file
+    items: List[OrderItemDTO]
+    # Preenchido só pela fila assíncrona: marca de idempotência gravada no pedido
+    intake_ticket: Optional[str] = None
+
+@dataclass
+class CatalogImportResultDTO:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    errors: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def total_rows(self) -> int:
+        return self.created + self.updated + self.unchanged + self.errors
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.total_rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+@dataclass
+class PricedItemDTO:
+    product_id: int
+    quantity: int
+    unit_price: Decimal
+    subtotal: Decimal
+
+@dataclass
+class PricedOrderDTO:
+    items: List[PricedItemDTO] = field(default_factory=list)
+    total: Decimal = Decimal('0.00')
+
+# Modelo de leitura compacto para processamento em lote (exportações, auditorias):
+# sem _state nem sinais do ORM, carregado com values_list. Ver orders/read_model.py.
+
+@dataclass(slots=True)
+class OrderItemRowDTO:
+    product_id: int
+    quantity: int
+    unit_price: Decimal
+    subtotal: Decimal
+
+@dataclass(slots=True)
+class OrderRowDTO:
+    id: int
+    customer_id: int
+    status: str
+    total_amount: Decimal
+    created_at: datetime
+    item_count: int
+    total_quantity: int
+    last_status_change_at: Optional[datetime]
+    items: List[OrderItemRowDTO] = field(default_factory=list)
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import re
+from redis.exceptions import RedisError
+from . import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub para entrega em tempo real; o stream guarda os últimos eventos para replay (Last-Event-ID)
+EVENTS_CHANNEL = 'orders:events'
+EVENTS_STREAM = 'orders:events:stream'
+STREAM_MAXLEN = 10000
+REPLAY_LIMIT = 1000
+
+# Formato dos IDs de stream do Redis ("<ms>-<seq>")
+EVENT_ID_RE = re.compile(r'^\d+(-\d+)?$')
+
+# Eventos pendentes por ouvinte antes de ser considerado lento e desconectado
+LISTENER_QUEUE_SIZE = 1000
+
+
+def build_status_changed_payload(history) -> dict:
+    return {
+        "event": "order.status_changed",
+        "tenant_id": history.order.tenant_id,
+        "order_id": history.order_id,
+        "customer_id": history.order.customer_id,
+        "old_status": history.old_status,
+        "new_status": history.new_status,
+        "timestamp": history.changed_at.isoformat()
+    }
+
+
+def publish_event(payload: dict):
+    """
+    Grava o evento no stream (para replay) e publica no canal (para quem está conectado).
+    Falhas no Redis são logadas e não afetam a transação de negócio, que já foi confirmada.
+    """
+    try:
+        client = redis_client.get_redis_client()
+        data = json.dumps(payload)
+        event_id = client.xadd(EVENTS_STREAM, {'data': data}, maxlen=STREAM_MAXLEN, approximate=True)
+        if isinstance(event_id, bytes):
+            event_id = event_id.decode()
+        client.publish(EVENTS_CHANNEL, json.dumps({'id': event_id, 'data': payload}))
+        return event_id
+    except RedisError:
+        logger.warning('Falha ao publicar evento no Redis.', exc_info=True)
+        return None
+
+
+def stream_id_key(event_id: str):
+    # IDs de stream ("<ms>-<seq>") comparados numericamente
+    ms, _, seq = event_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+def matches(payload: dict, filters: dict) -> bool:
+    # Cada stream só enxerga os eventos do próprio tenant
+    if filters.get('tenant') and payload.get('tenant_id') != filters['tenant']:
+        return False
+    if filters.get('status') and payload.get('new_status') != filters['status']:
+        return False
+    if filters.get('customer') and str(payload.get('customer_id')) != str(filters['customer']):
+        return False
+    return True
+
+
+def format_sse(event_id: str, payload: dict) -> str:
+    return f"id: {event_id}\nevent: {payload['event']}\ndata: {json.dumps(payload)}\n\n"
+
+
+class EventBroadcaster:
+    """
+    Uma única assinatura pub/sub por processo, repassada para filas locais de cada conexão SSE.
+    Assim milhares de ouvintes custam uma conexão Redis por worker, não uma por ouvinte.
+    A assinatura é encerrada quando o último ouvinte sai.
+    """
+    def __init__(self):
+        self._listeners = set()
+        self._task = None
+        self._loop = None
+        self._ready = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=LISTENER_QUEUE_SIZE)
+        self._listeners.add(queue)
+
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._ready = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._listeners.discard(queue)
+
+    async def wait_ready(self, timeout: float = 5.0):
+        """Aguarda a assinatura estar ativa (evita perder eventos entre o replay e o ao vivo)."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning('Assinatura de eventos ainda não confirmada, seguindo sem ela.')
+
+    async def wait_closed(self):
+        if self._task is not None:
+            await self._task
+
+    def _dispatch(self, message: dict):
+        for queue in list(self._listeners):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Ouvinte lento: desconecta; o cliente reconecta com Last-Event-ID e faz replay
+                self._listeners.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _run(self):
+        while self._listeners:
+            client = redis_client.get_async_redis_client()
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                self._ready.set()
+                while self._listeners:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        self._dispatch(json.loads(message['data']))
+            except RedisError:
+                logger.warning('Assinatura de eventos perdida, reconectando.', exc_info=True)
+                self._ready.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+
+broadcaster = EventBroadcaster()
+
+
+def is_valid_event_id(event_id: str) -> bool:
+    return bool(EVENT_ID_RE.match(event_id or ''))
+
+
+class EventStream:
+    """
+    Iterador assíncrono de mensagens SSE: primeiro o replay a partir de `last_event_id` (se houver),
+    depois os eventos ao vivo. A fila é registrada antes do replay para não perder eventos nesse meio tempo.
+
+    Expõe `close()` síncrono: o StreamingHttpResponse o chama ao encerrar a resposta (cliente
+    desconectou), liberando o ouvinte no broadcaster mesmo que o gerador nunca seja retomado.
+    """
+    def __init__(self, last_event_id: str = None, filters: dict = None, heartbeat: float = 15.0):
+        if last_event_id and not is_valid_event_id(last_event_id):
+            raise ValueError(f"Last-Event-ID inválido: {last_event_id}")
+
+        self.last_event_id = last_event_id
+        self.filters = filters or {}
+        self.heartbeat = heartbeat
+        self._queue = None
+        self._generator = self._generate()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._generator.__anext__()
+
+    def close(self):
+        if self._queue is not None:
+            broadcaster.unsubscribe(self._queue)
+            self._queue = None
+
+    async def aclose(self):
+        self.close()
+        await self._generator.aclose()
+
+    async def _generate(self):
+        self._queue = queue = broadcaster.subscribe()
+        last_seen = self.last_event_id
+
+        try:
+            await broadcaster.wait_ready()
+
+            if self.last_event_id:
+                client = redis_client.get_async_redis_client()
+                try:
+                    entries = await client.xrange(
+                        EVENTS_STREAM, min=f'({self.last_event_id}', max='+', count=REPLAY_LIMIT
+                    )
+                finally:
+                    await client.aclose()
+
+                for event_id, fields in entries:
+                    event_id = event_id.decode() if isinstance(event_id, bytes) else event_id
+                    payload = json.loads(fields[b'data'])
+                    last_seen = event_id
+                    if matches(payload, self.filters):
+                        yield format_sse(event_id, payload)
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Comentário SSE mantém a conexão viva através de proxies
+                    yield ': keepalive\n\n'
+                    continue
+
+                # Desconectado por lentidão
+                if message is None:
+                    return
+
+                # Já enviado no replay
+                if last_seen and stream_id_key(message['id']) <= stream_id_key(last_seen):
+                    continue
+
+                last_seen = message['id']
+                if matches(message['data'], self.filters):
+                    yield format_sse(message['id'], message['data'])
+        finally:
+            self.close()
+
+
+def stream_events(last_event_id: str = None, filters: dict = None, heartbeat: float = 15.0) -> EventStream:
+    return EventStream(last_event_id=last_event_id, filters=filters, heartbeat=heartbeat)
@@ -0,0 +1,14 @@
+import django_filters
+from .models import Order
+
+class OrderFilter(django_filters.FilterSet):
+    """
+    Filtros de pedidos por status e intervalo de criação.
+    Ex: ?status=ENTREGUE&created_after=2026-01-01T00:00:00Z
+    """
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Order
+        fields = ['status', 'customer']
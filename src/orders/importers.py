@@ -0,0 +1,72 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+from typing import IO, Iterator
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'sim', 's'}
+
+class CatalogRowError(ValueError):
+    pass
+
+def parse_catalog_row(raw: dict) -> dict:
+    """
+    Normaliza uma linha do catálogo do fornecedor.
+    Apenas 'sku' é obrigatório; campos ausentes não são alterados no produto.
+    """
+    sku = str(raw.get('sku') or '').strip()
+    if not sku:
+        raise CatalogRowError("Linha sem SKU.")
+
+    row = {'sku': sku}
+    try:
+        if raw.get('name') not in (None, ''):
+            row['name'] = str(raw['name']).strip()
+        if raw.get('description') is not None:
+            row['description'] = str(raw['description'])
+        if raw.get('price') not in (None, ''):
+            row['price'] = Decimal(str(raw['price'])).quantize(Decimal('0.01'))
+        if raw.get('stock_quantity') not in (None, ''):
+            row['stock_quantity'] = int(raw['stock_quantity'])
+        if raw.get('is_active') not in (None, ''):
+            value = raw['is_active']
+            row['is_active'] = value if isinstance(value, bool) else str(value).strip().lower() in TRUE_VALUES
+    except (InvalidOperation, ValueError, TypeError) as e:
+        raise CatalogRowError(f"Valor inválido para o SKU {sku}: {e}")
+
+    if row.get('price', 0) < 0:
+        raise CatalogRowError(f"Preço negativo para o SKU {sku}.")
+
+    return row
+
+def iter_csv_rows(stream: IO[str]) -> Iterator[dict]:
+    for raw in csv.DictReader(stream):
+        yield raw
+
+def iter_ndjson_rows(stream: IO[str]) -> Iterator[dict]:
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # Linha corrompida vira erro de linha, sem abortar o arquivo
+            yield {}
+
+READERS = {
+    'csv': iter_csv_rows,
+    'ndjson': iter_ndjson_rows,
+}
+
+def iter_catalog_rows(stream: IO[str], file_format: str) -> Iterator[dict]:
+    """
+    Lê o arquivo linha a linha (nunca carrega o arquivo inteiro em memória).
+    """
+    try:
+        reader = READERS[file_format]
+    except KeyError:
+        raise ValueError(f"Formato '{file_format}' não suportado. Use: {', '.join(READERS)}.")
+    return reader(stream)
+
+def detect_format(filename: str) -> str:
+    return 'ndjson' if filename.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
@@ -0,0 +1,233 @@
+import json
+import logging
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from . import redis_client
+from .dtos import CreateOrderDTO, OrderItemDTO
+from .models import Order
+from .serializers import OrderSerializer
+from .services import CreateOrderService
+from .tenancy import get_current_tenant, tenant_context, tenant_key
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = 'orders:intake:queue'
+PROCESSING_KEY = 'orders:intake:processing:%(consumer)s'
+RESULT_KEY = 'orders:intake:result:%(ticket)s'
+
+# Status de um ticket
+QUEUED = 'queued'
+CREATED = 'created'
+REJECTED = 'rejected'
+FAILED = 'failed'
+
+# Registra o ticket e enfileira só se ele ainda não existir (retries com a mesma Idempotency-Key).
+# KEYS[1]: resultado, KEYS[2]: fila. ARGV: status inicial, payload, ttl.
+ENQUEUE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', tonumber(ARGV[3])) then
+    redis.call('LPUSH', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# Move até N entradas da fila para a lista de processamento do consumidor, atomicamente.
+# KEYS[1]: fila, KEYS[2]: processamento. ARGV[1]: N.
+CLAIM_SCRIPT = """
+local claimed = {}
+for i = 1, tonumber(ARGV[1]) do
+    local entry = redis.call('RPOPLPUSH', KEYS[1], KEYS[2])
+    if not entry then
+        break
+    end
+    claimed[#claimed + 1] = entry
+end
+return claimed
+"""
+
+
+def intake_config():
+    return settings.ORDER_INTAKE
+
+
+def is_async_request(request) -> bool:
+    """Modo assíncrono ligado globalmente ou pedido pelo cliente (Prefer: respond-async)."""
+    return intake_config()['MODE'] == 'async' or 'respond-async' in request.headers.get('Prefer', '')
+
+
+def dto_to_payload(dto: CreateOrderDTO) -> dict:
+    return {
+        'customer_id': dto.customer_id,
+        'items': [[item.product_id, item.quantity] for item in dto.items],
+    }
+
+
+def payload_to_dto(payload: dict) -> CreateOrderDTO:
+    return CreateOrderDTO(
+        customer_id=payload['customer_id'],
+        items=[OrderItemDTO(product_id=product_id, quantity=quantity) for product_id, quantity in payload['items']]
+    )
+
+
+def result_key(ticket: str) -> str:
+    # No espaço do tenant: um ticket (ou Idempotency-Key) de um tenant não alcança o de outro
+    return tenant_key(RESULT_KEY % {'ticket': ticket})
+
+
+def idempotency_cache_key(idempotency_key: str) -> str:
+    """Chave do pedido já criado com a Idempotency-Key, compartilhada pelos fluxos síncrono e assíncrono."""
+    return tenant_key(f"idempotency_order_{idempotency_key}")
+
+
+def enqueue(dto: CreateOrderDTO, idempotency_key: str = None):
+    """
+    Enfileira o pedido e devolve (ticket, enfileirado agora?).
+    Com Idempotency-Key o ticket é a própria chave: reenvios não geram um segundo pedido.
+    """
+    ticket = idempotency_key or uuid.uuid4().hex
+    entry = json.dumps({
+        'ticket': ticket, 'idempotency_key': idempotency_key, 'tenant_id': get_current_tenant(),
+        'order': dto_to_payload(dto)
+    })
+    initial = json.dumps({'status': QUEUED})
+
+    client = redis_client.get_redis_client()
+    script = client.register_script(ENQUEUE_SCRIPT)
+    queued = script(keys=[result_key(ticket), QUEUE_KEY], args=[initial, entry, intake_config()['RESULT_TTL']], client=client)
+    return ticket, bool(queued)
+
+
+def get_result(ticket: str):
+    raw = redis_client.get_redis_client().get(result_key(ticket))
+    return json.loads(raw) if raw is not None else None
+
+
+def claim(consumer: str, size: int) -> list:
+    """Retira até `size` entradas da fila para a lista de processamento do consumidor."""
+    client = redis_client.get_redis_client()
+    script = client.register_script(CLAIM_SCRIPT)
+    entries = script(keys=[QUEUE_KEY, PROCESSING_KEY % {'consumer': consumer}], args=[size], client=client)
+    return [json.loads(entry) for entry in entries]
+
+
+def acknowledge(consumer: str, results: list) -> None:
+    """
+    Grava os resultados e esvazia a lista de processamento do consumidor.
+    `results`: [(ticket, idempotency_key, tenant_id, resultado)].
+    """
+    client = redis_client.get_redis_client()
+    ttl = intake_config()['RESULT_TTL']
+
+    pipe = client.pipeline()
+    for ticket, _, tenant_id, result in results:
+        with tenant_context(tenant_id):
+            pipe.set(result_key(ticket), json.dumps(result, cls=DjangoJSONEncoder), ex=ttl)
+    pipe.delete(PROCESSING_KEY % {'consumer': consumer})
+    pipe.execute()
+
+    # Mesma chave do fluxo síncrono: um retry síncrono com a mesma Idempotency-Key recebe o pedido criado
+    for _, idempotency_key, tenant_id, result in results:
+        if idempotency_key and result['status'] == CREATED:
+            with tenant_context(tenant_id):
+                cache.set(idempotency_cache_key(idempotency_key), result['order'], timeout=ttl)
+
+
+def requeue_unacknowledged(consumer: str) -> int:
+    """
+    Devolve à fila o que um consumidor com o mesmo nome deixou em processamento ao morrer.
+    """
+    client = redis_client.get_redis_client()
+    processing = PROCESSING_KEY % {'consumer': consumer}
+
+    requeued = 0
+    while client.rpoplpush(processing, QUEUE_KEY) is not None:
+        requeued += 1
+    return requeued
+
+
+def group_by_overlap(entries: list) -> list:
+    """
+    Agrupa os pedidos que compartilham produtos (union-find por produto).
+    Cada grupo é processado em sequência por um único worker, então dois workers
+    nunca disputam o lock da mesma linha de produto dentro de um lote.
+    Grupos maiores primeiro, para equilibrar a carga entre os workers.
+    """
+    parent = {}
+
+    def find(product_id):
+        root = product_id
+        while parent[root] != root:
+            root = parent[root]
+        # Compressão de caminho
+        while parent[product_id] != root:
+            parent[product_id], product_id = root, parent[product_id]
+        return root
+
+    for entry in entries:
+        product_ids = [product_id for product_id, _ in entry['order']['items']]
+        for product_id in product_ids:
+            parent.setdefault(product_id, product_id)
+        for product_id in product_ids[1:]:
+            parent[find(product_id)] = find(product_ids[0])
+
+    groups = {}
+    for entry in entries:
+        items = entry['order']['items']
+        # Pedido sem itens não disputa lock: grupo próprio
+        key = find(items[0][0]) if items else ('ticket', entry['ticket'])
+        groups.setdefault(key, []).append(entry)
+
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def create_once(service: CreateOrderService, entry: dict) -> Order:
+    """
+    Cria o pedido de uma entrada da fila no máximo uma vez. O ticket é gravado no próprio pedido
+    (Order.intake_ticket, único por tenant), na transação que baixa o estoque: se o consumidor morreu
+    entre o commit e o acknowledge, a entrada devolvida à fila encontra o pedido já criado.
+    """
+    ticket = entry['ticket']
+    existing = Order.all_objects.filter(intake_ticket=ticket).first()
+    if existing is not None:
+        return existing
+
+    dto = payload_to_dto(entry['order'])
+    dto.intake_ticket = ticket
+    try:
+        return service.create_order(dto)
+    except IntegrityError:
+        # Outro consumidor gravou o mesmo ticket primeiro; a transação desta tentativa já foi desfeita
+        existing = Order.all_objects.filter(intake_ticket=ticket).first()
+        if existing is None:
+            raise
+        return existing
+
+
+def process_group(entries: list) -> list:
+    """
+    Cria, em sequência, os pedidos de um grupo. Roda nos workers do consumidor: só toca o banco;
+    os resultados voltam ao processo pai, que grava no Redis.
+    """
+    service = CreateOrderService()
+    results = []
+
+    for entry in entries:
+        # Entradas enfileiradas antes do multi-tenant não têm tenant: valem para o tenant padrão
+        tenant_id = entry.get('tenant_id')
+        try:
+            with tenant_context(tenant_id):
+                order = create_once(service, entry)
+                data = json.loads(json.dumps(OrderSerializer(order).data, cls=DjangoJSONEncoder))
+            result = {'status': CREATED, 'order': data}
+        except ValueError as e:
+            result = {'status': REJECTED, 'error': str(e)}
+        except Exception:
+            logger.exception(f"ORDER INTAKE FAILED: ticket {entry['ticket']}")
+            result = {'status': FAILED, 'error': 'Erro interno no servidor'}
+
+        results.append((entry['ticket'], entry.get('idempotency_key'), tenant_id, result))
+
+    return results
@@ -0,0 +1,31 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from orders.services import ArchiveOrdersService
+
+class Command(BaseCommand):
+    help = 'Arquiva pedidos entregues ou cancelados mais antigos que N meses, em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=12, help='Idade mínima do pedido em meses (30 dias)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Pedidos movidos por transação')
+        parser.add_argument('--max-chunks', type=int, default=None, help='Limite de lotes nesta execução')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=30 * options['months'])
+        service = ArchiveOrdersService()
+
+        total = 0
+        chunks = 0
+
+        # Cada lote é uma transação curta, para não segurar locks por muito tempo
+        while options['max_chunks'] is None or chunks < options['max_chunks']:
+            archived = service.archive_chunk(cutoff, chunk_size=options['chunk_size'])
+            if not archived:
+                break
+
+            total += archived
+            chunks += 1
+            self.stdout.write(f'Lote {chunks}: {archived} pedidos arquivados.')
+
+        self.stdout.write(self.style.SUCCESS(f'Arquivamento concluído: {total} pedidos movidos (corte: {cutoff:%Y-%m-%d}).'))
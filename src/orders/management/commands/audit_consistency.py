@@ -0,0 +1,159 @@
+import json
+from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from orders.management.jobs import ChunkedJobCommand
+from orders.models import Order, OrderItem, Product, StockMovement
+from orders.services import StockLedgerService
+
+REPAIR_OBSERVATION = 'Correção de auditoria (audit_consistency)'
+
+CENT = Decimal('0.01')
+
+CHECKS = ['order_totals', 'order_ledger', 'product_stock']
+
+
+class Command(ChunkedJobCommand):
+    help = (
+        'Audita invariantes de pedidos e estoque com consultas agregadas por faixas de ID. '
+        'Divergências saem em NDJSON; --repair corrige as que têm fonte de verdade clara.'
+    )
+    job_name = 'audit_consistency'
+    default_chunk_size = 10000
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--check', action='append', choices=CHECKS, help='Verificação a executar (padrão: todas)')
+        parser.add_argument('--repair', action='store_true', help='Corrige total dos pedidos e completa o ledger dos produtos')
+        parser.add_argument('--output', default=None, help='Arquivo NDJSON (acrescenta ao final); padrão: stdout')
+
+    @property
+    def progress(self):
+        # Sem --output o NDJSON vai para o stdout; o progresso sai pelo stderr
+        return self.stdout if self._output else self.stderr
+
+    def handle(self, *args, **options):
+        self._output = open(options['output'], 'a', encoding='utf-8') if options['output'] else None
+        try:
+            for check in options['check'] or CHECKS:
+                self.check = check
+                super().handle(*args, **{**options, 'check': check})
+        finally:
+            if self._output:
+                self._output.close()
+
+    def get_job_name(self, options):
+        return f"{self.job_name}:{options['check']}"
+
+    def get_queryset(self):
+        if self.check == 'product_stock':
+            return Product.all_objects.all()
+
+        queryset = Order.all_objects.all()
+        if self.check == 'order_ledger':
+            # Pedidos anteriores ao ledger não têm movimentos: começa no primeiro pedido registrado nele
+            first = StockMovement.objects.filter(reason=StockMovement.Reason.ORDER).aggregate(first=Min('order_id'))['first']
+            queryset = queryset.filter(id__gte=first) if first else queryset.none()
+        return queryset
+
+    def handle_records(self, records):
+        lines = ''.join(json.dumps(record, cls=DjangoJSONEncoder) + '\n' for record in records)
+        if self._output:
+            self._output.write(lines)
+            self._output.flush()
+        else:
+            self.stdout.write(lines, ending='')
+
+    def process_range(self, start, end, check=None, repair=False, **options):
+        model = Product if check == 'product_stock' else Order
+        processed = model.all_objects.filter(id__gte=start, id__lte=end).count()
+
+        mismatches = list(getattr(self, f'_find_{check}')(start, end))
+        repaired = set()
+        if repair and mismatches and check != 'order_ledger':
+            repaired = getattr(self, f'_repair_{check}')([row['id'] for row in mismatches])
+
+        records = [{'check': check, **row, 'repaired': row['id'] in repaired} for row in mismatches]
+        return {'processed': processed, f'{check}.mismatched': len(records), f'{check}.repaired': len(repaired)}, records
+
+    # Verificações: uma consulta agregada por faixa, devolvendo só as linhas divergentes
+
+    def _order_totals(self, queryset):
+        # LEFT JOIN + GROUP BY; a comparação vira HAVING no banco
+        return (
+            queryset.annotate(expected=Coalesce(Sum('items__subtotal'), Value(0), output_field=Order._meta.get_field('total_amount')))
+            .exclude(total_amount=F('expected'))
+        )
+
+    def _find_order_totals(self, start, end):
+        rows = self._order_totals(Order.all_objects.filter(id__gte=start, id__lte=end)).values_list('id', 'total_amount', 'expected')
+        for order_id, actual, expected in rows:
+            # Alguns bancos devolvem a soma sem as casas decimais da coluna
+            yield {'id': order_id, 'actual': actual, 'expected': expected.quantize(CENT)}
+
+    def _find_order_ledger(self, start, end):
+        # Saldo dos movimentos do pedido: -quantidade dos itens, ou zero se cancelado (estoque devolvido)
+        items_quantity = Subquery(
+            OrderItem.objects.filter(order_id=OuterRef('pk')).order_by()
+            .values('order_id').annotate(total=Sum('quantity')).values('total')
+        )
+        ledger_net = Subquery(
+            StockMovement.objects.filter(order_id=OuterRef('pk')).order_by()
+            .values('order_id').annotate(total=Sum('delta')).values('total')
+        )
+        rows = (
+            Order.all_objects.filter(id__gte=start, id__lte=end)
+            .annotate(items_quantity=Coalesce(items_quantity, 0), ledger_net=Coalesce(ledger_net, 0))
+            .annotate(expected=Case(
+                When(status=Order.Status.CANCELED, then=Value(0)),
+                default=-F('items_quantity'),
+                output_field=IntegerField()
+            ))
+            .exclude(ledger_net=F('expected'))
+            .values_list('id', 'status', 'ledger_net', 'expected')
+        )
+        for order_id, status, actual, expected in rows:
+            yield {'id': order_id, 'status': status, 'actual': actual, 'expected': expected}
+
+    def _product_stock(self, queryset):
+        ledger_total = Subquery(
+            StockMovement.objects.filter(product_id=OuterRef('pk')).order_by()
+            .values('product_id').annotate(total=Sum('delta')).values('total')
+        )
+        return queryset.annotate(ledger=Coalesce(ledger_total, 0)).exclude(stock_quantity=F('ledger'))
+
+    def _find_product_stock(self, start, end):
+        rows = self._product_stock(Product.all_objects.filter(id__gte=start, id__lte=end)).values_list('id', 'ledger', 'stock_quantity')
+        for product_id, ledger, stock in rows:
+            # Estoque do ledger vs coluna; `expected` segue o ledger, a fonte das movimentações
+            yield {'id': product_id, 'actual': stock, 'expected': ledger}
+
+    # Reparos: travam as linhas e recalculam antes de gravar, para não corrigir com dado velho
+
+    @transaction.atomic
+    def _repair_order_totals(self, ids):
+        list(Order.all_objects.select_for_update().filter(id__in=ids).order_by('id').values_list('id', flat=True))
+
+        repaired = set()
+        for order_id, expected in self._order_totals(Order.all_objects.filter(id__in=ids)).values_list('id', 'expected'):
+            Order.all_objects.filter(id=order_id).update(total_amount=expected.quantize(CENT))
+            repaired.add(order_id)
+        return repaired
+
+    @transaction.atomic
+    def _repair_product_stock(self, ids):
+        # A coluna é protegida pelos locks dos pedidos: o ledger é que recebe o movimento que faltou
+        list(Product.all_objects.select_for_update().filter(id__in=ids).order_by('id').values_list('id', flat=True))
+
+        movements = [
+            StockMovement(
+                product_id=product_id, delta=stock - ledger,
+                reason=StockMovement.Reason.MANUAL, observation=REPAIR_OBSERVATION
+            )
+            for product_id, ledger, stock in self._product_stock(Product.all_objects.filter(id__in=ids))
+            .values_list('id', 'ledger', 'stock_quantity')
+        ]
+        StockLedgerService().record(movements)
+        return {movement.product_id for movement in movements}
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from orders.models import Order, OrderItem, OrderStatusHistory
+
+class Command(BaseCommand):
+    help = 'Preenche as colunas de resumo dos pedidos (item_count, total_quantity, last_status_change_at) em lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Quantidade de IDs de pedido por lote')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        bounds = Order.all_objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if bounds['min_id'] is None:
+            self.stdout.write('Nenhum pedido encontrado.')
+            return
+
+        updated = 0
+        start = bounds['min_id']
+
+        # Percorre faixas de ID para nunca carregar a tabela inteira em memória
+        while start <= bounds['max_id']:
+            end = start + chunk_size - 1
+            updated += self._backfill_range(start, end)
+            self.stdout.write(f'Pedidos {start}-{end} processados.')
+            start = end + 1
+
+        self.stdout.write(self.style.SUCCESS(f'Backfill concluído: {updated} pedidos atualizados.'))
+
+    @transaction.atomic
+    def _backfill_range(self, start, end):
+        orders = list(
+            Order.all_objects.filter(id__range=(start, end))
+            .only('id', 'created_at', 'item_count', 'total_quantity', 'last_status_change_at')
+        )
+        if not orders:
+            return 0
+
+        items = {
+            row['order_id']: row
+            for row in OrderItem.objects.filter(order_id__gte=start, order_id__lte=end)
+            .values('order_id')
+            .annotate(item_count=Count('id'), total_quantity=Sum('quantity'))
+        }
+        last_changes = dict(
+            OrderStatusHistory.objects.filter(order_id__gte=start, order_id__lte=end)
+            .order_by()
+            .values('order_id')
+            .annotate(last_change=Max('changed_at'))
+            .values_list('order_id', 'last_change')
+        )
+
+        for order in orders:
+            summary = items.get(order.id, {})
+            order.item_count = summary.get('item_count', 0)
+            order.total_quantity = summary.get('total_quantity') or 0
+            order.last_status_change_at = last_changes.get(order.id, order.created_at)
+
+        Order.all_objects.bulk_update(orders, ['item_count', 'total_quantity', 'last_status_change_at'])
+        return len(orders)
@@ -0,0 +1,125 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from orders.allocation import WarehouseAllocator, allocate, warehouse_preferences
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+from orders.models import Customer, Product, Order, Warehouse, WarehouseRoute, WarehouseStock
+from orders.services import CreateOrderService
+
+REGIONS = ['SP', 'RJ', 'MG', 'PR', 'RS', 'BA', 'PE', 'GO', 'SC', 'CE']
+
+class Command(BaseCommand):
+    help = 'Benchmark da alocação multi-centro: pedidos de N linhas distribuídos entre os centros de distribuição'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=100, help='Linhas por pedido')
+        parser.add_argument('--warehouses', type=int, default=10, help='Centros de distribuição')
+        parser.add_argument('--products', type=int, default=1000, help='Produtos semeados')
+        parser.add_argument('--orders', type=int, default=300, help='Pedidos criados')
+        parser.add_argument('--budget-ms', type=float, default=2.0, help='Orçamento p99 do algoritmo de alocação em ms')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        customers, products = self._fixtures(rng, options['warehouses'], options['products'])
+
+        orders = [
+            (rng.choice(customers), [(product_id, rng.choice([1, 2, 5, 30])) for product_id in rng.sample(products, options['lines'])])
+            for _ in range(options['orders'])
+        ]
+
+        # Só o algoritmo, sobre um retrato do estoque: custo puro da otimização
+        stock = {}
+        for warehouse_id, product_id, quantity in WarehouseStock.objects.filter(product_id__in=products).values_list('warehouse_id', 'product_id', 'quantity'):
+            stock.setdefault(product_id, {})[warehouse_id] = quantity
+
+        timings, shipments = [], []
+        for customer, lines in orders:
+            preference = warehouse_preferences.for_region(customer.region)
+            start = time.perf_counter()
+            result = allocate(dict(lines), stock, preference)
+            timings.append((time.perf_counter() - start) * 1000)
+            shipments.append(len({warehouse_id for warehouse_id, _, _ in result}))
+
+        p50, p99 = self._percentiles(timings)
+        ok = p99 <= options['budget_ms']
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(style(
+            f'alocação: p50={p50:.3f}ms p99={p99:.3f}ms (orçamento {options["budget_ms"]}ms), '
+            f'{sum(shipments) / len(shipments):.2f} remessas/pedido'
+        ))
+
+        # Checkout completo: estoque único (lock por produto) vs multi-centro (lock só nas linhas escolhidas)
+        for label, allocator in [('estoque único', None), ('multi-centro', WarehouseAllocator())]:
+            service = CreateOrderService(allocator=allocator)
+            # Sem alocador o serviço seguiria settings.INVENTORY; aqui o cenário é fixo
+            service.allocator = allocator
+            created_ids, timings = [], []
+            for customer, lines in orders:
+                dto = CreateOrderDTO(customer_id=customer.id, items=[OrderItemDTO(product_id, quantity) for product_id, quantity in lines])
+                start = time.perf_counter()
+                created_ids.append(service.create_order(dto).id)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            p50, p99 = self._percentiles(timings)
+            self.stdout.write(f'{label}: p50={p50:.2f}ms p99={p99:.2f}ms por pedido de {options["lines"]} linhas')
+            Order.all_objects.filter(id__in=created_ids).delete()
+
+        if not ok:
+            raise CommandError('p99 da alocação acima do orçamento.')
+
+    def _percentiles(self, timings):
+        timings = sorted(timings)
+        return timings[len(timings) // 2], timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+
+    def _fixtures(self, rng, total_warehouses, total_products):
+        regions = REGIONS[:total_warehouses] + [f'X{i}' for i in range(total_warehouses - len(REGIONS))]
+        warehouses = []
+        for index, region in enumerate(regions):
+            warehouse, _ = Warehouse.objects.get_or_create(
+                code=f'BENCH-CD-{index}', defaults={'name': f'Centro Benchmark {index}', 'region': region, 'priority': index}
+            )
+            warehouses.append(warehouse)
+
+        # Rotas: cada região prefere o próprio centro e os dois seguintes
+        if not WarehouseRoute.objects.filter(warehouse__code__startswith='BENCH-CD-').exists():
+            WarehouseRoute.objects.bulk_create([
+                WarehouseRoute(region=region, warehouse=warehouses[(index + offset) % len(warehouses)], rank=offset)
+                for index, region in enumerate(regions) for offset in range(3)
+            ])
+
+        customers = []
+        for index, region in enumerate(regions):
+            customer, _ = Customer.objects.get_or_create(
+                cpf_cnpj=f'0000000001{index:04d}',
+                defaults={'name': f'Cliente Benchmark {region}', 'email': f'bench-cd-{index}@teste.com', 'region': region}
+            )
+            customers.append(customer)
+
+        existing = set(Product.objects.filter(sku__startswith='BENCH-WH-').values_list('sku', flat=True))
+        Product.objects.bulk_create([
+            Product(sku=f'BENCH-WH-{i}', name=f'Produto Centro {i}', price=10, stock_quantity=0)
+            for i in range(total_products) if f'BENCH-WH-{i}' not in existing
+        ])
+        products = list(Product.objects.filter(sku__startswith='BENCH-WH-').values_list('id', flat=True))
+
+        # Cada produto tem um centro com saldo alto (não esgota durante a medição) e saldos menores
+        # em ~60% dos demais: nenhum centro atende sozinho um pedido grande, como na operação real
+        if not WarehouseStock.objects.filter(product_id__in=products).exists():
+            rows, totals = [], {}
+            for product_id in products:
+                main = rng.choice(warehouses)
+                for warehouse in warehouses:
+                    if warehouse is main:
+                        quantity = 10**6
+                    elif rng.random() < 0.6:
+                        quantity = rng.choice([20, 200, 2000])
+                    else:
+                        continue
+                    rows.append(WarehouseStock(warehouse=warehouse, product_id=product_id, quantity=quantity))
+                    totals[product_id] = totals.get(product_id, 0) + quantity
+            WarehouseStock.objects.bulk_create(rows)
+            for product_id, total in totals.items():
+                Product.objects.filter(id=product_id).update(stock_quantity=total)
+
+        return customers, products
@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from orders.models import Customer, Order
+from orders.pagination import CustomerOrderCursorPagination
+from orders.views import CustomerViewSet
+
+BENCH_CPF = '00000000000001'
+
+class Command(BaseCommand):
+    help = 'Benchmark do histórico de pedidos do cliente (/customers/{id}/orders/) sobre dados semeados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000, help='Pedidos semeados para o cliente de benchmark')
+        parser.add_argument('--requests', type=int, default=500, help='Quantidade de requisições medidas')
+        parser.add_argument('--budget-ms', type=float, default=20.0, help='Orçamento de latência p99 em ms')
+        parser.add_argument('--cleanup', action='store_true', help='Remove os dados semeados ao final')
+
+    def handle(self, *args, **options):
+        customer = self._seed(options['orders'])
+
+        # Chama a view diretamente, sem throttling, para medir só consulta + serialização
+        view = CustomerViewSet.as_view({'get': 'orders'}, throttle_classes=[])
+        factory = APIRequestFactory()
+        host = settings.ALLOWED_HOSTS[0]
+
+        scenarios = [
+            ('primeira página', {}),
+            ('página profunda (90%)', {'cursor': self._deep_cursor(customer)}),
+            ('filtro por status', {'status': Order.Status.DELIVERED}),
+            ('filtro por data', {'created_after': (timezone.now() - timedelta(days=30)).isoformat()}),
+            ('com itens', {'expand': 'items'}),
+        ]
+
+        failed = False
+        for name, params in scenarios:
+            timings = []
+            for _ in range(options['requests']):
+                request = factory.get(f'/api/v1/customers/{customer.id}/orders/', params, HTTP_HOST=host)
+                start = time.perf_counter()
+                response = view(request, pk=customer.id)
+                response.render()
+                timings.append((time.perf_counter() - start) * 1000)
+
+            timings.sort()
+            p50 = timings[len(timings) // 2]
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            ok = p99 <= options['budget_ms']
+            failed = failed or not ok
+
+            style = self.style.SUCCESS if ok else self.style.ERROR
+            self.stdout.write(style(f'{name}: p50={p50:.2f}ms p99={p99:.2f}ms (orçamento {options["budget_ms"]}ms)'))
+
+        if options['cleanup']:
+            Order.all_objects.filter(customer=customer).delete()
+            customer.hard_delete()
+
+        if failed:
+            raise CommandError('p99 acima do orçamento.')
+
+    def _seed(self, total):
+        customer, _ = Customer.objects.get_or_create(
+            cpf_cnpj=BENCH_CPF,
+            defaults={'name': 'Cliente Benchmark', 'email': 'benchmark@teste.com'}
+        )
+
+        existing = Order.all_objects.filter(customer=customer).count()
+        missing = total - existing
+        if missing <= 0:
+            return customer
+
+        self.stdout.write(f'Semeando {missing} pedidos...')
+        statuses = [choice for choice, _ in Order.Status.choices]
+        now = timezone.now()
+
+        for offset in range(0, missing, 5000):
+            Order.objects.bulk_create([
+                Order(
+                    customer=customer,
+                    status=statuses[i % len(statuses)],
+                    total_amount=100,
+                    item_count=1,
+                    total_quantity=1
+                )
+                for i in range(offset, min(offset + 5000, missing))
+            ])
+
+        # Um pedido por minuto, cada um com created_at próprio como em produção
+        # (auto_now_add ignora valores no bulk_create, então as datas são gravadas depois)
+        seeded = Order.all_objects.filter(customer=customer).order_by('id').only('id', 'created_at')[existing:]
+        batch = []
+        for position, order in enumerate(seeded.iterator(chunk_size=5000), start=existing):
+            order.created_at = now - timedelta(minutes=total - position)
+            batch.append(order)
+            if len(batch) == 5000:
+                Order.all_objects.bulk_update(batch, ['created_at'])
+                batch = []
+        if batch:
+            Order.all_objects.bulk_update(batch, ['created_at'])
+
+        return customer
+
+    def _deep_cursor(self, customer):
+        """Cursor posicionado a 90% do histórico: mede o custo de uma página profunda."""
+        orders = Order.objects.filter(customer=customer).order_by('-created_at', '-id').only('id', 'created_at')
+        anchor = orders[int(orders.count() * 0.9)]
+        return CustomerOrderCursorPagination().encode_cursor(anchor.created_at, anchor.id)
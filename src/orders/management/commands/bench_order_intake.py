@@ -0,0 +1,88 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from orders.models import Customer, Product, Order
+from orders.services import CreateOrderService
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+class Command(BaseCommand):
+    help = 'Benchmark da criação de pedidos com mistura de requisições inválidas (com e sem pré-validação)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requisições por cenário')
+        parser.add_argument('--invalid-ratio', type=float, default=0.3, help='Fração de pedidos inválidos')
+        parser.add_argument('--items', type=int, default=5, help='Itens por pedido')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        customer, inactive_customer, active, inactive = self._fixtures()
+        rng = random.Random(options['seed'])
+        dtos = [self._build_dto(rng, options, customer, inactive_customer, active, inactive) for _ in range(options['requests'])]
+
+        for label, pre_validate in [('sem pré-validação', False), ('com pré-validação', True)]:
+            service = CreateOrderService(pre_validate=pre_validate)
+            created_ids = []
+            valid_timings, invalid_timings = [], []
+
+            started = time.perf_counter()
+            for dto, is_valid in dtos:
+                start = time.perf_counter()
+                try:
+                    created_ids.append(service.create_order(dto).id)
+                except ValueError:
+                    pass
+                elapsed = (time.perf_counter() - start) * 1000
+                (valid_timings if is_valid else invalid_timings).append(elapsed)
+            total = time.perf_counter() - started
+
+            self.stdout.write(self.style.SUCCESS(label))
+            self.stdout.write(f'  throughput: {len(dtos) / total:.0f} req/s')
+            self.stdout.write(f'  válidos:   média {self._mean(valid_timings):.3f}ms')
+            self.stdout.write(f'  inválidos: média {self._mean(invalid_timings):.3f}ms')
+
+            # Desfaz os pedidos criados para o próximo cenário partir do mesmo estado
+            Order.all_objects.filter(id__in=created_ids).delete()
+            Product.objects.filter(sku__startswith='BENCH-INTAKE-').update(stock_quantity=10**9)
+
+    def _build_dto(self, rng, options, customer, inactive_customer, active, inactive):
+        product_ids = rng.sample(active, options['items'])
+        is_valid = rng.random() >= options['invalid_ratio']
+        customer_id = customer.id
+
+        if not is_valid:
+            kind = rng.choice(['inactive_product', 'missing_product', 'inactive_customer'])
+            if kind == 'inactive_product':
+                product_ids[-1] = rng.choice(inactive)
+            elif kind == 'missing_product':
+                product_ids[-1] = -1
+            else:
+                customer_id = inactive_customer.id
+
+        # Inválidos no fim, como no pior caso: a transação chega a travar os demais itens
+        items = [OrderItemDTO(product_id=product_id, quantity=1) for product_id in product_ids]
+        return CreateOrderDTO(customer_id=customer_id, items=items), is_valid
+
+    def _fixtures(self):
+        customer, _ = Customer.objects.get_or_create(
+            cpf_cnpj='00000000000002',
+            defaults={'name': 'Cliente Benchmark Intake', 'email': 'bench-intake@teste.com'}
+        )
+        inactive_customer, _ = Customer.objects.get_or_create(
+            cpf_cnpj='00000000000003',
+            defaults={'name': 'Cliente Inativo Benchmark', 'email': 'bench-inativo@teste.com', 'is_active': False}
+        )
+
+        for i in range(200):
+            Product.objects.get_or_create(
+                sku=f'BENCH-INTAKE-{i}',
+                defaults={'name': f'Produto Bench {i}', 'price': 10, 'is_active': i % 10 != 0}
+            )
+        Product.objects.filter(sku__startswith='BENCH-INTAKE-').update(stock_quantity=10**9)
+
+        products = Product.objects.filter(sku__startswith='BENCH-INTAKE-')
+        active = list(products.filter(is_active=True).values_list('id', flat=True))
+        inactive = list(products.filter(is_active=False).values_list('id', flat=True))
+        return customer, inactive_customer, active, inactive
+
+    def _mean(self, values):
+        return sum(values) / len(values) if values else 0.0
@@ -0,0 +1,79 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from orders.models import Customer, Product, PriceList, PriceRule
+from orders.pricing import pricing_engine
+
+class Command(BaseCommand):
+    help = 'Benchmark do motor de preços: custo de precificar pedidos grandes com as regras compiladas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=300, help='Linhas por pedido')
+        parser.add_argument('--orders', type=int, default=2000, help='Pedidos precificados')
+        parser.add_argument('--products', type=int, default=1000, help='Produtos semeados')
+        parser.add_argument('--budget-ms', type=float, default=1.0, help='Orçamento p99 por pedido em ms')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        customer, products = self._fixtures(options['products'])
+        rng = random.Random(options['seed'])
+
+        orders = [
+            [(product_id, rng.choice([1, 5, 20, 120]), price) for product_id, price in rng.sample(products, options['lines'])]
+            for _ in range(options['orders'])
+        ]
+
+        # Compila as regras fora da medição
+        pricing_engine.invalidate()
+        pricing_engine.price(customer.id, orders[0])
+
+        timings = []
+        for lines in orders:
+            start = time.perf_counter()
+            pricing_engine.price(customer.id, lines)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        ok = p99 <= options['budget_ms']
+
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(style(
+            f'{options["lines"]} linhas: p50={p50:.3f}ms p99={p99:.3f}ms (orçamento {options["budget_ms"]}ms)'
+        ))
+        if not ok:
+            raise CommandError('p99 acima do orçamento.')
+
+    def _fixtures(self, total):
+        customer, _ = Customer.objects.get_or_create(
+            cpf_cnpj='00000000000004',
+            defaults={'name': 'Cliente Benchmark Preços', 'email': 'bench-precos@teste.com'}
+        )
+
+        existing = set(Product.objects.filter(sku__startswith='BENCH-PRICE-').values_list('sku', flat=True))
+        Product.objects.bulk_create([
+            Product(sku=f'BENCH-PRICE-{i}', name=f'Produto Preço {i}', price=Decimal('10.00') + i % 50)
+            for i in range(total) if f'BENCH-PRICE-{i}' not in existing
+        ])
+        products = list(Product.objects.filter(sku__startswith='BENCH-PRICE-').values_list('id', 'price'))
+
+        # Tabela do cliente com faixas em metade dos produtos e uma promoção geral em um quarto deles
+        if not PriceList.objects.filter(name='Bench Contrato').exists():
+            negotiated = PriceList.objects.create(name='Bench Contrato', customer=customer)
+            promotion = PriceList.objects.create(
+                name='Bench Promoção', ends_at=timezone.now() + timedelta(days=365)
+            )
+            rules = []
+            for index, (product_id, price) in enumerate(products):
+                if index % 2 == 0:
+                    rules.append(PriceRule(price_list=negotiated, product_id=product_id, min_quantity=1, unit_price=price - 1))
+                    rules.append(PriceRule(price_list=negotiated, product_id=product_id, min_quantity=100, unit_price=price - 2))
+                if index % 4 == 0:
+                    rules.append(PriceRule(price_list=promotion, product_id=product_id, min_quantity=10, discount_percent=Decimal('12.5')))
+            PriceRule.objects.bulk_create(rules)
+
+        return customer, products
@@ -0,0 +1,95 @@
+import gc
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from orders.models import Customer, Product, Order, OrderItem
+from orders.read_model import iter_orders
+
+BENCH_CPF = '00000000000005'
+
+class Command(BaseCommand):
+    help = 'Benchmark de memória: modelo de leitura compacto (values_list + __slots__) vs instâncias de model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000000, help='Pedidos semeados para o cliente de benchmark')
+        parser.add_argument('--items', type=int, default=2, help='Itens por pedido semeado')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Linhas por lote nas leituras')
+        parser.add_argument('--cleanup', action='store_true', help='Remove os dados semeados ao final')
+
+    def handle(self, *args, **options):
+        customer = self._seed(options['orders'], options['items'])
+        queryset = Order.objects.filter(customer=customer)
+        items = OrderItem.objects.filter(order__customer=customer)
+        chunk_size = options['chunk_size']
+
+        scenarios = [
+            # Tudo em memória ao mesmo tempo: custo por linha retida
+            ('models (retido)', lambda: (list(queryset.iterator(chunk_size)), list(items.iterator(chunk_size)))),
+            ('read model (retido)', lambda: list(iter_orders(queryset, chunk_size))),
+            # Leitura em fluxo, como numa exportação: só o pico por lote importa
+            ('models (fluxo)', lambda: self._drain(queryset.prefetch_related('items').iterator(chunk_size))),
+            ('read model (fluxo)', lambda: self._drain(iter_orders(queryset, chunk_size))),
+        ]
+
+        total = options['orders']
+        for name, load in scenarios:
+            retained, peak, elapsed = self._measure(load)
+            self.stdout.write(
+                f'{name}: retido {retained / 2**20:.1f}MB ({retained / total:.0f} B/pedido), '
+                f'pico {peak / 2**20:.1f}MB, {elapsed:.1f}s'
+            )
+
+        if options['cleanup']:
+            Order.all_objects.filter(customer=customer).delete()
+            customer.hard_delete()
+
+    def _measure(self, load):
+        gc.collect()
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+
+        result = load()
+        elapsed = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        del result
+        return current - baseline, peak - baseline, elapsed
+
+    def _drain(self, rows):
+        for _ in rows:
+            pass
+
+    def _seed(self, total, items_per_order):
+        customer, _ = Customer.objects.get_or_create(
+            cpf_cnpj=BENCH_CPF,
+            defaults={'name': 'Cliente Benchmark Leitura', 'email': 'bench-leitura@teste.com'}
+        )
+        product, _ = Product.objects.get_or_create(
+            sku='BENCH-READ-1', defaults={'name': 'Produto Benchmark Leitura', 'price': 10}
+        )
+
+        existing = Order.all_objects.filter(customer=customer).count()
+        missing = total - existing
+        if missing <= 0:
+            return customer
+
+        self.stdout.write(f'Semeando {missing} pedidos...')
+        for offset in range(0, missing, 5000):
+            orders = Order.objects.bulk_create([
+                Order(
+                    customer=customer, total_amount=10 * items_per_order,
+                    item_count=items_per_order, total_quantity=items_per_order
+                )
+                for _ in range(offset, min(offset + 5000, missing))
+            ])
+            if not orders[0].pk:
+                # Bancos sem RETURNING no bulk_create (MySQL): busca os IDs recém-criados
+                orders = list(Order.all_objects.filter(customer=customer).order_by('-id')[:len(orders)])
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product=product, quantity=1, unit_price=10, subtotal=10)
+                for order in orders for _ in range(items_per_order)
+            ])
+
+        return customer
@@ -0,0 +1,133 @@
+import random
+import threading
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.exceptions import Throttled
+from orders.admission import order_admission
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+from orders.models import Customer, Product, Order, Tenant
+from orders.services import CreateOrderService
+from orders.tenancy import tenant_context
+
+QUIET, NOISY = 'bench-quiet', 'bench-noisy'
+
+class Command(BaseCommand):
+    help = 'Benchmark de isolamento entre tenants: latência e recusas de um tenant comum com um tenant barulhento em pico'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=300, help='Pedidos do tenant comum por cenário')
+        parser.add_argument('--noisy-threads', type=int, default=None, help='Threads do tenant barulhento (padrão: MAX_IN_FLIGHT)')
+        parser.add_argument('--items', type=int, default=5, help='Itens por pedido')
+        parser.add_argument('--max-slowdown', type=float, default=3.0, help='p99 máximo do tenant comum em relação à linha de base')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        fixtures = {code: self._fixtures(code) for code in (QUIET, NOISY)}
+        noisy_threads = options['noisy_threads'] or settings.ADMISSION_CONTROL['MAX_IN_FLIGHT']
+
+        quiet_orders = [self._build_dto(rng, fixtures[QUIET], options['items']) for _ in range(options['orders'])]
+
+        baseline = self._run_quiet(fixtures[QUIET], quiet_orders)
+        self._report('linha de base (só o tenant comum)', baseline)
+
+        # Tenant barulhento: threads criando pedidos sem pausa, o tempo todo do cenário
+        stop = threading.Event()
+        noisy = {'admitted': 0, 'rejected': 0}
+        counter_lock = threading.Lock()
+
+        def hammer(seed):
+            worker_rng = random.Random(seed)
+            service = CreateOrderService()
+            try:
+                with tenant_context(fixtures[NOISY]['tenant_id']):
+                    while not stop.is_set():
+                        outcome = self._create(service, self._build_dto(worker_rng, fixtures[NOISY], options['items']))
+                        with counter_lock:
+                            noisy[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=hammer, args=(options['seed'] + i,)) for i in range(noisy_threads)]
+        for thread in threads:
+            thread.start()
+        try:
+            # Dá tempo para o barulhento ocupar as vagas antes de medir
+            time.sleep(0.5)
+            contended = self._run_quiet(fixtures[QUIET], quiet_orders)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self._report(f'com tenant barulhento ({noisy_threads} threads)', contended)
+        self.stdout.write(f'  barulhento: {noisy["admitted"]} admitidos, {noisy["rejected"]} recusados (429)')
+
+        for fixture in fixtures.values():
+            Order.all_objects.filter(tenant_id=fixture['tenant_id'], customer_id=fixture['customer_id']).delete()
+            Product.all_objects.filter(id__in=fixture['products']).update(stock_quantity=10**9)
+
+        slowdown = contended['p99'] / baseline['p99'] if baseline['p99'] else 0.0
+        self.stdout.write(f'p99 do tenant comum: {slowdown:.2f}x a linha de base (máximo {options["max_slowdown"]}x)')
+        if contended['rejected']:
+            raise CommandError('O tenant comum teve pedidos recusados pelo pico do tenant barulhento.')
+        if slowdown > options['max_slowdown']:
+            raise CommandError('Latência do tenant comum degradou acima do limite.')
+
+    def _run_quiet(self, fixture, orders):
+        service = CreateOrderService()
+        timings, rejected = [], 0
+        with tenant_context(fixture['tenant_id']):
+            for dto in orders:
+                start = time.perf_counter()
+                if self._create(service, dto) == 'rejected':
+                    rejected += 1
+                timings.append((time.perf_counter() - start) * 1000)
+
+        timings.sort()
+        result = {
+            'p50': timings[len(timings) // 2],
+            'p99': timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+            'rejected': rejected,
+        }
+        return result
+
+    def _create(self, service, dto):
+        # Mesmo caminho da view: admissão (global e do tenant) e depois a transação
+        try:
+            with order_admission.admit():
+                service.create_order(dto)
+        except Throttled:
+            return 'rejected'
+        return 'admitted'
+
+    def _report(self, label, result):
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f'  tenant comum: p50={result["p50"]:.2f}ms p99={result["p99"]:.2f}ms, {result["rejected"]} recusados')
+
+    def _build_dto(self, rng, fixture, items):
+        product_ids = rng.sample(fixture['products'], items)
+        return CreateOrderDTO(
+            customer_id=fixture['customer_id'],
+            items=[OrderItemDTO(product_id=product_id, quantity=1) for product_id in product_ids]
+        )
+
+    def _fixtures(self, code):
+        tenant, _ = Tenant.objects.get_or_create(code=code, defaults={'name': f'Tenant {code}'})
+
+        with tenant_context(tenant.id):
+            customer, _ = Customer.objects.get_or_create(
+                cpf_cnpj='00000000000042',
+                defaults={'name': f'Cliente {code}', 'email': f'{code}@teste.com'}
+            )
+            existing = set(Product.objects.filter(sku__startswith='BENCH-TENANT-').values_list('sku', flat=True))
+            Product.objects.bulk_create([
+                Product(sku=f'BENCH-TENANT-{i}', name=f'Produto {code} {i}', price=10)
+                for i in range(100) if f'BENCH-TENANT-{i}' not in existing
+            ])
+            products = Product.objects.filter(sku__startswith='BENCH-TENANT-')
+            products.update(stock_quantity=10**9)
+
+            return {'tenant_id': tenant.id, 'customer_id': customer.id, 'products': list(products.values_list('id', flat=True))}
@@ -0,0 +1,64 @@
+import os
+import signal
+import socket
+import threading
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from orders import intake
+from orders.management.jobs import fork_pool
+
+class Command(BaseCommand):
+    help = 'Consome a fila de criação assíncrona de pedidos com um pool de processos'
+
+    def add_arguments(self, parser):
+        config = settings.ORDER_INTAKE
+        parser.add_argument('--workers', type=int, default=config['WORKERS'], help='Processos que criam pedidos')
+        parser.add_argument('--batch-size', type=int, default=config['BATCH_SIZE'], help='Pedidos retirados da fila por vez')
+        parser.add_argument('--consumer', default=None, help='Nome estável do consumidor (recupera o lote de uma execução que morreu)')
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila e encerra')
+
+    def handle(self, *args, **options):
+        consumer = options['consumer'] or f'{socket.gethostname()}:{os.getpid()}'
+        requeued = intake.requeue_unacknowledged(consumer)
+        if requeued:
+            self.stdout.write(f'{requeued} pedidos não confirmados devolvidos à fila.')
+
+        pool = None
+        if options['workers'] > 1:
+            pool = fork_pool(options['workers'])
+
+        # SIGTERM (deploy, scale down): termina e confirma o lote em andamento antes de sair.
+        # Instalado depois do fork: os workers mantêm o comportamento padrão e são encerrados pelo pai.
+        stopping = threading.Event()
+        previous_handler = signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+
+        processed = 0
+        try:
+            while not stopping.is_set():
+                entries = intake.claim(consumer, options['batch_size'])
+                if not entries:
+                    if options['once']:
+                        break
+                    stopping.wait(settings.ORDER_INTAKE['IDLE_SLEEP'])
+                    continue
+
+                groups = intake.group_by_overlap(entries)
+                if pool is None:
+                    batches = map(intake.process_group, groups)
+                else:
+                    batches = pool.imap_unordered(intake.process_group, groups)
+                results = [result for batch in batches for result in batch]
+
+                intake.acknowledge(consumer, results)
+                processed += len(results)
+                self.stdout.write(f'{len(results)} pedidos processados em {len(groups)} grupos.')
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if stopping.is_set():
+            self.stdout.write(self.style.WARNING(f'Encerrado por SIGTERM: {processed} pedidos processados.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fila esvaziada: {processed} pedidos processados.'))
@@ -0,0 +1,47 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from orders.models import Order
+from orders.read_model import iter_order_batches, order_row_to_representation
+
+class Command(BaseCommand):
+    help = (
+        'Exporta pedidos em NDJSON, no mesmo formato da API, pelo modelo de leitura compacto '
+        '(values_list em lotes, sem instâncias de model).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='Arquivo NDJSON; padrão: stdout')
+        parser.add_argument('--status', choices=Order.Status.values, default=None, help='Filtra por status')
+        parser.add_argument('--customer', type=int, default=None, help='Filtra por cliente')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Pedidos por lote')
+        parser.add_argument('--without-items', action='store_true', help='Exporta só o cabeçalho dos pedidos')
+
+    def handle(self, *args, **options):
+        queryset = Order.objects.all()
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+        if options['customer']:
+            queryset = queryset.filter(customer_id=options['customer'])
+
+        output = open(options['output'], 'w', encoding='utf-8') if options['output'] else None
+        # Com o NDJSON no stdout, o resumo sai pelo stderr
+        progress = self.stdout if output else self.stderr
+        with_items = not options['without_items']
+
+        exported = 0
+        started = time.perf_counter()
+        try:
+            for batch in iter_order_batches(queryset, options['chunk_size'], with_items):
+                lines = ''.join(json.dumps(order_row_to_representation(row, with_items)) + '\n' for row in batch)
+                if output:
+                    output.write(lines)
+                else:
+                    self.stdout.write(lines, ending='')
+                exported += len(batch)
+        finally:
+            if output:
+                output.close()
+
+        elapsed = time.perf_counter() - started
+        progress.write(self.style.SUCCESS(f'{exported} pedidos exportados em {elapsed:.1f}s.'))
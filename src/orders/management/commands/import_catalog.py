@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from orders.importers import iter_catalog_rows, detect_format
+from orders.services import CatalogImportService
+from orders.tenancy import tenant_context, tenant_registry
+
+class Command(BaseCommand):
+    help = 'Importa/sincroniza o catálogo de produtos a partir de um arquivo CSV ou NDJSON (streaming, em lotes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo do fornecedor (.csv, .ndjson ou .jsonl)')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None, help='Formato (padrão: pela extensão)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Linhas comparadas e gravadas por transação')
+        parser.add_argument('--tenant', default=None, help='Código do tenant dono do catálogo (padrão: tenant padrão)')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or detect_format(options['path'])
+        tenant_id = tenant_registry.resolve(options['tenant']) if options['tenant'] else tenant_registry.default_id()
+        if tenant_id is None:
+            raise CommandError(f"Tenant {options['tenant']} não encontrado.")
+        service = CatalogImportService(chunk_size=options['chunk_size'])
+
+        def progress(result):
+            self.stdout.write(f'{result.total_rows} linhas processadas ({result.rows_per_second:.0f} linhas/s)')
+
+        try:
+            with open(options['path'], encoding='utf-8', newline='') as stream, tenant_context(tenant_id):
+                result = service.run(iter_catalog_rows(stream, file_format), progress=progress)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Importação concluída: {result.created} criados, {result.updated} atualizados, '
+            f'{result.unchanged} sem alteração, {result.errors} com erro '
+            f'em {result.elapsed_seconds:.2f}s ({result.rows_per_second:.0f} linhas/s).'
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from orders.startup import measure_boot, BOOT_BUDGET_MS, FIRST_REQUEST_BUDGET_MS
+
+class Command(BaseCommand):
+    help = 'Mede o cold start de um worker (boot + primeira requisição) e o tempo de import por módulo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Quantidade de módulos listados')
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative')
+        parser.add_argument('--boot-budget-ms', type=float, default=BOOT_BUDGET_MS)
+        parser.add_argument('--first-request-budget-ms', type=float, default=FIRST_REQUEST_BUDGET_MS)
+
+    def handle(self, *args, **options):
+        result = measure_boot(importtime=True)
+
+        column = 2 if options['sort'] == 'cumulative' else 1
+        imports = sorted(result['imports'], key=lambda row: row[column], reverse=True)
+
+        self.stdout.write(f'{"módulo":<60} {"self ms":>9} {"acum. ms":>9}')
+        for module, self_us, cumulative_us in imports[:options['top']]:
+            self.stdout.write(f'{module:<60} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}')
+
+        # Com -X importtime os números saem inflados; o resumo abaixo usa uma medição limpa
+        result = measure_boot()
+        checks = [
+            ('boot', result['boot_ms'], options['boot_budget_ms']),
+            ('primeira requisição', result['first_request_ms'], options['first_request_budget_ms']),
+        ]
+
+        failed = False
+        for name, elapsed, budget in checks:
+            ok = elapsed <= budget
+            failed = failed or not ok
+            style = self.style.SUCCESS if ok else self.style.ERROR
+            self.stdout.write(style(f'{name}: {elapsed:.1f}ms (orçamento {budget}ms)'))
+        self.stdout.write(f'{len(result["modules"])} módulos carregados no boot.')
+
+        if failed:
+            raise CommandError('Cold start acima do orçamento.')
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models import Sum
+from orders.management.jobs import ChunkedJobCommand
+from orders.models import Order, OrderItem
+
+class Command(ChunkedJobCommand):
+    help = 'Recalcula Order.total_amount a partir da soma de OrderItem.subtotal, em lotes paralelos e retomáveis'
+    job_name = 'reconcile_order_totals'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--dry-run', action='store_true', help='Só conta as divergências, sem corrigir')
+
+    def get_queryset(self):
+        return Order.all_objects.all()
+
+    @transaction.atomic
+    def process_range(self, start, end, dry_run=False, **options):
+        orders = list(
+            Order.all_objects.filter(id__gte=start, id__lte=end)
+            .select_for_update()
+            .only('id', 'total_amount')
+        )
+        totals = dict(
+            OrderItem.objects.filter(order_id__gte=start, order_id__lte=end)
+            .values('order_id')
+            .annotate(total=Sum('subtotal'))
+            .order_by()
+            .values_list('order_id', 'total')
+        )
+
+        mismatched = []
+        for order in orders:
+            expected = totals.get(order.id) or 0
+            if order.total_amount != expected:
+                order.total_amount = expected
+                mismatched.append(order)
+
+        if mismatched and not dry_run:
+            Order.all_objects.bulk_update(mismatched, ['total_amount'])
+
+        return {'processed': len(orders), 'mismatched': len(mismatched)}
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
-from orders.models import Customer, Product
+from orders.models import Customer, Product, StockMovement
+from orders.services import StockLedgerService
 
 class Command(BaseCommand):
     help = 'Popula o banco de dados com dados iniciais para teste'
@@ -29,6 +30,8 @@ class Command(BaseCommand):
             {"sku": "AIRPODS-PRO", "name": "AirPods Pro", "price": 2000.00, "stock_quantity": 2},
         ]
 
+        ledger = StockLedgerService()
+
         for p_data in products_data:
             product, created = Product.objects.get_or_create(
                 sku=p_data["sku"],
@@ -40,12 +43,15 @@ class Command(BaseCommand):
             )
             
             if created:
+                ledger.record([StockMovement(
+                    product=product, delta=product.stock_quantity, reason=StockMovement.Reason.INITIAL
+                )])
                 self.stdout.write(self.style.SUCCESS(f'Produto {product.name} criado com {product.stock_quantity} unidades.'))
             else:
-                # Atualiza estoque se existir para facilitar re-testes manuais
-                product.stock_quantity = p_data["stock_quantity"]
+                # Atualiza estoque se existir para facilitar re-testes manuais (diferença vai para o ledger)
                 product.price = p_data["price"]
-                product.save()
+                product.save(update_fields=['price', 'updated_at'])
+                ledger.set_quantity(product.id, p_data["stock_quantity"], observation='Reset via seed_db')
                 self.stdout.write(f'Estoque e preço do produto {product.name} resetados.')
 
         self.stdout.write(self.style.SUCCESS('Banco de dados pronto para uso!'))
\ No newline at end of file
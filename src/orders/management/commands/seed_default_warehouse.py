@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+from orders.models import Product, Warehouse, WarehouseStock
+from orders.tenancy import tenant_context, tenant_registry
+
+class Command(BaseCommand):
+    help = (
+        'Cria o centro de distribuição padrão e atribui a ele o estoque dos produtos que ainda não está '
+        'em nenhum centro (Product.stock_quantity menos a soma de WarehouseStock). Rodar antes de ligar MULTI_WAREHOUSE.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', default=None, help='Código do tenant (padrão: tenant padrão)')
+        parser.add_argument('--code', default='PADRAO', help='Código do centro padrão')
+        parser.add_argument('--name', default='Centro de Distribuição Padrão', help='Nome do centro padrão, se for criado')
+        parser.add_argument('--region', default='', help='UF do centro padrão, se for criado')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Produtos por transação')
+
+    def handle(self, *args, **options):
+        tenant_id = tenant_registry.resolve(options['tenant']) if options['tenant'] else tenant_registry.default_id()
+        if tenant_id is None:
+            raise CommandError(f"Tenant {options['tenant']} não encontrado.")
+
+        with tenant_context(tenant_id):
+            warehouse, created = Warehouse.objects.get_or_create(
+                code=options['code'], defaults={'name': options['name'], 'region': options['region']}
+            )
+            if created:
+                self.stdout.write(f'Centro {warehouse.code} criado.')
+
+            seeded = units = 0
+            last_id = 0
+            # Faixas de ID: cada lote trava só os seus produtos, pedidos concorrentes seguem nos demais
+            while True:
+                batch = self._seed_chunk(warehouse, last_id, options['chunk_size'])
+                if batch is None:
+                    break
+                last_id, batch_products, batch_units = batch
+                seeded += batch_products
+                units += batch_units
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{seeded} produtos com {units} unidades atribuídas ao centro {warehouse.code}.'
+        ))
+
+    @transaction.atomic
+    def _seed_chunk(self, warehouse, last_id, chunk_size):
+        # Trava os produtos do lote: o saldo não atribuído é lido e gravado sem baixas no meio
+        ids = list(
+            Product.objects.select_for_update().filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return None
+
+        unassigned = dict(
+            Product.objects.filter(id__in=ids)
+            .annotate(assigned=Coalesce(Sum('warehouse_stock__quantity'), Value(0)))
+            .filter(stock_quantity__gt=F('assigned'))
+            .values_list('id', F('stock_quantity') - F('assigned'))
+        )
+
+        existing = {
+            stock.product_id: stock
+            for stock in WarehouseStock.objects.filter(warehouse=warehouse, product_id__in=list(unassigned))
+        }
+        for product_id, stock in existing.items():
+            stock.quantity += unassigned[product_id]
+        WarehouseStock.objects.bulk_update(existing.values(), ['quantity'])
+        WarehouseStock.objects.bulk_create([
+            WarehouseStock(warehouse=warehouse, product_id=product_id, quantity=quantity)
+            for product_id, quantity in unassigned.items() if product_id not in existing
+        ])
+
+        # O total do produto não muda: nada a registrar no ledger
+        return ids[-1], len(unassigned), sum(unassigned.values())
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from orders.services import StockLedgerService
+
+class Command(BaseCommand):
+    help = 'Gera checkpoints do estoque a partir do ledger (incremental desde o último corte)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Produtos por lote de checkpoints')
+
+    def handle(self, *args, **options):
+        created = StockLedgerService().take_snapshots(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'{created} checkpoints de estoque gerados.'))
@@ -0,0 +1,148 @@
+import multiprocessing
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils import timezone
+from orders.models import JobCheckpoint
+
+
+def close_inherited_connections():
+    # Cada processo abre a própria conexão; a herdada do pai via fork não pode ser compartilhada
+    connections.close_all()
+
+
+def fork_pool(workers: int):
+    """
+    Pool de processos para jobs de banco. Usa fork: os workers herdam as settings já carregadas
+    (inclusive o banco de teste); as conexões do pai são fechadas antes, e as herdadas no initializer.
+    """
+    connections.close_all()
+    return multiprocessing.get_context('fork').Pool(workers, initializer=close_inherited_connections)
+
+
+def _run_chunk(args):
+    command_class, options, start, end = args
+    result = command_class().process_range(start, end, **options)
+
+    # process_range devolve os contadores ou (contadores, registros para o processo pai)
+    counters, records = result if isinstance(result, tuple) else (result, [])
+
+    sleep_ms = options.get('sleep_ms') or 0
+    if sleep_ms:
+        # Throttle: alivia o banco entre lotes de um mesmo worker
+        time.sleep(sleep_ms / 1000)
+    return start, end, Counter(counters), records
+
+
+class ChunkedJobCommand(BaseCommand):
+    """
+    Base para comandos de manutenção em lotes.
+
+    Divide o queryset em faixas de chave primária e processa cada faixa com `process_range`,
+    em um pool de processos (cada um com a própria conexão). O progresso fica em JobCheckpoint:
+    uma execução interrompida retoma a partir da última faixa concluída.
+
+    Subclasses definem `job_name`, `get_queryset()` e `process_range(start, end, **options)`,
+    que devolve contadores (dict) somados e exibidos no progresso. Para produzir saída, devolve
+    (contadores, registros): os registros chegam ao processo pai em `handle_records`, na ordem das faixas.
+    """
+    job_name = None
+    default_chunk_size = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Processos em paralelo')
+        parser.add_argument('--chunk-size', type=int, default=self.default_chunk_size, help='IDs por lote')
+        parser.add_argument('--sleep-ms', type=int, default=0, help='Pausa de cada worker após um lote (throttle)')
+        parser.add_argument('--max-chunks', type=int, default=None, help='Processa no máximo N lotes nesta execução')
+        parser.add_argument('--restart', action='store_true', help='Ignora o checkpoint e começa do início')
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def process_range(self, start, end, **options) -> dict:
+        raise NotImplementedError
+
+    def get_job_name(self, options):
+        # Simulações têm checkpoint próprio, para não fazer a execução real pular faixas
+        return f'{self.job_name}:dry-run' if options.get('dry_run') else self.job_name
+
+    def handle_records(self, records):
+        pass
+
+    @property
+    def progress(self):
+        # Saída do progresso; jobs que escrevem dados no stdout mandam o progresso para o stderr
+        return self.stdout
+
+    def get_ranges(self, position, chunk_size):
+        bounds = self.get_queryset().aggregate(min_id=Min('pk'), max_id=Max('pk'))
+        if bounds['min_id'] is None:
+            return []
+
+        start = max(bounds['min_id'], position + 1)
+        return [(first, min(first + chunk_size - 1, bounds['max_id'])) for first in range(start, bounds['max_id'] + 1, chunk_size)]
+
+    def handle(self, *args, **options):
+        job = self.get_job_name(options)
+        checkpoint, _ = JobCheckpoint.objects.get_or_create(job=job)
+        if options['restart'] or checkpoint.finished_at:
+            checkpoint.position = 0
+            checkpoint.processed = 0
+            checkpoint.started_at = timezone.now()
+            checkpoint.finished_at = None
+            checkpoint.save()
+        elif checkpoint.position:
+            self.progress.write(f'Retomando {job} a partir do ID {checkpoint.position + 1}.')
+
+        ranges = self.get_ranges(checkpoint.position, options['chunk_size'])
+        complete = options['max_chunks'] is None or len(ranges) <= options['max_chunks']
+        ranges = ranges if complete else ranges[:options['max_chunks']]
+        if not ranges:
+            self._finish(job, checkpoint, Counter())
+            return
+
+        # Repassa só as opções do job aos workers (stdout/stderr não são serializáveis)
+        job_options = {key: value for key, value in options.items() if key not in ('stdout', 'stderr')}
+        tasks = [(type(self), job_options, start, end) for start, end in ranges]
+
+        pool = fork_pool(options['workers']) if options['workers'] > 1 else None
+        totals = Counter()
+        started = time.perf_counter()
+        try:
+            # imap devolve na ordem de envio: o checkpoint só avança sobre faixas contíguas concluídas
+            results = pool.imap(_run_chunk, tasks) if pool else map(_run_chunk, tasks)
+            for done, (start, end, counters, records) in enumerate(results, start=1):
+                if records:
+                    self.handle_records(records)
+                totals.update(counters)
+                checkpoint.position = end
+                checkpoint.processed += counters.get('processed', 0)
+                checkpoint.save(update_fields=['position', 'processed', 'updated_at'])
+                self._report(done, len(ranges), end, totals, time.perf_counter() - started)
+        except BaseException:
+            # Interrompido: descarta os lotes em andamento; o checkpoint já guarda o que foi concluído
+            if pool is not None:
+                pool.terminate()
+                pool = None
+            raise
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        if complete:
+            self._finish(job, checkpoint, totals)
+
+    def _report(self, done, total, position, totals, elapsed):
+        rate = done / elapsed if elapsed else 0
+        eta = (total - done) / rate if rate else 0
+        counters = ', '.join(f'{key}={value}' for key, value in sorted(totals.items()))
+        self.progress.write(f'[{done}/{total}] até ID {position} | {counters} | {rate:.1f} lotes/s, ETA {eta:.0f}s')
+
+    def _finish(self, job, checkpoint, totals):
+        checkpoint.finished_at = timezone.now()
+        checkpoint.save(update_fields=['finished_at', 'updated_at'])
+        counters = ', '.join(f'{key}={value}' for key, value in sorted(totals.items())) or 'nada a processar'
+        self.progress.write(self.style.SUCCESS(f'{job} concluído: {counters}.'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_archived_order'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'deleted_at', 'created_at', 'id'], name='order_customer_history_idx'),
+        ),
+    ]
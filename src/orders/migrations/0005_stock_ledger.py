@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_customer_history_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('INICIAL', 'Estoque inicial'), ('PEDIDO', 'Baixa por pedido'), ('CANCELAMENTO', 'Devolução por cancelamento'), ('AJUSTE_MANUAL', 'Ajuste manual'), ('IMPORTACAO', 'Importação de catálogo')], max_length=20)),
+                ('observation', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='stock_movements', to='orders.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='orders.product')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'id'], name='stockmov_product_id_idx'), models.Index(fields=['product', 'created_at'], name='stockmov_product_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('last_movement_id', models.BigIntegerField()),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='orders.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'taken_at'], name='stocksnap_product_taken_idx'), models.Index(fields=['product', 'last_movement_id'], name='stocksnap_product_cut_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-19 15:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_stock_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderstatushistory',
+            index=models.Index(fields=['order', 'changed_at'], name='history_order_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderstatushistory',
+            index=models.Index(fields=['changed_at', 'id'], name='history_changed_id_idx'),
+        ),
+    ]
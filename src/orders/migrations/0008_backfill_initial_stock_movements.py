@@ -0,0 +1,66 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Sum
+
+BACKFILL_OBSERVATION = 'Saldo inicial (backfill do ledger)'
+CHUNK_SIZE = 1000
+
+
+def backfill_initial_movements(apps, schema_editor):
+    """
+    Produtos anteriores ao ledger não têm movimento de abertura.
+    Grava um INICIAL com a diferença entre o estoque atual e o que o ledger já soma,
+    datado na criação do produto, para que a soma do ledger bata com stock_quantity.
+    """
+    Product = apps.get_model('orders', 'Product')
+    StockMovement = apps.get_model('orders', 'StockMovement')
+
+    last_id = 0
+    while True:
+        products = list(
+            Product.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'stock_quantity')[:CHUNK_SIZE]
+        )
+        if not products:
+            break
+        last_id = products[-1][0]
+
+        recorded = dict(
+            StockMovement.objects.filter(product_id__gte=products[0][0], product_id__lte=last_id)
+            .values('product_id')
+            .annotate(total=Sum('delta'))
+            .order_by()
+            .values_list('product_id', 'total')
+        )
+
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=product_id,
+                delta=stock_quantity - recorded.get(product_id, 0),
+                reason='INICIAL',
+                observation=BACKFILL_OBSERVATION
+            )
+            for product_id, stock_quantity in products
+            if stock_quantity != recorded.get(product_id, 0)
+        ])
+
+    # auto_now_add ignora valores no bulk_create: data do saldo inicial = criação do produto
+    StockMovement.objects.filter(observation=BACKFILL_OBSERVATION).update(
+        created_at=Subquery(Product.objects.filter(id=OuterRef('product_id')).values('created_at')[:1])
+    )
+
+
+def remove_initial_movements(apps, schema_editor):
+    StockMovement = apps.get_model('orders', 'StockMovement')
+    StockMovement.objects.filter(observation=BACKFILL_OBSERVATION).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_catalog_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_initial_movements, remove_initial_movements),
+    ]
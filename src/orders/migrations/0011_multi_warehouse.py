@@ -0,0 +1,81 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_job_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Warehouse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('region', models.CharField(max_length=2)),
+                ('priority', models.PositiveIntegerField(default=100)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='region',
+            field=models.CharField(blank=True, default='', max_length=2),
+        ),
+        migrations.CreateModel(
+            name='OrderItemAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='orders.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='orders.product')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='allocations', to='orders.warehouse')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='warehouse',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='stock_movements', to='orders.warehouse'),
+        ),
+        migrations.CreateModel(
+            name='WarehouseRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=2)),
+                ('rank', models.PositiveIntegerField()),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='routes', to='orders.warehouse')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WarehouseStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='warehouse_stock', to='orders.product')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='orders.warehouse')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='warehouseroute',
+            constraint=models.UniqueConstraint(fields=('region', 'warehouse'), name='warehouseroute_unique_region'),
+        ),
+        migrations.AddIndex(
+            model_name='warehousestock',
+            index=models.Index(fields=['product', 'warehouse'], name='warehousestock_product_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='warehousestock',
+            constraint=models.UniqueConstraint(fields=('warehouse', 'product'), name='warehousestock_unique_product'),
+        ),
+    ]
@@ -0,0 +1,133 @@
+import django.db.models.deletion
+import orders.tenancy
+from django.db import migrations, models
+
+DEFAULT_TENANT = 'default'
+TENANT_MODELS = ['customer', 'product', 'order', 'pricelist', 'warehouse']
+
+
+def create_default_tenant(apps, schema_editor):
+    """
+    Os dados existentes passam a pertencer ao tenant padrão: a instalação de uma empresa só
+    segue funcionando sem o header de tenant.
+    """
+    Tenant = apps.get_model('orders', 'Tenant')
+    tenant, _ = Tenant.objects.get_or_create(code=DEFAULT_TENANT, defaults={'name': 'Tenant padrão'})
+
+    for model_name in TENANT_MODELS:
+        apps.get_model('orders', model_name).objects.filter(tenant__isnull=True).update(tenant=tenant)
+
+
+def tenant_field(null=False):
+    if null:
+        return models.ForeignKey(
+            db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='orders.tenant'
+        )
+    return models.ForeignKey(
+        db_index=False, default=orders.tenancy.current_tenant_id, on_delete=django.db.models.deletion.PROTECT,
+        related_name='+', to='orders.tenant'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_multi_warehouse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tenant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.SlugField(unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        # Nullable primeiro, preenchido com o tenant padrão, e só então obrigatório
+        *[
+            migrations.AddField(model_name=model_name, name='tenant', field=tenant_field(null=True))
+            for model_name in TENANT_MODELS
+        ],
+        migrations.RunPython(create_default_tenant, migrations.RunPython.noop),
+        *[
+            migrations.AlterField(model_name=model_name, name='tenant', field=tenant_field())
+            for model_name in TENANT_MODELS
+        ],
+        # Unicidade e índices passam a começar pelo tenant
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customer_updated_at_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_customer_history_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_updated_at_idx',
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='cpf_cnpj',
+            field=models.CharField(max_length=14),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='email',
+            field=models.EmailField(max_length=254),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('PENDENTE', 'Pendente'), ('CONFIRMADO', 'Confirmado'), ('SEPARADO', 'Separado'), ('ENVIADO', 'Enviado'), ('ENTREGUE', 'Entregue'), ('CANCELADO', 'Cancelado')], default='PENDENTE', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='warehouse',
+            name='code',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['tenant', 'updated_at'], name='customer_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['tenant', 'customer', 'deleted_at', 'created_at', 'id'], name='order_customer_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['tenant', 'status'], name='order_tenant_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricelist',
+            index=models.Index(fields=['tenant', 'is_active'], name='pricelist_tenant_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant', 'updated_at'], name='product_updated_at_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('tenant', 'cpf_cnpj'), name='customer_tenant_cpf_cnpj_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('tenant', 'email'), name='customer_tenant_email_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('tenant', 'sku'), name='product_tenant_sku_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='warehouse',
+            constraint=models.UniqueConstraint(fields=('tenant', 'code'), name='warehouse_tenant_code_uniq'),
+        ),
+    ]
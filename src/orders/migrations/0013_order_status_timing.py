@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:22
+
+import django.db.models.deletion
+import orders.tenancy
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_tenancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusTiming',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('CONFIRMADO', 'Confirmado'), ('SEPARADO', 'Separado'), ('ENVIADO', 'Enviado'), ('ENTREGUE', 'Entregue'), ('CANCELADO', 'Cancelado')], max_length=20)),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('transitions', models.BigIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('max_seconds', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(db_index=False, default=orders.tenancy.current_tenant_id, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='orders.tenant')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='orderstatustiming',
+            constraint=models.UniqueConstraint(fields=('tenant', 'status', 'slot'), name='statustiming_tenant_status_slot_uniq'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-19 16:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_order_status_timing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='intake_ticket',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('tenant', 'intake_ticket'), name='order_tenant_intake_ticket_uniq'),
+        ),
+    ]
@@ -1,24 +1,45 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.core.validators import MinValueValidator
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
+from .tenancy import current_tenant_id, scope_to_tenant
 
 User = get_user_model()
 
+
+class Tenant(models.Model):
+    """
+    Empresa atendida pela instância. Os dados de domínio (BaseModel) pertencem a um tenant,
+    resolvido por requisição no TenantMiddleware (orders/tenancy.py).
+    """
+    code = models.SlugField(max_length=50, unique=True)
+    name = models.CharField(max_length=255)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.code
+
+
 # Abstract Models 
 class SoftDeleteManager(models.Manager):
     def get_queryset(self):
-        # Por padrão esconde os deletados
-        return super().get_queryset().filter(deleted_at__isnull=True)
+        # Por padrão esconde os deletados; dentro de uma requisição, só o tenant dela
+        return scope_to_tenant(super().get_queryset().filter(deleted_at__isnull=True))
 
 class GlobalManager(models.Manager):
     def get_queryset(self):
-        return super().get_queryset()
+        return scope_to_tenant(super().get_queryset())
 
 class BaseModel(models.Model):
     """
-    Base model que implementa timestamps e Soft Delete.
+    Base model que implementa tenant, timestamps e Soft Delete.
     """
+    # Sem índice próprio: os índices de cada model começam pelo tenant
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.PROTECT, default=current_tenant_id, db_index=False, related_name='+'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
@@ -41,24 +62,45 @@ class BaseModel(models.Model):
 
 class Customer(BaseModel):
     name = models.CharField(max_length=255)
-    cpf_cnpj = models.CharField(max_length=14, unique=True, db_index=True)
-    email = models.EmailField(unique=True)
+    cpf_cnpj = models.CharField(max_length=14)
+    email = models.EmailField()
     phone = models.CharField(max_length=20)
     address = models.TextField()
+    # UF de entrega: escolhe os centros de distribuição preferidos (WarehouseRoute)
+    region = models.CharField(max_length=2, blank=True, default='')
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'cpf_cnpj'], name='customer_tenant_cpf_cnpj_uniq'),
+            models.UniqueConstraint(fields=['tenant', 'email'], name='customer_tenant_email_uniq'),
+        ]
+        indexes = [
+            # Atualização incremental do snapshot do catálogo
+            models.Index(fields=['tenant', 'updated_at'], name='customer_updated_at_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.cpf_cnpj})"
 
 
 class Product(BaseModel):
-    sku = models.CharField(max_length=50, unique=True, db_index=True)
+    sku = models.CharField(max_length=50)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     stock_quantity = models.IntegerField(default=0)  # Controle crítico
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'sku'], name='product_tenant_sku_uniq'),
+        ]
+        indexes = [
+            # Atualização incremental do snapshot do catálogo
+            models.Index(fields=['tenant', 'updated_at'], name='product_updated_at_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sku} - {self.name}"
 
@@ -76,12 +118,30 @@ class Order(BaseModel):
     status = models.CharField(
         max_length=20, 
         choices=Status.choices, 
-        default=Status.PENDING,
-        db_index=True
+        default=Status.PENDING
     )
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     observation = models.TextField(blank=True, null=True)
 
+    # Resumo desnormalizado, mantido pelos services, para leituras sem join com os itens
+    item_count = models.PositiveIntegerField(default=0)
+    total_quantity = models.PositiveIntegerField(default=0)
+    last_status_change_at = models.DateTimeField(null=True, blank=True)
+
+    # Ticket da fila assíncrona (orders/intake.py) que criou o pedido: gravado na mesma transação,
+    # impede que uma entrada devolvida à fila após o commit crie o pedido de novo
+    intake_ticket = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'intake_ticket'], name='order_tenant_intake_ticket_uniq'),
+        ]
+        indexes = [
+            # Índice de cobertura para o histórico do cliente (filtro + ordenação + cursor)
+            models.Index(fields=['tenant', 'customer', 'deleted_at', 'created_at', 'id'], name='order_customer_history_idx'),
+            models.Index(fields=['tenant', 'status'], name='order_tenant_status_idx'),
+        ]
+
     def __str__(self):
         return f"Order #{self.id} - {self.status}"
 
@@ -121,6 +181,260 @@ class OrderStatusHistory(models.Model):
 
     class Meta:
         ordering = ['-changed_at']
+        indexes = [
+            # Linha do tempo de um pedido
+            models.Index(fields=['order', 'changed_at'], name='history_order_changed_idx'),
+            # Feed global por keyset (changed_at, id)
+            models.Index(fields=['changed_at', 'id'], name='history_changed_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_id}: {self.old_status} -> {self.new_status}"
+
+class OrderStatusTiming(models.Model):
+    """
+    Agregado incremental do tempo que os pedidos passam em cada status, por tenant.
+    Cada transição soma a permanência no status de saída (UpdateOrderStatusService), então
+    painéis de SLA leem esta tabela pequena em vez de varrer OrderStatusHistory.
+    O agregado de um status é dividido em `slot`s (id do pedido % SLOTS) para não virar uma linha quente.
+    """
+    SLOTS = 8
+
+    tenant = models.ForeignKey(
+        Tenant, on_delete=models.PROTECT, default=current_tenant_id, db_index=False, related_name='+'
+    )
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    slot = models.PositiveSmallIntegerField()
+    transitions = models.BigIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    max_seconds = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = GlobalManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'status', 'slot'], name='statustiming_tenant_status_slot_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.status}[{self.slot}]: {self.transitions} transições"
+
+class ArchivedOrder(models.Model):
+    """
+    Pedido finalizado (entregue ou cancelado) movido para fora das tabelas quentes.
+    Guarda o snapshot do pedido com itens e histórico, mantendo o mesmo ID do original.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.PROTECT, related_name='archived_orders')
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(db_index=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    # Snapshot serializado (pedido + itens + histórico de status)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+
+    def __str__(self):
+        return f"Archived Order #{self.id} - {self.status}"
+
+
+class StockMovement(models.Model):
+    """
+    Ledger imutável de movimentações de estoque.
+    Cada linha é um delta com sinal (negativo = saída) e o motivo da mudança.
+    """
+    class Reason(models.TextChoices):
+        INITIAL = 'INICIAL', 'Estoque inicial'
+        ORDER = 'PEDIDO', 'Baixa por pedido'
+        CANCELLATION = 'CANCELAMENTO', 'Devolução por cancelamento'
+        MANUAL = 'AJUSTE_MANUAL', 'Ajuste manual'
+        IMPORT = 'IMPORTACAO', 'Importação de catálogo'
+
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='stock_movements')
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=Reason.choices)
+
+    # Sem constraint no banco: a referência sobrevive ao arquivamento do pedido
+    order = models.ForeignKey(
+        Order, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name='stock_movements'
+    )
+    # Centro de distribuição movimentado (nulo no modo de estoque único)
+    warehouse = models.ForeignKey(
+        'Warehouse', on_delete=models.PROTECT, null=True, blank=True, related_name='stock_movements'
+    )
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    observation = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'id'], name='stockmov_product_id_idx'),
+            models.Index(fields=['product', 'created_at'], name='stockmov_product_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.delta:+d} ({self.reason})"
+
+
+class Warehouse(BaseModel):
+    """
+    Centro de distribuição. `priority` ordena os centros quando a região do cliente não tem rota.
+    """
+    code = models.CharField(max_length=20)
+    name = models.CharField(max_length=255)
+    region = models.CharField(max_length=2)
+    priority = models.PositiveIntegerField(default=100)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tenant', 'code'], name='warehouse_tenant_code_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.code} - {self.name}"
+
+
+class WarehouseRoute(models.Model):
+    """
+    Preferência de atendimento: para clientes da `region`, centros de menor `rank` vêm primeiro.
+    """
+    region = models.CharField(max_length=2)
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='routes')
+    rank = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['region', 'warehouse'], name='warehouseroute_unique_region'),
+        ]
+
+    def __str__(self):
+        return f"{self.region} -> {self.warehouse_id} (#{self.rank})"
+
+
+class WarehouseStock(models.Model):
+    """
+    Saldo de um produto em um centro. `Product.stock_quantity` continua sendo o total do produto;
+    a soma das linhas daqui é a parte alocável pelos pedidos no modo multi-centro.
+    """
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='stock')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='warehouse_stock')
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['warehouse', 'product'], name='warehousestock_unique_product'),
+        ]
+        indexes = [
+            # Candidatos de um pedido: todas as linhas dos produtos dele
+            models.Index(fields=['product', 'warehouse'], name='warehousestock_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.warehouse_id}/{self.product_id}: {self.quantity}"
+
+
+class OrderItemAllocation(models.Model):
+    """
+    Quanto de cada item saiu de cada centro. O cancelamento devolve o estoque para o mesmo centro.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='allocations')
+    product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name='allocations')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name='allocations')
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.order_id}: {self.quantity}x {self.product_id} @ {self.warehouse_id}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Checkpoint do estoque calculado pelo ledger.
+    `quantity` soma todos os movimentos do produto com id <= `last_movement_id`,
+    então o estoque atual (ou em uma data) é o último checkpoint + movimentos posteriores.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_snapshots')
+    quantity = models.IntegerField()
+    last_movement_id = models.BigIntegerField()
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'taken_at'], name='stocksnap_product_taken_idx'),
+            models.Index(fields=['product', 'last_movement_id'], name='stocksnap_product_cut_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.quantity} @ {self.taken_at:%Y-%m-%d %H:%M}"
+
+
+class PriceList(BaseModel):
+    """
+    Tabela de preços. Com `customer` é a tabela negociada do cliente; sem ele vale para todos
+    (promoções), opcionalmente limitada a uma janela de vigência.
+    """
+    name = models.CharField(max_length=255)
+    customer = models.ForeignKey(
+        Customer, on_delete=models.CASCADE, null=True, blank=True, related_name='price_lists'
+    )
+    is_active = models.BooleanField(default=True)
+    starts_at = models.DateTimeField(null=True, blank=True)
+    ends_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant', 'is_active'], name='pricelist_tenant_active_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class PriceRule(models.Model):
+    """
+    Regra de preço de um produto em uma tabela, a partir de `min_quantity` unidades (faixas de volume).
+    Define um preço unitário fixo ou um desconto percentual sobre o preço de cadastro.
+    """
+    price_list = models.ForeignKey(PriceList, on_delete=models.CASCADE, related_name='rules')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_rules')
+    min_quantity = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
+    unit_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True, validators=[MinValueValidator(0)]
+    )
+    discount_percent = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        validators=[MinValueValidator(0), MaxValueValidator(100)]
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['price_list', 'product', 'min_quantity'], name='pricerule_unique_tier'),
+            models.CheckConstraint(
+                check=(
+                    models.Q(unit_price__isnull=False, discount_percent__isnull=True) |
+                    models.Q(unit_price__isnull=True, discount_percent__isnull=False)
+                ),
+                name='pricerule_price_or_discount',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.price_list_id}/{self.product_id} >= {self.min_quantity}"
+
+
+class JobCheckpoint(models.Model):
+    """
+    Progresso de um job em lotes (orders/management/jobs.py).
+    `position` é o maior ID até onde todos os lotes já foram concluídos: a retomada começa dali.
+    """
+    job = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    processed = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
-        return f"Order {self.order_id}: {self.old_status} -> {self.new_status}"
\ No newline at end of file
+        return f"{self.job} @ {self.position}"
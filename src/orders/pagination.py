@@ -0,0 +1,121 @@
+import base64
+from datetime import timedelta
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination em (<campo de data>, id): cada página filtra "depois do último registro visto"
+    em vez de usar OFFSET, então o custo não cresce com a profundidade, e também não há COUNT.
+    O cursor é opaco para o cliente (base64 de "<data iso>|<id>").
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+
+    # Campo de data da chave e direção da ordenação
+    keyset_field = None
+    descending = False
+
+    def encode_cursor(self, value, pk):
+        raw = f'{value.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            value = parse_datetime(value)
+            if value is None:
+                raise ValueError
+            return value, int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError({'cursor': 'Cursor inválido.'})
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def filter_after(self, queryset, value, pk):
+        lookup = 'lt' if self.descending else 'gt'
+        return queryset.filter(
+            Q(**{f'{self.keyset_field}__{lookup}': value}) |
+            Q(**{self.keyset_field: value, f'id__{lookup}': pk})
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor = request.query_params.get(self.cursor_query_param)
+        self.page_size_used = self.get_page_size(request)
+
+        if self.cursor:
+            queryset = self.filter_after(queryset, *self.decode_cursor(self.cursor))
+
+        prefix = '-' if self.descending else ''
+        ordering = (f'{prefix}{self.keyset_field}', f'{prefix}id')
+
+        # Um registro a mais só para saber se existe próxima página
+        page = list(queryset.order_by(*ordering)[:self.page_size_used + 1])
+        self.has_more = len(page) > self.page_size_used
+        page = page[:self.page_size_used]
+
+        self.next_cursor = self.cursor
+        if page:
+            self.next_cursor = self.encode_cursor(getattr(page[-1], self.keyset_field), page[-1].pk)
+        return page
+
+
+class CustomerOrderCursorPagination(KeysetPagination):
+    """
+    Histórico do cliente, do mais recente para o mais antigo.
+    Acompanha o índice (customer_id, deleted_at, created_at, id): qualquer página,
+    inclusive as mais profundas, é um range scan curto nesse índice.
+    """
+    keyset_field = 'created_at'
+    descending = True
+    page_size = 20
+    max_page_size = 100
+
+    def get_next_link(self):
+        if not self.has_more:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class StatusChangeKeysetPagination(KeysetPagination):
+    """
+    Feed de mudanças de status em ordem crescente de (changed_at, id).
+    O cliente guarda o `next_cursor` e pede "tudo depois dele" na próxima sincronização;
+    com página vazia o cursor é devolvido igual, para continuar de onde parou.
+
+    `changed_at` é definido antes do commit: uma transação lenta pode tornar visível uma linha
+    "anterior" a um cursor já entregue. Por isso só são servidas linhas mais velhas que `commit_lag`.
+    """
+    keyset_field = 'changed_at'
+    commit_lag = timedelta(seconds=5)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = queryset.filter(changed_at__lt=timezone.now() - self.commit_lag)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next_cursor': self.next_cursor,
+            'has_more': self.has_more,
+            'results': data,
+        })
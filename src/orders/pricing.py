@@ -0,0 +1,100 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Q
+from django.utils import timezone
+from .models import PriceRule
+from .dtos import PricedItemDTO, PricedOrderDTO
+from .versioned_cache import VersionedCache
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+
+
+class PricingEngine(VersionedCache):
+    """
+    Regras de preço (tabelas por cliente, faixas de volume e promoções) compiladas em memória, por processo.
+    O preço de um pedido inteiro é calculado em uma passada, sem consultas ao banco.
+    Versionado como o snapshot do catálogo: escritas em PriceList/PriceRule incrementam a versão
+    no cache e os demais processos recompilam na próxima verificação.
+
+    O cliente paga sempre o menor preço entre o de cadastro e as regras aplicáveis
+    (tabela dele + tabelas gerais vigentes, na maior faixa atingida pela quantidade).
+    """
+    VERSION_KEY = 'pricing_rules_version'
+
+    def __init__(self):
+        super().__init__()
+
+        # (customer_id ou None, product_id) -> ((min_quantity, unit_price, factor, starts_at, ends_at), ...)
+        self.rules = {}
+        self.customers = frozenset()  # clientes com tabela própria
+
+    def _load(self, now):
+        self.rules, self.customers = self._compile()
+
+    def _compile(self):
+        rows = (
+            PriceRule.objects.filter(price_list__is_active=True, price_list__deleted_at__isnull=True)
+            .filter(Q(price_list__ends_at__isnull=True) | Q(price_list__ends_at__gt=timezone.now()))
+            .values_list(
+                'price_list__customer_id', 'product_id', 'min_quantity', 'unit_price',
+                'discount_percent', 'price_list__starts_at', 'price_list__ends_at'
+            )
+        )
+
+        rules = {}
+        for customer_id, product_id, min_quantity, unit_price, discount, starts_at, ends_at in rows:
+            factor = None if discount is None else (HUNDRED - discount) / HUNDRED
+            rules.setdefault((customer_id, product_id), []).append(
+                (min_quantity, unit_price, factor, starts_at, ends_at)
+            )
+
+        # Maior faixa primeiro
+        compiled = {key: tuple(sorted(tiers, key=lambda tier: -tier[0])) for key, tiers in rules.items()}
+        customers = frozenset(customer_id for customer_id, _ in compiled if customer_id is not None)
+        return compiled, customers
+
+    def price(self, customer_id: int, lines, when=None) -> PricedOrderDTO:
+        """
+        Calcula preço unitário e subtotal de cada linha e o total do pedido.
+        `lines`: iterável de (product_id, quantity, preço de cadastro).
+        """
+        self._refresh()
+        when = when or timezone.now()
+        rules = self.rules
+        has_own_list = customer_id in self.customers
+
+        items = []
+        total = Decimal('0.00')
+        for product_id, quantity, base_price in lines:
+            unit_price = base_price
+
+            # Caminho rápido: produto sem regra nenhuma
+            if rules:
+                tiers = rules.get((None, product_id), ())
+                if has_own_list:
+                    tiers = tiers + rules.get((customer_id, product_id), ())
+                if tiers:
+                    unit_price = self._best_price(tiers, quantity, base_price, when)
+
+            subtotal = unit_price * quantity
+            total += subtotal
+            items.append(PricedItemDTO(product_id, quantity, unit_price, subtotal))
+
+        return PricedOrderDTO(items=items, total=total)
+
+    def _best_price(self, tiers, quantity, base_price, when):
+        best = base_price
+        for min_quantity, unit_price, factor, starts_at, ends_at in tiers:
+            if min_quantity > quantity:
+                continue
+            if (starts_at and when < starts_at) or (ends_at and when >= ends_at):
+                continue
+
+            if unit_price is None:
+                unit_price = (base_price * factor).quantize(CENT, rounding=ROUND_HALF_UP)
+            if unit_price < best:
+                best = unit_price
+        return best
+
+
+pricing_engine = PricingEngine()
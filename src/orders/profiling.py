@@ -0,0 +1,318 @@
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from redis.exceptions import RedisError
+from . import redis_client
+from .redis_client import CACHE_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Perfil da requisição atual; None = requisição fora da amostra (spans viram no-op)
+_active_profile = ContextVar('active_profile', default=None)
+
+# Profundidade máxima de pilha coletada por amostra
+MAX_STACK_DEPTH = 128
+
+
+class Profile:
+    """
+    Amostras de uma requisição: pilhas no formato colapsado (flame graph) e spans das fases dos services.
+    """
+    def __init__(self, method, path):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.thread_id = threading.get_ident()
+        self.started_at = timezone.now()
+        self.started = time.perf_counter()
+        self.duration_ms = None
+        self.status_code = None
+
+        self.stacks = Counter()
+        self.spans = []
+        # Spans abertos, lidos pelo sampler para prefixar as pilhas (ex: 'span:lock;...')
+        self.open_spans = []
+
+    def add_sample(self, frame):
+        frames = []
+        while frame is not None and len(frames) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            frames.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}")
+            frame = frame.f_back
+        frames.reverse()
+        self.stacks[';'.join([f'span:{name}' for name in list(self.open_spans)] + frames)] += 1
+
+    def folded(self) -> str:
+        """Pilhas colapsadas ('a;b;c <amostras>'), aceitas por flamegraph.pl, speedscope e afins."""
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+    def summary(self) -> dict:
+        return {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status_code': self.status_code,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': self.duration_ms,
+            'samples': sum(self.stacks.values()),
+            'spans': self.spans,
+        }
+
+
+class StackSampler:
+    """
+    Uma thread por processo que lê, a cada intervalo, a pilha das threads com perfil ativo
+    (sys._current_frames). Só existe depois da primeira requisição amostrada e dorme sem alvos.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._targets = {}
+        self.interval = 0.005
+
+    def start(self, profile, interval):
+        with self._lock:
+            self._targets[profile.thread_id] = profile
+            self.interval = interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile):
+        with self._lock:
+            self._targets.pop(profile.thread_id, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                targets = list(self._targets.values())
+            if not targets:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            frames = sys._current_frames()
+            for profile in targets:
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    profile.add_sample(frame)
+            del frames
+            time.sleep(self.interval)
+
+
+sampler = StackSampler()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('profile', 'name', 'started')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile.open_spans.append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        finished = time.perf_counter()
+        self.profile.open_spans.pop()
+        self.profile.spans.append({
+            'name': self.name,
+            'depth': len(self.profile.open_spans),
+            'start_ms': round((self.started - self.profile.started) * 1000, 3),
+            'duration_ms': round((finished - self.started) * 1000, 3),
+        })
+        return False
+
+
+def span(name: str):
+    """
+    Marca uma fase (validate, lock, write, serialize, cache...) no perfil da requisição.
+    Fora da amostra devolve um context manager vazio: o custo é uma leitura de ContextVar.
+    """
+    profile = _active_profile.get()
+    return _NOOP_SPAN if profile is None else _Span(profile, name)
+
+
+def traced(name: str = None):
+    """Decorator: executa a função inteira dentro de um span (padrão: o __qualname__ da função)."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _active_profile.get()
+            if profile is None:
+                return fn(*args, **kwargs)
+            with _Span(profile, span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class ProfilingConfig:
+    """
+    Configuração do profiler (ligado, fração amostrada, rotas, intervalo), gravada no cache pelo endpoint
+    administrativo e relida por processo no máximo a cada CHECK_INTERVAL (não a cada requisição).
+    """
+    CACHE_KEY = 'profiling:config'
+
+    # Intervalo mínimo entre consultas da configuração no cache (segundos)
+    CHECK_INTERVAL = 1.0
+
+    DISABLED = {'enabled': False, 'sample_rate': 0.0, 'paths': [], 'interval_ms': 5, 'expires_at': None}
+
+    def __init__(self):
+        self._checked_at = None
+        self._config = self.DISABLED
+
+    def invalidate(self):
+        self._checked_at = None
+
+    def get(self) -> dict:
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.CHECK_INTERVAL:
+            try:
+                self._config = cache.get(self.CACHE_KEY) or self.DISABLED
+            except CACHE_ERRORS:
+                # Redis fora: desliga até a próxima consulta, sem tentar de novo a cada requisição
+                logger.warning('Configuração do profiler indisponível: Redis fora do ar.')
+                self._config = self.DISABLED
+            self._checked_at = now
+        return self._config
+
+    def set(self, enabled, sample_rate, paths, interval_ms, duration_seconds) -> dict:
+        # Expira sozinho: um profiler esquecido ligado não fica amostrando para sempre
+        expires_at = time.time() + duration_seconds if enabled else None
+        config = {
+            'enabled': enabled, 'sample_rate': sample_rate, 'paths': list(paths),
+            'interval_ms': interval_ms, 'expires_at': expires_at,
+        }
+        cache.set(self.CACHE_KEY, config, timeout=duration_seconds if enabled else None)
+        self.invalidate()
+        return config
+
+    def should_sample(self, path) -> bool:
+        config = self.get()
+        if not config['enabled'] or config['expires_at'] < time.time():
+            return False
+        if config['paths'] and not path.startswith(tuple(config['paths'])):
+            return False
+        return random.random() < config['sample_rate']
+
+
+profiling_config = ProfilingConfig()
+
+
+class ProfileStore:
+    """
+    Perfis gravados no Redis (os MAX_PROFILES mais recentes, com TTL) e, se PROFILING['OUTPUT_DIR']
+    estiver definido, também em disco como <id>.folded.
+    """
+    INDEX_KEY = 'profiling:profiles'
+
+    def profile_key(self, profile_id):
+        return f'profiling:profile:{profile_id}'
+
+    def save(self, profile):
+        options = settings.PROFILING
+        payload = {**profile.summary(), 'folded': profile.folded()}
+        try:
+            client = redis_client.get_redis_client()
+            pipe = client.pipeline()
+            pipe.set(self.profile_key(profile.id), json.dumps(payload), ex=options['PROFILE_TTL'])
+            pipe.lpush(self.INDEX_KEY, profile.id)
+            pipe.ltrim(self.INDEX_KEY, 0, options['MAX_PROFILES'] - 1)
+            pipe.execute()
+        except RedisError:
+            logger.warning('Perfil %s descartado: Redis indisponível.', profile.id)
+
+        if options['OUTPUT_DIR']:
+            try:
+                with open(os.path.join(options['OUTPUT_DIR'], f'{profile.id}.folded'), 'w') as f:
+                    f.write(payload['folded'])
+            except OSError as e:
+                logger.warning('Perfil %s não gravado em disco: %s', profile.id, e)
+
+    def get(self, profile_id):
+        raw = redis_client.get_redis_client().get(self.profile_key(profile_id))
+        return None if raw is None else json.loads(raw)
+
+    def recent(self, limit=None):
+        client = redis_client.get_redis_client()
+        ids = [value.decode() for value in client.lrange(self.INDEX_KEY, 0, (limit or settings.PROFILING['MAX_PROFILES']) - 1)]
+        raws = client.mget([self.profile_key(profile_id) for profile_id in ids]) if ids else []
+        # Sem as pilhas: a listagem é só o resumo, as pilhas saem no detalhe
+        return [
+            {key: value for key, value in json.loads(raw).items() if key != 'folded'}
+            for raw in raws if raw is not None
+        ]
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    Amostra uma fração das requisições às rotas configuradas com o sampler de pilhas e os spans dos services.
+    Desligado (padrão), custa uma comparação por requisição. Só atua na pilha WSGI: no ASGI
+    (stream de eventos) a requisição segue direto, pois o event loop é compartilhado entre conexões.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        if not profiling_config.should_sample(request.path):
+            return self.get_response(request)
+
+        profile = Profile(request.method, request.path)
+        token = _active_profile.set(profile)
+        sampler.start(profile, profiling_config.get()['interval_ms'] / 1000)
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop(profile)
+            _active_profile.reset(token)
+            profile.duration_ms = round((time.perf_counter() - profile.started) * 1000, 3)
+
+        profile.status_code = response.status_code
+        profile_store.save(profile)
+        response['X-Profile-Id'] = profile.id
+        return response
@@ -0,0 +1,80 @@
+from functools import lru_cache
+from rest_framework import serializers
+from .dtos import OrderItemRowDTO, OrderRowDTO
+from .models import Order, OrderItem
+from .serializers import OrderSerializer
+
+ORDER_COLUMNS = (
+    'id', 'customer_id', 'status', 'total_amount', 'created_at',
+    'item_count', 'total_quantity', 'last_status_change_at'
+)
+ITEM_COLUMNS = ('order_id', 'product_id', 'quantity', 'unit_price', 'subtotal')
+
+
+def iter_order_batches(queryset=None, chunk_size: int = 2000, with_items: bool = True):
+    """
+    Percorre os pedidos em lotes de OrderRowDTO, por keyset no ID (sem OFFSET).
+    Cada lote faz uma consulta de pedidos e, com itens, uma de itens; nenhuma instância de model é criada.
+    """
+    queryset = (Order.objects.all() if queryset is None else queryset).order_by('id')
+    last_id = 0
+
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).values_list(*ORDER_COLUMNS)[:chunk_size])
+        if not rows:
+            return
+
+        batch = [OrderRowDTO(*row) for row in rows]
+        if with_items:
+            by_id = {order.id: order.items for order in batch}
+            items = (
+                OrderItem.objects.filter(order_id__in=by_id).order_by('order_id', 'id')
+                .values_list(*ITEM_COLUMNS)
+            )
+            for order_id, product_id, quantity, unit_price, subtotal in items:
+                by_id[order_id].append(OrderItemRowDTO(product_id, quantity, unit_price, subtotal))
+
+        yield batch
+        last_id = rows[-1][0]
+
+
+def iter_orders(queryset=None, chunk_size: int = 2000, with_items: bool = True):
+    for batch in iter_order_batches(queryset, chunk_size, with_items):
+        yield from batch
+
+
+@lru_cache(maxsize=None)
+def _formatters(serializer_class):
+    """
+    Campos do serializer como (nome na saída, atributo da linha, to_representation).
+    Reaproveita os campos do DRF, então a saída tem o mesmo formato da API (decimais, datas, fuso).
+    Serializers aninhados vêm com a classe do filho no lugar de to_representation.
+    """
+    formatters = []
+    for name, field in serializer_class().fields.items():
+        if isinstance(field, serializers.ListSerializer):
+            formatters.append((name, name, type(field.child)))
+        elif isinstance(field, serializers.RelatedField):
+            # Linhas já trazem o ID da FK
+            formatters.append((name, f'{name}_id', None))
+        else:
+            formatters.append((name, name, field.to_representation))
+    return tuple(formatters)
+
+
+def _represent(row, serializer_class, with_children: bool) -> dict:
+    data = {}
+    for name, attribute, to_representation in _formatters(serializer_class):
+        if isinstance(to_representation, type):
+            if with_children:
+                data[name] = [_represent(child, to_representation, with_children) for child in getattr(row, attribute)]
+            continue
+
+        value = getattr(row, attribute)
+        data[name] = value if value is None or to_representation is None else to_representation(value)
+    return data
+
+
+def order_row_to_representation(row: OrderRowDTO, with_items: bool = True) -> dict:
+    """Mesma saída de OrderSerializer(order).data, a partir do modelo de leitura."""
+    return _represent(row, OrderSerializer, with_items)
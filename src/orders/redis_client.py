@@ -0,0 +1,29 @@
+from django_redis import get_redis_connection
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError
+
+def get_redis_client():
+    """
+    Conexão Redis crua do cache default.
+    Usada onde o cache do Django não basta (scripts Lua, filas, pub/sub).
+
+    Se o cache default não for django-redis (ex.: LocMemCache em desenvolvimento), lança
+    ConnectionError do redis: quem chama já trata RedisError como "Redis indisponível" e libera a requisição.
+    """
+    try:
+        return get_redis_connection('default')
+    except NotImplementedError as exc:
+        raise RedisConnectionError('O cache default não é um backend django-redis.') from exc
+
+def get_async_redis_client():
+    """
+    Cliente Redis assíncrono (redis.asyncio) apontando para o mesmo servidor do cache.
+    Usado pelo stream de eventos (SSE), que roda no event loop do ASGI.
+    """
+    from django.conf import settings
+    from redis import asyncio as aioredis
+
+    return aioredis.Redis.from_url(settings.CACHES['default']['LOCATION'])
+
+# Falhas do Redis como chegam pelo cache do Django: o django-redis embrulha as do redis-py em ConnectionInterrupted
+CACHE_ERRORS = (RedisError, ConnectionInterrupted)
@@ -0,0 +1,34 @@
+import os
+from django.conf import settings
+from django.http import FileResponse
+
+# Views do drf_spectacular instanciadas no primeiro uso (o import puxa todo o gerador de schema)
+_views = {}
+
+
+def _get_view(name):
+    if name not in _views:
+        from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+        if name == 'schema':
+            _views[name] = SpectacularAPIView.as_view()
+        else:
+            _views[name] = SpectacularSwaggerView.as_view(url_name='schema')
+    return _views[name]
+
+
+def schema_view(request, *args, **kwargs):
+    """
+    Schema OpenAPI. Serve o artefato pré-gerado no build da imagem (OPENAPI_SCHEMA_FILE)
+    e só gera em tempo de execução quando ele não existe (ex.: desenvolvimento com volume montado).
+    """
+    schema_file = settings.OPENAPI_SCHEMA_FILE
+    if schema_file and os.path.exists(schema_file):
+        return FileResponse(open(schema_file, 'rb'), content_type='application/vnd.oai.openapi; charset=utf-8')
+
+    return _get_view('schema')(request, *args, **kwargs)
+
+
+def docs_view(request, *args, **kwargs):
+    """Swagger UI, carregado sob demanda."""
+    return _get_view('docs')(request, *args, **kwargs)
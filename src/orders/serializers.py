@@ -1,15 +1,52 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Customer, Product, Order, OrderItem
+from rest_framework.validators import UniqueValidator
+from .models import Customer, Product, Order, OrderItem, OrderStatusHistory, PriceList, PriceRule
+from .tenancy import current_tenant_id
+
+class TenantUniqueValidator(UniqueValidator):
+    def filter_queryset(self, value, queryset, field_name):
+        # Tenant resolvido na validação, não na montagem dos campos (geração do schema, sem requisição)
+        return super().filter_queryset(value, queryset, field_name).filter(tenant_id=current_tenant_id())
+
+class TenantUniqueFieldsMixin:
+    """
+    Unicidade por tenant (UniqueConstraint com o tenant, que não é campo do serializer):
+    sem isso o DRF não valida e a duplicidade viraria IntegrityError em vez de 400.
+    """
+    tenant_unique_fields = ()
+
+    def get_fields(self):
+        fields = super().get_fields()
+        model = self.Meta.model
+        for name in self.tenant_unique_fields:
+            fields[name].validators.append(TenantUniqueValidator(
+                queryset=model.all_objects.all(), message='Já existe um cadastro com este valor.'
+            ))
+        return fields
+
+class CustomerSerializer(TenantUniqueFieldsMixin, serializers.ModelSerializer):
+    tenant_unique_fields = ('cpf_cnpj', 'email')
 
-class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
-        fields = '__all__'
+        exclude = ['tenant']
+
+class ProductSerializer(TenantUniqueFieldsMixin, serializers.ModelSerializer):
+    tenant_unique_fields = ('sku',)
 
-class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ['tenant']
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        # Estoque só é informado na criação; depois muda apenas pelas rotas de estoque,
+        # pedidos ou importação, que registram o movimento no ledger
+        if self.instance is not None:
+            fields['stock_quantity'].read_only = True
+        return fields
 
 class OrderItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,5 +59,69 @@ class OrderSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Order
-        fields = ['id', 'customer', 'status', 'total_amount', 'created_at', 'items']
-        read_only_fields = ['status', 'total_amount', 'created_at']
\ No newline at end of file
+        fields = [
+            'id', 'customer', 'status', 'total_amount', 'created_at', 'items',
+            'item_count', 'total_quantity', 'last_status_change_at'
+        ]
+        read_only_fields = [
+            'status', 'total_amount', 'created_at',
+            'item_count', 'total_quantity', 'last_status_change_at'
+        ]
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Versão enxuta do pedido, respondida apenas com colunas da tabela Order (sem join com itens).
+    """
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'customer', 'status', 'total_amount', 'created_at',
+            'item_count', 'total_quantity', 'last_status_change_at'
+        ]
+        read_only_fields = fields
+
+class OrderStatusHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrderStatusHistory
+        fields = ['id', 'order', 'old_status', 'new_status', 'changed_at', 'user', 'observation']
+        read_only_fields = fields
+
+class PriceListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceList
+        fields = ['id', 'name', 'customer', 'is_active', 'starts_at', 'ends_at', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate(self, data):
+        starts_at = data.get('starts_at', getattr(self.instance, 'starts_at', None))
+        ends_at = data.get('ends_at', getattr(self.instance, 'ends_at', None))
+        if starts_at and ends_at and ends_at <= starts_at:
+            raise serializers.ValidationError("O fim da vigência deve ser posterior ao início.")
+        return data
+
+class PriceRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceRule
+        fields = ['id', 'price_list', 'product', 'min_quantity', 'unit_price', 'discount_percent']
+
+    def validate(self, data):
+        unit_price = data.get('unit_price', getattr(self.instance, 'unit_price', None))
+        discount_percent = data.get('discount_percent', getattr(self.instance, 'discount_percent', None))
+        if (unit_price is None) == (discount_percent is None):
+            raise serializers.ValidationError("Informe o preço unitário ou o desconto percentual (apenas um).")
+        return data
+
+class ProfilingConfigSerializer(serializers.Serializer):
+    """
+    Ativação do profiler por amostragem (orders/profiling.py).
+    """
+    enabled = serializers.BooleanField()
+    sample_rate = serializers.FloatField(min_value=0.0, max_value=1.0, default=0.01)
+    paths = serializers.ListField(child=serializers.CharField(), default=list)
+    interval_ms = serializers.IntegerField(min_value=1, max_value=1000, default=5)
+    duration_seconds = serializers.IntegerField(min_value=1, default=600)
+
+    def validate_duration_seconds(self, value):
+        if value > settings.PROFILING['MAX_DURATION']:
+            raise serializers.ValidationError(f"Máximo de {settings.PROFILING['MAX_DURATION']} segundos.")
+        return value
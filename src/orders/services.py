@@ -1,84 +1,387 @@
-from django.db import transaction
-from .models import Order, OrderItem, Product, OrderStatusHistory, Customer
-from .dtos import CreateOrderDTO
+import logging
+import time
+from datetime import timedelta
+from itertools import islice
+from typing import Iterable
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from .models import (
+    Order, OrderItem, Product, OrderStatusHistory, OrderStatusTiming, Customer, ArchivedOrder,
+    StockMovement, StockSnapshot, WarehouseStock
+)
+from .dtos import CreateOrderDTO, CatalogImportResultDTO
+from .importers import parse_catalog_row, CatalogRowError
+from .serializers import OrderSerializer
+from .catalog import CatalogSnapshot, catalog_snapshot
+from .pricing import PricingEngine, pricing_engine
+from .allocation import InsufficientStock, StockConflict, WarehouseAllocator
+from .state_machine import order_state_machine
+from .tenancy import current_tenant_id, tenant_context
+from .profiling import span, traced
+
+logger = logging.getLogger(__name__)
+
+# Colunas lidas sob lock na baixa/devolução de estoque
+LOCKED_PRODUCT_FIELDS = ('id', 'name', 'price', 'stock_quantity', 'is_active')
+
+class StockLedgerService:
+    """
+    Toda mudança de estoque passa por aqui e gera uma linha no ledger (StockMovement).
+    """
+    # Checkpoints só cobrem movimentos mais velhos que isso: o ID é reservado no INSERT, antes do commit,
+    # então um ID menor que o corte ainda pode estar em uma transação aberta
+    SNAPSHOT_HORIZON = timedelta(seconds=5)
+
+    def record(self, movements: list) -> None:
+        # Inserção em lote: um INSERT por pedido/lote, não por item
+        if movements:
+            StockMovement.objects.bulk_create(movements)
+
+    @transaction.atomic
+    def adjust(self, product_id: int, delta: int, reason: str = StockMovement.Reason.MANUAL,
+               user=None, observation: str = "", order=None) -> int:
+        """
+        Ajuste relativo e atômico (UPDATE ... SET stock = stock + delta), sem ler-modificar-gravar.
+        Saídas só são aplicadas se houver saldo. Retorna o estoque resultante.
+        """
+        if delta == 0:
+            raise ValueError("O ajuste de estoque deve ser diferente de zero.")
+
+        queryset = Product.objects.filter(id=product_id)
+        if delta < 0:
+            queryset = queryset.filter(stock_quantity__gte=-delta)
+
+        updated = queryset.update(stock_quantity=F('stock_quantity') + delta, updated_at=timezone.now())
+        if not updated:
+            if not Product.objects.filter(id=product_id).exists():
+                raise ValueError(f"Produto ID {product_id} não encontrado.")
+            raise ValueError("Estoque insuficiente para o ajuste.")
+
+        self.record([StockMovement(
+            product_id=product_id, delta=delta, reason=reason,
+            user=user, observation=observation, order=order
+        )])
+        return Product.objects.filter(id=product_id).values_list('stock_quantity', flat=True).get()
+
+    @transaction.atomic
+    def adjust_warehouse(self, warehouse_id: int, product_id: int, delta: int,
+                         reason: str = StockMovement.Reason.MANUAL, user=None, observation: str = "") -> int:
+        """
+        Ajuste relativo no saldo de um centro de distribuição; o total do produto acompanha.
+        Retorna o saldo resultante no centro.
+        """
+        if delta == 0:
+            raise ValueError("O ajuste de estoque deve ser diferente de zero.")
+        if not Product.objects.filter(id=product_id).exists():
+            raise ValueError(f"Produto ID {product_id} não encontrado.")
+
+        WarehouseStock.objects.get_or_create(warehouse_id=warehouse_id, product_id=product_id)
+        queryset = WarehouseStock.objects.filter(warehouse_id=warehouse_id, product_id=product_id)
+        if delta < 0:
+            queryset = queryset.filter(quantity__gte=-delta)
+
+        if not queryset.update(quantity=F('quantity') + delta):
+            raise ValueError("Estoque insuficiente no centro para o ajuste.")
+
+        Product.objects.filter(id=product_id).update(stock_quantity=F('stock_quantity') + delta, updated_at=timezone.now())
+        self.record([StockMovement(
+            product_id=product_id, warehouse_id=warehouse_id, delta=delta, reason=reason,
+            user=user, observation=observation
+        )])
+        return WarehouseStock.objects.filter(warehouse_id=warehouse_id, product_id=product_id).values_list('quantity', flat=True).get()
 
-class CreateOrderService:
     @transaction.atomic
+    def set_quantity(self, product_id: int, quantity: int, user=None, observation: str = "", warehouse_id: int = None) -> int:
+        """
+        Define o estoque absoluto (inventário físico), registrando a diferença no ledger.
+        A linha é travada para não sobrescrever baixas de pedidos concorrentes.
+        Com `warehouse_id`, define o saldo daquele centro (o total do produto recebe a diferença)
+        e retorna o saldo do centro.
+        """
+        if warehouse_id is not None:
+            return self._set_warehouse_quantity(warehouse_id, product_id, quantity, user, observation)
+
+        product = Product.objects.select_for_update().only('id', 'stock_quantity').get(id=product_id)
+        delta = quantity - product.stock_quantity
+        if delta:
+            product.stock_quantity = quantity
+            product.save(update_fields=['stock_quantity', 'updated_at'])
+            self.record([StockMovement(
+                product_id=product_id, delta=delta, reason=StockMovement.Reason.MANUAL,
+                user=user, observation=observation
+            )])
+        return product.stock_quantity
+
+    def _set_warehouse_quantity(self, warehouse_id, product_id, quantity, user, observation) -> int:
+        if quantity < 0:
+            raise ValueError("O saldo do centro não pode ser negativo.")
+        if not Product.objects.filter(id=product_id).exists():
+            raise ValueError(f"Produto ID {product_id} não encontrado.")
+
+        WarehouseStock.objects.get_or_create(warehouse_id=warehouse_id, product_id=product_id)
+        stock = WarehouseStock.objects.select_for_update().get(warehouse_id=warehouse_id, product_id=product_id)
+        delta = quantity - stock.quantity
+        if delta:
+            stock.quantity = quantity
+            stock.save(update_fields=['quantity'])
+            Product.objects.filter(id=product_id).update(stock_quantity=F('stock_quantity') + delta, updated_at=timezone.now())
+            self.record([StockMovement(
+                product_id=product_id, warehouse_id=warehouse_id, delta=delta, reason=StockMovement.Reason.MANUAL,
+                user=user, observation=observation
+            )])
+        return stock.quantity
+
+    def stock_as_of(self, product_id: int, when=None) -> int:
+        """
+        Estoque segundo o ledger: último checkpoint até `when` + movimentos posteriores a ele.
+        Sem `when`, retorna o estoque atual do ledger.
+        """
+        snapshots = StockSnapshot.objects.filter(product_id=product_id)
+        movements = StockMovement.objects.filter(product_id=product_id)
+        if when is not None:
+            snapshots = snapshots.filter(taken_at__lte=when)
+            movements = movements.filter(created_at__lte=when)
+
+        snapshot = snapshots.order_by('-last_movement_id').first()
+        base = 0
+        if snapshot is not None:
+            base = snapshot.quantity
+            movements = movements.filter(id__gt=snapshot.last_movement_id)
+
+        return base + (movements.aggregate(total=Sum('delta'))['total'] or 0)
+
+    def take_snapshots(self, chunk_size: int = 1000) -> int:
+        """
+        Gera checkpoints incrementais: soma, por produto, só os movimentos desde o último corte.
+        O corte é o maior ID entre os movimentos mais velhos que SNAPSHOT_HORIZON, para não
+        fechar uma janela que ainda pode receber commits de IDs menores.
+        Retorna a quantidade de checkpoints criados.
+        """
+        horizon = timezone.now() - self.SNAPSHOT_HORIZON
+        cut = (
+            StockMovement.objects.filter(created_at__lt=horizon)
+            .order_by('-id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if cut is None:
+            return 0
+
+        previous_cut = StockSnapshot.objects.order_by('-last_movement_id').values_list('last_movement_id', flat=True).first() or 0
+        if previous_cut >= cut:
+            return 0
+
+        window = StockMovement.objects.filter(id__gt=previous_cut, id__lte=cut)
+        taken_at = timezone.now()
+        created = 0
+        last_product_id = 0
+
+        # Percorre os produtos movimentados na janela em faixas de ID
+        while True:
+            deltas = dict(
+                window.filter(product_id__gt=last_product_id)
+                .values('product_id')
+                .annotate(total=Sum('delta'))
+                .order_by('product_id')
+                .values_list('product_id', 'total')[:chunk_size]
+            )
+            if not deltas:
+                break
+
+            latest = (
+                StockSnapshot.objects.filter(product_id=OuterRef('product_id'))
+                .order_by('-last_movement_id')
+                .values('id')[:1]
+            )
+            previous = dict(
+                StockSnapshot.objects.filter(product_id__in=list(deltas), id=Subquery(latest))
+                .values_list('product_id', 'quantity')
+            )
+
+            StockSnapshot.objects.bulk_create([
+                StockSnapshot(
+                    product_id=product_id,
+                    quantity=previous.get(product_id, 0) + total,
+                    last_movement_id=cut,
+                    taken_at=taken_at
+                )
+                for product_id, total in deltas.items()
+            ])
+            created += len(deltas)
+            last_product_id = max(deltas)
+
+        return created
+
+
+class CreateOrderService:
+    def __init__(self, catalog: CatalogSnapshot = None, pre_validate: bool = True, pricing: PricingEngine = None,
+                 allocator: WarehouseAllocator = None):
+        self.catalog = catalog or catalog_snapshot
+        self.pre_validate = pre_validate
+        self.pricing = pricing or pricing_engine
+        # Estoque por centro de distribuição (settings.INVENTORY); None = estoque único do produto
+        if allocator is None and settings.INVENTORY['MULTI_WAREHOUSE']:
+            allocator = WarehouseAllocator()
+        self.allocator = allocator
+
+    @traced('create_order')
     def create_order(self, dto: CreateOrderDTO) -> Order:
+        # Pré-validação em memória: pedidos obviamente inválidos não abrem transação nem travam linhas
+        if self.pre_validate:
+            with span('pre_validate'):
+                self.catalog.pre_validate(dto)
+
+        # Saldo consumido por um pedido concorrente entre a alocação e a baixa: refaz a transação
+        retries = settings.INVENTORY['ALLOCATION_RETRIES']
+        for attempt in range(retries + 1):
+            try:
+                return self._create_order(dto)
+            except StockConflict:
+                if attempt == retries:
+                    raise ValueError("Estoque alterado por pedidos simultâneos. Tente novamente.")
+
+    @transaction.atomic
+    def _create_order(self, dto: CreateOrderDTO) -> Order:
         # Validacao do Cliente 
-        try:
-            customer = Customer.objects.get(id=dto.customer_id)
-        except Customer.DoesNotExist:
-            raise ValueError("Cliente não encontrado.")
-            
-        if not customer.is_active:
-            raise ValueError("Cliente inativo não pode realizar pedidos.")
+        with span('validate'):
+            try:
+                customer = Customer.objects.get(id=dto.customer_id)
+            except Customer.DoesNotExist:
+                raise ValueError("Cliente não encontrado.")
+                
+            if not customer.is_active:
+                raise ValueError("Cliente inativo não pode realizar pedidos.")
 
         # Travar os produtos no banco para concorrencia 
         product_ids = [item.product_id for item in dto.items]
-        products = Product.objects.select_for_update().filter(id__in=product_ids)
+        # Lê apenas as colunas necessárias (sem description) para a linha travada
+        products = Product.objects.filter(id__in=product_ids).only(*LOCKED_PRODUCT_FIELDS)
+        if self.allocator is None:
+            products = products.select_for_update()
+        # (com centros de distribuição, só as linhas de WarehouseStock escolhidas são travadas, na alocação)
         
-        product_map = {p.id: p for p in products}
+        with span('lock'):
+            product_map = {p.id: p for p in products}
         
         # Validação de Produtos, quantidade e estoque 
-        for item in dto.items:
-            if item.quantity <= 0:
-                raise ValueError("A quantidade do item deve ser maior que zero.")
-                
-            product = product_map.get(item.product_id)
-            if not product:
-                raise ValueError(f"Produto ID {item.product_id} não encontrado.")
-            if not product.is_active:
-                raise ValueError(f"O produto {product.name} está inativo e não pode ser vendido.")
-            if product.stock_quantity < item.quantity:
-                raise ValueError(f"Estoque insuficiente para o produto {product.name}.")
+        with span('validate'):
+            for item in dto.items:
+                if item.quantity <= 0:
+                    raise ValueError("A quantidade do item deve ser maior que zero.")
+                    
+                product = product_map.get(item.product_id)
+                if not product:
+                    raise ValueError(f"Produto ID {item.product_id} não encontrado.")
+                if not product.is_active:
+                    raise ValueError(f"O produto {product.name} está inativo e não pode ser vendido.")
+                if self.allocator is None and product.stock_quantity < item.quantity:
+                    raise ValueError(f"Estoque insuficiente para o produto {product.name}.")
             
+        # Preços de todas as linhas em uma passada, sobre o preço lido na linha travada
+        with span('price'):
+            priced = self.pricing.price(
+                customer.id,
+                [(item.product_id, item.quantity, product_map[item.product_id].price) for item in dto.items]
+            )
+
+        with span('write'):
+            return self._write_order(dto, customer, product_map, priced)
+
+    def _write_order(self, dto: CreateOrderDTO, customer, product_map, priced) -> Order:
         # 4. Criar o Pedido 
         order = Order.objects.create(
             customer_id=dto.customer_id,
             status=Order.Status.PENDING,
-            total_amount=0
+            total_amount=0,
+            item_count=len(dto.items),
+            total_quantity=sum(item.quantity for item in dto.items),
+            last_status_change_at=timezone.now(),
+            intake_ticket=dto.intake_ticket
         )
-        
-        total = 0
-        
-        # Criar os itens do pedido e abater o estoque
-        for item in dto.items:
-            product = product_map[item.product_id]
-            subtotal = product.price * item.quantity
-            
-            OrderItem.objects.create(
+
+        # Subtotal já calculado pelo motor de preços: um único INSERT para todos os itens
+        OrderItem.objects.bulk_create([
+            OrderItem(
                 order=order,
-                product=product,
-                quantity=item.quantity,
-                unit_price=product.price,
-                subtotal=subtotal
+                product_id=line.product_id,
+                quantity=line.quantity,
+                unit_price=line.unit_price,
+                subtotal=line.subtotal
             )
-            
-            # Abater o estoque do produto atomicamente
-            product.stock_quantity -= item.quantity
-            product.save()
-            
-            total += subtotal
+            for line in priced.items
+        ])
+
+        movements = []
+
+        if self.allocator is not None:
+            # Baixa nos centros escolhidos para o cliente
+            try:
+                movements = self.allocator.reserve(
+                    order, [(item.product_id, item.quantity) for item in dto.items], customer.region
+                )
+            except InsufficientStock as e:
+                raise ValueError(f"Estoque insuficiente para o produto {product_map[e.product_id].name}.")
+        else:
+            # Abater o estoque dos produtos
+            for item in dto.items:
+                product = product_map[item.product_id]
+                product.stock_quantity -= item.quantity
+                product.save(update_fields=['stock_quantity', 'updated_at'])
+                movements.append(StockMovement(
+                    product_id=product.id, delta=-item.quantity,
+                    reason=StockMovement.Reason.ORDER, order=order
+                ))
+
+        StockLedgerService().record(movements)
             
         # 6. Atualizar o valor total do pedido
-        order.total_amount = total
+        order.total_amount = priced.total
         order.save()
         
         return order
 
 
+@order_state_machine.on_enter(Order.Status.CANCELED)
+def restore_stock(order, user=None):
+    """
+    Hook do cancelamento: devolve o estoque dos itens e registra os movimentos no ledger.
+    """
+    if order.allocations.exists():
+        # Pedido alocado por centro: cada unidade volta para o centro de onde saiu
+        StockLedgerService().record(WarehouseAllocator().release(order, user=user))
+        return
+
+    items = order.items.all()
+    # Trava as linhas dos produtos especificos desse pedido
+    product_ids = [item.product_id for item in items]
+    products_to_update = (
+        Product.objects.select_for_update()
+        .filter(id__in=product_ids)
+        .only(*LOCKED_PRODUCT_FIELDS)
+    )
+    product_map = {p.id: p for p in products_to_update}
+    movements = []
+
+    for item in items:
+        product = product_map[item.product_id]
+        product.stock_quantity += item.quantity
+        product.save(update_fields=['stock_quantity', 'updated_at'])
+        movements.append(StockMovement(
+            product_id=product.id, delta=item.quantity,
+            reason=StockMovement.Reason.CANCELLATION, order=order, user=user
+        ))
+
+    StockLedgerService().record(movements)
+
+
 class UpdateOrderStatusService:
-    # Transicoes válidas de status 
-    ALLOWED_TRANSITIONS = {
-        Order.Status.PENDING: [Order.Status.CONFIRMED, Order.Status.CANCELED],
-        Order.Status.CONFIRMED: [Order.Status.SEPARATED, Order.Status.CANCELED],
-        Order.Status.SEPARATED: [Order.Status.SHIPPED],
-        Order.Status.SHIPPED: [Order.Status.DELIVERED],
-        Order.Status.DELIVERED: [],  
-        Order.Status.CANCELED: []    
-    }
+    def __init__(self, state_machine=None):
+        self.state_machine = state_machine or order_state_machine
 
+    @traced('update_status')
     @transaction.atomic
     def update_status(self, order_id: int, new_status: str, user=None, observation: str = "") -> Order:
         # Trava a linha do pedido para evitar atualizações concorrentes
@@ -89,30 +392,18 @@ class UpdateOrderStatusService:
         # Se o status for o mesmo, não faz nada
         if old_status == new_status:
             return order
-            
-        # Valida se o status enviado existe no sistema
-        if new_status not in dict(Order.Status.choices):
-            raise ValueError(f"Status '{new_status}' inválido.")
-            
-        # Bloqueia transições invalidas 
-        if new_status not in self.ALLOWED_TRANSITIONS.get(old_status, []):
-            raise ValueError(f"Transição de status inválida: de '{old_status}' para '{new_status}'.")
-            
-        # Ao cancelar um pedido, o estoque deve ser devolvido
-        if new_status == Order.Status.CANCELED:
-            items = order.items.all()
-            # Trava as linhas dos produtos especificos desse pedido
-            product_ids = [item.product_id for item in items]
-            products_to_update = Product.objects.select_for_update().filter(id__in=product_ids)
-            product_map = {p.id: p for p in products_to_update}
-            
-            for item in items:
-                product = product_map[item.product_id]
-                product.stock_quantity += item.quantity 
-                product.save()
-                
+
+        # Valida a transição e executa guards e hooks (ex.: devolução de estoque no cancelamento)
+        self.state_machine.run(order, new_status, user=user)
+
+        # Permanência no status de saída, desde a última mudança (ou a criação)
+        now = timezone.now()
+        entered_at = order.last_status_change_at or order.created_at
+        StatusTimingService().record(order, old_status, (now - entered_at).total_seconds())
+
         # Atualiza o pedido
         order.status = new_status
+        order.last_status_change_at = now
         order.save()
         
         OrderStatusHistory.objects.create(
@@ -123,4 +414,230 @@ class UpdateOrderStatusService:
             observation=observation
         )
         
-        return order
\ No newline at end of file
+        return order
+
+
+class StatusTimingService:
+    """
+    Agregado de lead time por status (OrderStatusTiming), atualizado a cada transição.
+    """
+    def record(self, order: Order, status: str, seconds: float):
+        """
+        Soma a permanência de `order` em `status`. Roda na transação da mudança de status;
+        a linha atualizada é a do slot do pedido, então transições concorrentes raramente disputam o lock.
+        """
+        seconds = max(seconds, 0.0)
+        lookup = {'status': status, 'slot': order.id % OrderStatusTiming.SLOTS}
+        increment = {
+            'transitions': F('transitions') + 1,
+            'total_seconds': F('total_seconds') + seconds,
+            'max_seconds': Greatest(F('max_seconds'), Value(seconds)),
+            'updated_at': timezone.now(),
+        }
+
+        # Agregado do tenant do pedido (o manager filtra e o default do FK usa o tenant do contexto)
+        with tenant_context(order.tenant_id):
+            if OrderStatusTiming.objects.filter(**lookup).update(**increment):
+                return
+            try:
+                # Primeira transição do slot; a savepoint isola a colisão com outra transação criando a mesma linha
+                with transaction.atomic():
+                    OrderStatusTiming.objects.create(**lookup, transitions=1, total_seconds=seconds, max_seconds=seconds)
+            except IntegrityError:
+                OrderStatusTiming.objects.filter(**lookup).update(**increment)
+
+    def summary(self) -> list:
+        """
+        Lead time por status do tenant atual: transições, média e máximo em segundos.
+        """
+        rows = (
+            OrderStatusTiming.objects.order_by('status').values('status')
+            .annotate(count=Sum('transitions'), total=Sum('total_seconds'), longest=Max('max_seconds'))
+        )
+        return [
+            {
+                'status': row['status'],
+                'transitions': row['count'],
+                'avg_seconds': round(row['total'] / row['count'], 3) if row['count'] else 0.0,
+                'max_seconds': round(row['longest'], 3),
+            }
+            for row in rows
+        ]
+
+
+class ArchiveOrdersService:
+    # Apenas pedidos em estado final podem sair das tabelas quentes
+    ARCHIVABLE_STATUSES = [Order.Status.DELIVERED, Order.Status.CANCELED]
+
+    @transaction.atomic
+    def archive_chunk(self, cutoff, chunk_size: int = 500) -> int:
+        """
+        Move um lote de pedidos finalizados criados antes de `cutoff` para ArchivedOrder.
+        Retorna a quantidade de pedidos arquivados (0 quando não há mais nada a mover).
+        """
+        # skip_locked evita disputar linhas com transações de status em andamento
+        order_ids = list(
+            Order.all_objects.select_for_update(skip_locked=True)
+            .filter(status__in=self.ARCHIVABLE_STATUSES, created_at__lt=cutoff)
+            .order_by('id')
+            .values_list('id', flat=True)[:chunk_size]
+        )
+        if not order_ids:
+            return 0
+
+        orders = (
+            Order.all_objects.filter(id__in=order_ids)
+            .prefetch_related('items', 'history')
+            .order_by('id')
+        )
+
+        archived = []
+        for order in orders:
+            payload = dict(OrderSerializer(order).data)
+            payload['history'] = [
+                {
+                    'old_status': entry.old_status,
+                    'new_status': entry.new_status,
+                    'changed_at': entry.changed_at,
+                    'user': entry.user_id,
+                    'observation': entry.observation,
+                }
+                for entry in order.history.all()
+            ]
+            archived.append(ArchivedOrder(
+                id=order.id,
+                customer_id=order.customer_id,
+                status=order.status,
+                total_amount=order.total_amount,
+                created_at=order.created_at,
+                payload=payload
+            ))
+
+        ArchivedOrder.objects.bulk_create(archived)
+
+        # Delete físico: itens e histórico saem junto via CASCADE
+        Order.all_objects.filter(id__in=order_ids).delete()
+
+        return len(archived)
+
+
+
+class CatalogImportService:
+    """
+    Importa catálogos de fornecedores (milhares de SKUs) em lotes.
+    Compara cada lote com os produtos existentes por SKU e grava apenas o que mudou:
+    inserts com bulk_create (upsert) e updates com bulk_update.
+    """
+    IMPORT_FIELDS = ['name', 'description', 'price', 'stock_quantity', 'is_active']
+
+    def __init__(self, chunk_size: int = 2000):
+        self.chunk_size = chunk_size
+
+    def run(self, rows: Iterable[dict], progress=None) -> CatalogImportResultDTO:
+        result = CatalogImportResultDTO()
+        started = time.perf_counter()
+
+        # SKU é único por tenant: a importação inteira roda no tenant atual (ou no padrão, pela linha de comando)
+        tenant_id = current_tenant_id()
+
+        iterator = iter(rows)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                break
+
+            with tenant_context(tenant_id):
+                self._import_chunk(chunk, result)
+            result.elapsed_seconds = time.perf_counter() - started
+            if progress:
+                progress(result)
+
+        result.elapsed_seconds = time.perf_counter() - started
+        return result
+
+    @transaction.atomic
+    def _import_chunk(self, raw_rows, result: CatalogImportResultDTO):
+        # Normaliza e deduplica por SKU (a última linha do lote vence)
+        rows = {}
+        for raw in raw_rows:
+            try:
+                row = parse_catalog_row(raw)
+            except CatalogRowError as e:
+                result.errors += 1
+                logger.warning(f"CATALOG IMPORT ROW SKIPPED: {e}")
+                continue
+            rows[row['sku']] = row
+
+        if not rows:
+            return
+
+        # Trava os produtos existentes na mesma ordem (ID) usada na criação de pedidos
+        existing = {
+            product.sku: product
+            for product in Product.all_objects.select_for_update()
+            .filter(sku__in=list(rows))
+            .only('id', 'sku', *self.IMPORT_FIELDS)
+            .order_by('id')
+        }
+
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        movements = []
+
+        for sku, row in rows.items():
+            product = existing.get(sku)
+
+            if product is None:
+                if 'name' not in row or 'price' not in row:
+                    result.errors += 1
+                    logger.warning(f"CATALOG IMPORT ROW SKIPPED: SKU novo {sku} sem nome ou preço.")
+                    continue
+                to_create.append(Product(**row))
+                continue
+
+            if 'stock_quantity' in row and row['stock_quantity'] != product.stock_quantity:
+                movements.append(StockMovement(
+                    product_id=product.id, delta=row['stock_quantity'] - product.stock_quantity,
+                    reason=StockMovement.Reason.IMPORT
+                ))
+
+            changed = False
+            for field in self.IMPORT_FIELDS:
+                if field in row and getattr(product, field) != row[field]:
+                    setattr(product, field, row[field])
+                    changed = True
+
+            if changed:
+                product.updated_at = now
+                to_update.append(product)
+            else:
+                result.unchanged += 1
+
+        if to_create:
+            # Upsert cobre o SKU criado por outro processo entre a leitura e a escrita
+            # updated_at entra no upsert para a atualização incremental do snapshot enxergar a linha
+            upsert_kwargs = {'update_conflicts': True, 'update_fields': self.IMPORT_FIELDS + ['updated_at']}
+            if connection.features.supports_update_conflicts_with_target:
+                upsert_kwargs['unique_fields'] = ['tenant', 'sku']
+            Product.objects.bulk_create(to_create, **upsert_kwargs)
+            result.created += len(to_create)
+
+            # bulk_create não devolve IDs no MySQL: busca pelos SKUs para registrar o estoque inicial
+            initial_stock = {p.sku: p.stock_quantity for p in to_create if p.stock_quantity}
+            for product_id, sku in Product.all_objects.filter(sku__in=list(initial_stock)).values_list('id', 'sku'):
+                movements.append(StockMovement(
+                    product_id=product_id, delta=initial_stock[sku],
+                    reason=StockMovement.Reason.INITIAL
+                ))
+
+        if to_update:
+            Product.all_objects.bulk_update(to_update, self.IMPORT_FIELDS + ['updated_at'])
+            result.updated += len(to_update)
+
+        StockLedgerService().record(movements)
+
+        # bulk_create/bulk_update não disparam signals: avisa os processos a cada lote commitado,
+        # para que uma importação longa não deixe o snapshot do catálogo desatualizado até o fim
+        if to_create or to_update:
+            transaction.on_commit(catalog_snapshot.bump_version)
@@ -1,7 +1,14 @@
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, post_migrate
 from django.dispatch import receiver
-from .models import Order, OrderStatusHistory
+from .models import Order, OrderStatusHistory, Product, Customer, PriceList, PriceRule, Warehouse, WarehouseRoute, Tenant
+from .tenancy import tenant_registry
+from .catalog import catalog_snapshot
+from .pricing import pricing_engine
+from .allocation import warehouse_preferences
+from .events import build_status_changed_payload, publish_event
 
 logger = logging.getLogger(__name__)
 
@@ -12,13 +19,65 @@ def order_status_event_handler(sender, instance, created, **kwargs):
     Sempre que um histórico é criado, um evento é "publicado".
     """
     if created:
-        event_payload = {
-            "event": "order.status_changed",
-            "order_id": instance.order.id,
-            "old_status": instance.old_status,
-            "new_status": instance.new_status,
-            "timestamp": instance.changed_at.isoformat()
-        }
+        event_payload = build_status_changed_payload(instance)
         
         # Log estruturado 
-        logger.info(f"DOMAIN EVENT PUBLISHED: {event_payload}")
\ No newline at end of file
+        logger.info(f"DOMAIN EVENT PUBLISHED: {event_payload}")
+
+        # Entrega para os streams SSE só depois do commit (nunca anuncia mudança desfeita)
+        transaction.on_commit(lambda: publish_event(event_payload))
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def catalog_changed_handler(sender, **kwargs):
+    """
+    Invalida o snapshot do catálogo usado na pré-validação de pedidos.
+    O processo atual descarta na hora; os demais, após o commit, via versão no cache.
+    """
+    update_fields = kwargs.get('update_fields')
+
+    # Baixa de estoque não altera o que o snapshot guarda
+    if update_fields and set(update_fields) <= {'stock_quantity', 'updated_at'}:
+        return
+
+    catalog_snapshot.invalidate()
+    transaction.on_commit(catalog_snapshot.bump_version)
+
+@receiver(post_save, sender=PriceList)
+@receiver(post_delete, sender=PriceList)
+@receiver(post_save, sender=PriceRule)
+@receiver(post_delete, sender=PriceRule)
+def pricing_changed_handler(sender, **kwargs):
+    """
+    Recompila as regras de preço: no processo atual na hora, nos demais após o commit.
+    """
+    pricing_engine.invalidate()
+    transaction.on_commit(pricing_engine.bump_version)
+
+@receiver(post_save, sender=Warehouse)
+@receiver(post_delete, sender=Warehouse)
+@receiver(post_save, sender=WarehouseRoute)
+@receiver(post_delete, sender=WarehouseRoute)
+def warehouse_preferences_changed_handler(sender, **kwargs):
+    """
+    Recalcula as preferências de centro por região: no processo atual na hora, nos demais após o commit.
+    """
+    warehouse_preferences.invalidate()
+    transaction.on_commit(warehouse_preferences.bump_version)
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def tenant_changed_handler(sender, **kwargs):
+    tenant_registry.invalidate()
+
+@receiver(post_migrate)
+def ensure_default_tenant_handler(sender, **kwargs):
+    """
+    Garante o tenant padrão também depois de um flush (que apaga o criado pela migração).
+    """
+    if sender.name != 'orders':
+        return
+    Tenant.objects.get_or_create(code=settings.TENANCY['DEFAULT_TENANT'], defaults={'name': 'Tenant padrão'})
+    tenant_registry.invalidate()
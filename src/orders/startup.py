@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+
+# Orçamentos de cold start de um worker (ms)
+BOOT_BUDGET_MS = 3000.0
+FIRST_REQUEST_BUDGET_MS = 500.0
+
+# Executado em um interpretador novo: mede o boot como um worker recém-criado o veria
+BOOT_SCRIPT = """
+import json, sys, time
+
+started = time.perf_counter()
+import django
+from django.conf import settings
+if sys.argv[3]:
+    # Banco de teste do processo que pediu a medição (o subprocesso não herda o nome trocado pelo runner)
+    settings.DATABASES['default']['NAME'] = sys.argv[3]
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+boot_ms = (time.perf_counter() - started) * 1000
+
+# Primeira requisição por uma rota DRF real (router, throttling, filtros, serializer e conexão com o banco),
+# não pelo health check, que é uma função simples e não passa pelo que é carregado sob demanda
+from django.test import Client
+started = time.perf_counter()
+response = Client().get('/api/v1/products/', HTTP_HOST=sys.argv[1], HTTP_X_TENANT=sys.argv[2])
+first_request_ms = (time.perf_counter() - started) * 1000
+
+print(json.dumps({
+    'boot_ms': boot_ms,
+    'first_request_ms': first_request_ms,
+    'status_code': response.status_code,
+    'modules': sorted(sys.modules),
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Converte a saída de `python -X importtime` em [(módulo, self_us, cumulativo_us)].
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, module = line[len('import time:'):].split('|')
+            rows.append((module.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            # Linha de cabeçalho ("self [us] | cumulative | imported package")
+            continue
+    return rows
+
+
+def measure_boot(importtime: bool = False, database: str = '') -> dict:
+    """
+    Sobe um interpretador novo com as mesmas settings, carrega a URLConf e faz a primeira requisição
+    (GET /api/v1/products/ no tenant padrão). `database` troca o nome do banco default (ex: o banco de teste).
+    Retorna boot_ms, first_request_ms, status_code, modules e, com importtime, imports.
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += [
+        '-c', BOOT_SCRIPT,
+        settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost',
+        settings.TENANCY['DEFAULT_TENANT'],
+        str(database),
+    ]
+
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings')}
+    completed = subprocess.run(
+        command, capture_output=True, text=True, env=env, cwd=settings.BASE_DIR, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falha ao medir o boot:\n{completed.stderr[-2000:]}")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    if importtime:
+        result['imports'] = parse_importtime(completed.stderr)
+    return result
@@ -0,0 +1,75 @@
+from .models import Order
+
+
+class OrderStateMachine:
+    """
+    Máquina de estados do pedido, compilada uma vez por processo.
+    Transições viram frozensets e guards/hooks ficam pré-resolvidos por par (origem, destino),
+    então validar e aplicar uma transição é só lookup em dicionário, sem montar listas a cada chamada.
+
+    Guards: `fn(order, user=None)` que lança ValueError para barrar a transição.
+    Hooks: `fn(order, user=None)` executado dentro da transação, antes de gravar o novo status.
+    """
+    TRANSITIONS = {
+        Order.Status.PENDING: (Order.Status.CONFIRMED, Order.Status.CANCELED),
+        Order.Status.CONFIRMED: (Order.Status.SEPARATED, Order.Status.CANCELED),
+        Order.Status.SEPARATED: (Order.Status.SHIPPED,),
+        Order.Status.SHIPPED: (Order.Status.DELIVERED,),
+        Order.Status.DELIVERED: (),
+        Order.Status.CANCELED: (),
+    }
+
+    def __init__(self, transitions=None):
+        transitions = self.TRANSITIONS if transitions is None else transitions
+
+        self.statuses = frozenset(Order.Status.values)
+        self.transitions = {source: frozenset(targets) for source, targets in transitions.items()}
+        self.final_statuses = frozenset(source for source, targets in self.transitions.items() if not targets)
+
+        # (origem, destino) -> tupla de callables, só para transições válidas
+        self._guards = {(source, target): () for source, targets in self.transitions.items() for target in targets}
+        self._hooks = dict(self._guards)
+
+    def allowed(self, status) -> frozenset:
+        return self.transitions.get(status, frozenset())
+
+    def validate(self, old_status, new_status):
+        if new_status not in self.statuses:
+            raise ValueError(f"Status '{new_status}' inválido.")
+        if new_status not in self.allowed(old_status):
+            raise ValueError(f"Transição de status inválida: de '{old_status}' para '{new_status}'.")
+
+    def guard(self, target, source=None):
+        """Registra um guard para as transições que chegam em `target` (de `source` ou de qualquer origem)."""
+        return self._register(self._guards, target, source)
+
+    def on_enter(self, target, source=None):
+        """Registra um hook para as transições que chegam em `target` (de `source` ou de qualquer origem)."""
+        return self._register(self._hooks, target, source)
+
+    def _register(self, registry, target, source):
+        pairs = [pair for pair in registry if pair[1] == target and source in (None, pair[0])]
+        if not pairs:
+            raise ValueError(f"Nenhuma transição válida chega em '{target}'" + (f" a partir de '{source}'." if source else "."))
+
+        def decorator(fn):
+            for pair in pairs:
+                registry[pair] = registry[pair] + (fn,)
+            return fn
+        return decorator
+
+    def run(self, order, new_status, user=None):
+        """
+        Valida a transição do status atual de `order` para `new_status` e executa guards e hooks.
+        Não altera nem salva o pedido: isso fica com quem chama, dentro da mesma transação.
+        """
+        self.validate(order.status, new_status)
+        pair = (order.status, new_status)
+
+        for guard in self._guards[pair]:
+            guard(order, user=user)
+        for hook in self._hooks[pair]:
+            hook(order, user=user)
+
+
+order_state_machine = OrderStateMachine()
@@ -0,0 +1,138 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+# Tenant da requisição/tarefa atual. None = sem escopo (migrações, jobs em lote, caches globais)
+_current_tenant = ContextVar('current_tenant', default=None)
+
+
+def get_current_tenant():
+    return _current_tenant.get()
+
+
+@contextmanager
+def tenant_context(tenant_id):
+    """Executa o bloco no escopo de um tenant (ou sem escopo, com None)."""
+    token = _current_tenant.set(tenant_id)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def unscoped():
+    """
+    Bloco sem filtro de tenant, para leituras globais por ID dentro de uma requisição
+    (snapshot do catálogo, regras de preço): os IDs já são únicos entre tenants.
+    """
+    return tenant_context(None)
+
+
+def scope_to_tenant(queryset, lookup: str = 'tenant_id'):
+    """Filtra pelo tenant atual; `lookup` alcança o tenant por relação (ex: 'order__tenant_id')."""
+    tenant_id = _current_tenant.get()
+    return queryset if tenant_id is None else queryset.filter(**{lookup: tenant_id})
+
+
+def tenant_key(key: str) -> str:
+    """Chave de cache no espaço do tenant atual (idempotência, resultados da fila, leituras)."""
+    tenant_id = _current_tenant.get()
+    return key if tenant_id is None else f'tenant:{tenant_id}:{key}'
+
+
+class TenantRegistry:
+    """
+    Código -> ID dos tenants ativos, em memória por processo, relido a cada REFRESH_INTERVAL:
+    a resolução do tenant não custa uma consulta por requisição.
+    """
+    REFRESH_INTERVAL = 30.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._by_code = {}
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._loaded_at is not None and now - self._loaded_at < self.REFRESH_INTERVAL:
+            return
+
+        from .models import Tenant
+        with self._lock:
+            self._by_code = dict(Tenant.objects.filter(is_active=True).values_list('code', 'id'))
+            self._loaded_at = now
+
+    def resolve(self, code: str):
+        self._refresh()
+        return self._by_code.get(code)
+
+    def default_id(self):
+        return self.resolve(settings.TENANCY['DEFAULT_TENANT'])
+
+
+tenant_registry = TenantRegistry()
+
+
+def current_tenant_id():
+    """Default do campo `tenant`: o tenant atual ou, fora de uma requisição, o tenant padrão."""
+    return _current_tenant.get() or tenant_registry.default_id()
+
+
+class TenantMiddleware:
+    """
+    Resolve o tenant pelo header (settings.TENANCY['HEADER']) e executa a requisição no escopo dele.
+    Sem header, usa o tenant padrão (instalações de uma empresa só); código desconhecido ou inativo é 400.
+    Rotas em TENANCY['EXEMPT_PATHS'] (health check, schema, admin) seguem sem escopo.
+    Funciona nas duas pilhas: WSGI (API) e ASGI (stream de eventos).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def is_exempt(self, request):
+        return request.path.startswith(settings.TENANCY['EXEMPT_PATHS'])
+
+    def resolve(self, request):
+        code = request.headers.get(settings.TENANCY['HEADER'])
+        return tenant_registry.resolve(code) if code else tenant_registry.default_id()
+
+    def invalid(self):
+        return JsonResponse({'error': 'Tenant inválido.'}, status=400)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if self.is_exempt(request):
+            return self.get_response(request)
+
+        tenant_id = self.resolve(request)
+        if tenant_id is None:
+            return self.invalid()
+
+        request.tenant_id = tenant_id
+        with tenant_context(tenant_id):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.is_exempt(request):
+            return await self.get_response(request)
+
+        tenant_id = await sync_to_async(self.resolve)(request)
+        if tenant_id is None:
+            return self.invalid()
+
+        request.tenant_id = tenant_id
+        with tenant_context(tenant_id):
+            return await self.get_response(request)
@@ -0,0 +1,169 @@
+from io import StringIO
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders import allocation
+from orders.allocation import InsufficientStock, allocate, warehouse_preferences
+from orders.models import Customer, Product, StockMovement, Warehouse, WarehouseRoute, WarehouseStock
+from orders.services import CreateOrderService, UpdateOrderStatusService, StockLedgerService
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+MULTI_WAREHOUSE = {'MULTI_WAREHOUSE': True, 'ALLOCATION_RETRIES': 3}
+
+
+class AllocateTestCase(TestCase):
+    def test_single_warehouse_that_covers_everything_wins(self):
+        stock = {1: {10: 5, 20: 5}, 2: {20: 5}, 3: {10: 5, 20: 5}}
+        self.assertEqual(
+            sorted(allocate({1: 2, 2: 2, 3: 2}, stock, preference=(10, 20))),
+            [(20, 1, 2), (20, 2, 2), (20, 3, 2)]
+        )
+
+    def test_ties_follow_customer_preference(self):
+        stock = {1: {10: 5, 20: 5}}
+        self.assertEqual(allocate({1: 3}, stock, preference=(20, 10)), [(20, 1, 3)])
+        self.assertEqual(allocate({1: 3}, stock, preference=(10, 20)), [(10, 1, 3)])
+
+    def test_lines_no_warehouse_covers_alone_are_split(self):
+        stock = {1: {10: 4, 20: 4, 30: 9}, 2: {10: 2, 20: 3}}
+        # O item 2 só cabe no 20; o 1 é dividido a partir dele, o centro já escolhido
+        self.assertEqual(sorted(allocate({1: 6, 2: 3}, stock, preference=(10, 30, 20))), [(20, 2, 3), (30, 1, 6)])
+        self.assertEqual(sorted(allocate({1: 10, 2: 1}, stock, preference=(10, 20, 30))), [(10, 1, 4), (10, 2, 1), (30, 1, 6)])
+
+        with self.assertRaises(InsufficientStock):
+            allocate({2: 6}, stock, preference=(10, 20))
+
+
+@override_settings(INVENTORY=MULTI_WAREHOUSE)
+class MultiWarehouseOrderTestCase(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Cliente Centros", cpf_cnpj="80280280280", email="centros@teste.com", region="RJ"
+        )
+        self.sp = Warehouse.objects.create(code="CD-SP", name="Centro SP", region="SP", priority=1)
+        self.rj = Warehouse.objects.create(code="CD-RJ", name="Centro RJ", region="RJ", priority=2)
+        self.mg = Warehouse.objects.create(code="CD-MG", name="Centro MG", region="MG", priority=3)
+        self.products = [
+            Product.objects.create(sku=f"WH-{i}", name=f"Produto Centro {i}", price=10, stock_quantity=0)
+            for i in range(3)
+        ]
+
+        ledger = StockLedgerService()
+        for product in self.products:
+            ledger.adjust_warehouse(self.sp.id, product.id, 10)
+            ledger.adjust_warehouse(self.rj.id, product.id, 10)
+        ledger.adjust_warehouse(self.mg.id, self.products[0].id, 50)
+
+    def stock(self, warehouse, product):
+        return WarehouseStock.objects.get(warehouse=warehouse, product=product).quantity
+
+    def order(self, *quantities):
+        dto = CreateOrderDTO(customer_id=self.customer.id, items=[
+            OrderItemDTO(product_id=product.id, quantity=quantity) for product, quantity in zip(self.products, quantities)
+        ])
+        return CreateOrderService().create_order(dto)
+
+    def test_allocates_from_customer_region_and_cancel_restores_it(self):
+        order = self.order(2, 3, 1)
+
+        self.assertEqual(set(order.allocations.values_list('warehouse_id', flat=True)), {self.rj.id})
+        self.assertEqual([self.stock(self.rj, product) for product in self.products], [8, 7, 9])
+        self.assertEqual(self.stock(self.sp, self.products[0]), 10)
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock_quantity, 68)
+        self.assertEqual(
+            set(StockMovement.objects.filter(order=order).values_list('warehouse_id', 'delta')),
+            {(self.rj.id, -2), (self.rj.id, -3), (self.rj.id, -1)}
+        )
+
+        UpdateOrderStatusService().update_status(order.id, 'CANCELADO')
+        self.assertEqual([self.stock(self.rj, product) for product in self.products], [10, 10, 10])
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].stock_quantity, 70)
+
+    def test_route_overrides_region_and_large_lines_are_split(self):
+        WarehouseRoute.objects.create(region="RJ", warehouse=self.mg, rank=1)
+        self.assertEqual(warehouse_preferences.for_region("RJ"), (self.mg.id, self.rj.id, self.sp.id))
+
+        # 15 unidades do produto 1 não cabem em um centro só: SP e RJ (RJ escolhido para o produto 0)
+        order = self.order(40, 15)
+        self.assertEqual(
+            sorted(order.allocations.values_list('warehouse__code', 'product_id', 'quantity')),
+            [('CD-MG', self.products[0].id, 40), ('CD-RJ', self.products[1].id, 10), ('CD-SP', self.products[1].id, 5)]
+        )
+
+    def test_insufficient_stock_changes_nothing(self):
+        with self.assertRaisesMessage(ValueError, "Estoque insuficiente para o produto Produto Centro 1."):
+            self.order(1, 21)
+
+        self.assertEqual(self.stock(self.rj, self.products[0]), 10)
+        self.assertFalse(StockMovement.objects.filter(reason=StockMovement.Reason.ORDER).exists())
+
+    def test_conflict_retries_with_fresh_stock(self):
+        real_allocate = allocation.allocate
+        calls = []
+
+        def stale_allocate(demand, stock, preference):
+            calls.append(demand)
+            if len(calls) == 1:
+                # Outro pedido leva o saldo do RJ depois da leitura
+                WarehouseStock.objects.filter(warehouse=self.rj).update(quantity=0)
+            return real_allocate(demand, stock, preference)
+
+        with patch('orders.allocation.allocate', side_effect=stale_allocate):
+            order = self.order(1)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(order.allocations.get().quantity, 1)
+
+    def test_adjust_endpoint_moves_warehouse_stock(self):
+        url = f'/api/v1/products/{self.products[2].id}/stock/adjust/'
+        response = self.client.post(url, {"delta": -4, "warehouse": self.sp.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['stock_quantity'], response.data['warehouse_quantity']), (16, 6))
+
+        response = self.client.post(url, {"delta": -7, "warehouse": self.sp.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stock_endpoints_require_warehouse(self):
+        product = self.products[2]
+        for method, url, payload in [
+            (self.client.patch, f'/api/v1/products/{product.id}/stock/', {"stock_quantity": 50}),
+            (self.client.post, f'/api/v1/products/{product.id}/stock/adjust/', {"delta": 5}),
+        ]:
+            response = method(url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('warehouse', response.data['error'])
+
+        # Inventário de um centro: o total do produto recebe só a diferença
+        response = self.client.patch(f'/api/v1/products/{product.id}/stock/', {"stock_quantity": 4, "warehouse": self.sp.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['stock_quantity'], response.data['warehouse_quantity']), (14, 4))
+        self.assertEqual(StockLedgerService().stock_as_of(product.id), 14)
+
+
+class SeedDefaultWarehouseTestCase(TestCase):
+    def test_unassigned_stock_goes_to_default_warehouse(self):
+        products = [
+            Product.objects.create(sku=f"SEED-{i}", name=f"Produto Seed {i}", price=10, stock_quantity=quantity)
+            for i, quantity in enumerate((5, 7, 0))
+        ]
+        other = Warehouse.objects.create(code="CD-SP", name="Centro SP", region="SP")
+        WarehouseStock.objects.create(warehouse=other, product=products[1], quantity=3)
+
+        out = StringIO()
+        call_command('seed_default_warehouse', chunk_size=2, stdout=out)
+        self.assertIn('2 produtos com 9 unidades', out.getvalue())
+
+        default = Warehouse.objects.get(code='PADRAO')
+        self.assertEqual(
+            dict(WarehouseStock.objects.filter(warehouse=default).values_list('product_id', 'quantity')),
+            {products[0].id: 5, products[1].id: 4}
+        )
+
+        # Rodar de novo não atribui nada
+        call_command('seed_default_warehouse', stdout=out)
+        self.assertIn('0 produtos com 0 unidades', out.getvalue())
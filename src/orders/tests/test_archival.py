@@ -0,0 +1,55 @@
+from io import StringIO
+from datetime import timedelta
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product, Order, OrderItem, OrderStatusHistory, ArchivedOrder
+
+class ArchivalTestCase(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Cliente Arquivo",
+            cpf_cnpj="32132132132",
+            email="arquivo@teste.com"
+        )
+        self.product = Product.objects.create(sku="ARQ-1", name="Produto Arquivo", price=15.0, stock_quantity=10)
+
+        self.old_order = self._create_order(Order.Status.DELIVERED, days_ago=400)
+        self.old_pending = self._create_order(Order.Status.PENDING, days_ago=400)
+        self.recent_order = self._create_order(Order.Status.DELIVERED, days_ago=1)
+
+    def _create_order(self, order_status, days_ago):
+        order = Order.objects.create(customer=self.customer, status=order_status, total_amount=30)
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, unit_price=15, subtotal=30)
+        OrderStatusHistory.objects.create(order=order, old_status=Order.Status.SHIPPED, new_status=order_status)
+        Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return order
+
+    def test_archive_moves_only_old_final_orders(self):
+        call_command('archive_orders', months=12, chunk_size=1, stdout=StringIO())
+
+        self.assertFalse(Order.all_objects.filter(id=self.old_order.id).exists())
+        self.assertFalse(OrderItem.objects.filter(order_id=self.old_order.id).exists())
+        self.assertFalse(OrderStatusHistory.objects.filter(order_id=self.old_order.id).exists())
+
+        # Pendentes e recentes continuam nas tabelas quentes
+        self.assertTrue(Order.objects.filter(id=self.old_pending.id).exists())
+        self.assertTrue(Order.objects.filter(id=self.recent_order.id).exists())
+
+        archived = ArchivedOrder.objects.get(id=self.old_order.id)
+        self.assertEqual(len(archived.payload['items']), 1)
+        self.assertEqual(len(archived.payload['history']), 1)
+
+    def test_retrieve_falls_back_to_archive(self):
+        call_command('archive_orders', months=12, stdout=StringIO())
+
+        response = self.client.get(f'/api/v1/orders/{self.old_order.id}/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['archived'])
+        self.assertEqual(response.data['id'], self.old_order.id)
+        self.assertEqual(response.data['items'][0]['quantity'], 2)
+
+        response = self.client.get('/api/v1/orders/999999/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,55 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from orders.models import Customer, Product, Order, OrderItem, JobCheckpoint
+
+class ReconcileOrderTotalsTestCase(TransactionTestCase):
+    def setUp(self):
+        customer = Customer.objects.create(name="Cliente Jobs", cpf_cnpj="57957957957", email="jobs@teste.com")
+        product = Product.objects.create(sku="JOB-1", name="Produto Job", price=10, stock_quantity=100)
+
+        self.orders = []
+        for i in range(10):
+            order = Order.objects.create(customer=customer, total_amount=20)
+            OrderItem.objects.create(order=order, product=product, quantity=2, unit_price=10, subtotal=20)
+            self.orders.append(order)
+
+        # Divergências: total errado e pedido sem itens
+        Order.objects.filter(id__in=[self.orders[1].id, self.orders[7].id]).update(total_amount=999)
+        self.empty = Order.objects.create(customer=customer, total_amount=50)
+
+    def test_parallel_workers_fix_totals(self):
+        if connection.vendor == 'sqlite':
+            # Transações do SQLite começam como leitura: dois workers que passam a escrever se bloqueiam
+            self.skipTest('Workers escrevendo em paralelo exigem MySQL.')
+
+        out = StringIO()
+        call_command('reconcile_order_totals', workers=3, chunk_size=2, stdout=out)
+
+        self.assertIn('mismatched=3', out.getvalue())
+        self.assertEqual(set(Order.objects.values_list('total_amount', flat=True)), {Decimal('20.00'), Decimal('0.00')})
+        self.assertEqual(Order.objects.get(id=self.empty.id).total_amount, 0)
+
+        checkpoint = JobCheckpoint.objects.get(job='reconcile_order_totals')
+        self.assertIsNotNone(checkpoint.finished_at)
+        self.assertEqual(checkpoint.processed, 11)
+
+    def test_dry_run_and_resume_from_checkpoint(self):
+        call_command('reconcile_order_totals', dry_run=True, stdout=StringIO())
+        self.assertEqual(Order.objects.get(id=self.orders[1].id).total_amount, 999)
+
+        # Interrompe após 2 lotes e retoma de onde parou
+        call_command('reconcile_order_totals', restart=True, chunk_size=2, max_chunks=2, stdout=StringIO())
+        checkpoint = JobCheckpoint.objects.get(job='reconcile_order_totals')
+        self.assertIsNone(checkpoint.finished_at)
+        self.assertEqual(checkpoint.position, self.orders[3].id)
+        self.assertEqual(Order.objects.get(id=self.orders[1].id).total_amount, 20)
+        self.assertEqual(Order.objects.get(id=self.orders[7].id).total_amount, 999)
+
+        out = StringIO()
+        call_command('reconcile_order_totals', chunk_size=2, sleep_ms=1, stdout=out)
+        self.assertIn(f'Retomando reconcile_order_totals a partir do ID {self.orders[4].id}', out.getvalue())
+        self.assertEqual(Order.objects.get(id=self.orders[7].id).total_amount, 20)
+        self.assertEqual(JobCheckpoint.objects.get(job='reconcile_order_totals').processed, 11)
@@ -0,0 +1,71 @@
+import json
+from unittest.mock import patch
+import tempfile
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Product
+from orders.services import CatalogImportService
+from orders.catalog import catalog_snapshot
+
+class CatalogImportTestCase(APITestCase):
+    def setUp(self):
+        self.unchanged = Product.objects.create(sku="IMP-1", name="Sem Mudança", price=10.0, stock_quantity=5)
+        self.changed = Product.objects.create(sku="IMP-2", name="Muda Preço", price=20.0, stock_quantity=5)
+
+    def test_csv_command_diffs_by_sku(self):
+        csv_content = (
+            "sku,name,price,stock_quantity,is_active\n"
+            "IMP-1,Sem Mudança,10.00,5,true\n"
+            "IMP-2,Muda Preço,25.50,7,true\n"
+            "IMP-3,Produto Novo,3.00,100,true\n"
+            "IMP-4,Sem Preço,,1,true\n"
+            ",Sem SKU,1.00,1,true\n"
+        )
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8') as f:
+            f.write(csv_content)
+            f.flush()
+            out = StringIO()
+            call_command('import_catalog', f.name, chunk_size=2, stdout=out)
+
+        self.assertIn('1 criados, 1 atualizados, 1 sem alteração, 2 com erro', out.getvalue())
+
+        self.changed.refresh_from_db()
+        self.assertEqual(str(self.changed.price), '25.50')
+        self.assertEqual(self.changed.stock_quantity, 7)
+        self.assertTrue(Product.objects.filter(sku="IMP-3", stock_quantity=100).exists())
+        self.assertFalse(Product.objects.filter(sku="IMP-4").exists())
+
+    def test_ndjson_endpoint_with_partial_rows(self):
+        lines = [
+            {"sku": "IMP-1", "stock_quantity": 0},
+            {"sku": "IMP-5", "name": "Novo via API", "price": "9.90"},
+        ]
+        content = "\n".join(json.dumps(line) for line in lines).encode()
+        upload = SimpleUploadedFile('catalogo.ndjson', content, content_type='application/x-ndjson')
+
+        response = self.client.post('/api/v1/products/import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['updated'], 1)
+
+        # Campos ausentes na linha não são alterados
+        self.unchanged.refresh_from_db()
+        self.assertEqual(self.unchanged.stock_quantity, 0)
+        self.assertEqual(self.unchanged.name, "Sem Mudança")
+
+    def test_catalog_version_bumped_per_committed_chunk(self):
+        rows = [
+            {"sku": "IMP-1", "name": "Sem Mudança", "price": "10.00"},
+            {"sku": "IMP-2", "name": "Muda Preço", "price": "21.00"},
+            {"sku": "IMP-5", "name": "Novo", "price": "1.00"},
+        ]
+        with patch.object(catalog_snapshot, 'bump_version') as bump_version:
+            with self.captureOnCommitCallbacks(execute=True):
+                CatalogImportService(chunk_size=1).run(rows)
+
+        # Um aviso por lote com alteração; o lote sem mudança não invalida nada
+        self.assertEqual(bump_version.call_count, 2)
@@ -0,0 +1,124 @@
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django_redis.exceptions import ConnectionInterrupted
+from orders.models import Customer, Product, Order
+from orders.services import CreateOrderService
+from orders.catalog import catalog_snapshot
+from orders.pricing import pricing_engine
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+class CatalogSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Cliente Catálogo",
+            cpf_cnpj="65465465465",
+            email="catalogo@teste.com"
+        )
+        self.inactive_customer = Customer.objects.create(
+            name="Cliente Inativo",
+            cpf_cnpj="56456456456",
+            email="inativo@teste.com",
+            is_active=False
+        )
+        self.product = Product.objects.create(sku="CAT-1", name="Produto Ativo", price=10.0, stock_quantity=10)
+        self.inactive_product = Product.objects.create(
+            sku="CAT-2", name="Produto Inativo", price=10.0, stock_quantity=10, is_active=False
+        )
+        self.service = CreateOrderService()
+
+        # Aquece o snapshot
+        catalog_snapshot.invalidate()
+        self.service.create_order(self._dto(self.product.id))
+
+    def _dto(self, product_id, customer_id=None):
+        return CreateOrderDTO(
+            customer_id=customer_id or self.customer.id,
+            items=[OrderItemDTO(product_id=product_id, quantity=1)]
+        )
+
+    def test_invalid_orders_rejected_without_touching_database(self):
+        invalid_dtos = [
+            self._dto(self.inactive_product.id),
+            self._dto(999999),
+            self._dto(self.product.id, customer_id=self.inactive_customer.id),
+        ]
+
+        for dto in invalid_dtos:
+            with CaptureQueriesContext(connection) as ctx:
+                with self.assertRaises(ValueError):
+                    self.service.create_order(dto)
+
+            # Nenhum SELECT ... FOR UPDATE nem savepoint: só a consulta de versão pode recarregar o snapshot
+            self.assertFalse(any('orders_order' in q['sql'] for q in ctx.captured_queries))
+            self.assertFalse(any('SAVEPOINT' in q['sql'] for q in ctx.captured_queries))
+
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_snapshot_follows_catalog_changes(self):
+        self.inactive_product.is_active = True
+        self.inactive_product.save()
+        new_product = Product.objects.create(sku="CAT-3", name="Produto Novo", price=5.0, stock_quantity=3)
+
+        self.service.create_order(self._dto(self.inactive_product.id))
+        self.service.create_order(self._dto(new_product.id))
+
+        self.product.is_active = False
+        self.product.save()
+        with self.assertRaisesMessage(ValueError, "está inativo"):
+            self.service.create_order(self._dto(self.product.id))
+
+    def test_locked_read_skips_description(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.service.create_order(self._dto(self.product.id))
+
+        product_reads = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and 'orders_product' in q['sql']]
+        self.assertTrue(product_reads)
+        for sql in product_reads:
+            self.assertNotIn('description', sql)
+
+    def test_deleted_customer_is_not_found(self):
+        self.customer.delete()
+
+        with self.assertRaisesMessage(ValueError, "Cliente não encontrado."):
+            self.service.create_order(self._dto(self.product.id))
+
+    def test_refresh_after_change_is_incremental(self):
+        self.inactive_product.is_active = True
+        self.inactive_product.save()
+
+        with CaptureQueriesContext(connection) as ctx:
+            catalog_snapshot.pre_validate(self._dto(self.inactive_product.id))
+
+        # Só as linhas alteradas desde a última leitura são relidas
+        reads = [q['sql'] for q in ctx.captured_queries if 'orders_product' in q['sql'] or 'orders_customer' in q['sql']]
+        self.assertTrue(reads)
+        for sql in reads:
+            self.assertIn('updated_at', sql)
+
+    def test_view_rejects_before_admission(self):
+        with patch('orders.views.order_admission.admit') as admit:
+            response = self.client.post(
+                '/api/v1/orders/',
+                {'customer': self.customer.id, 'items': [{'product': self.inactive_product.id, 'quantity': 1}]},
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        admit.assert_not_called()
+
+    def test_redis_outage_keeps_serving_loaded_data(self):
+        down = ConnectionInterrupted(connection=None)
+        with patch('orders.versioned_cache.cache.get', side_effect=down), \
+                patch('orders.versioned_cache.cache.add', side_effect=down):
+            # Escrita no catálogo (bump_version) e pedido com a versão ilegível: nada sobe como erro
+            Product.objects.filter(id=self.product.id).update(name="Produto Renomeado")
+            catalog_snapshot.bump_version()
+            pricing_engine.invalidate()
+            order = self.service.create_order(self._dto(self.product.id))
+
+        self.assertEqual(order.items.count(), 1)
+        self.assertEqual(catalog_snapshot.products[self.product.id][0], "Produto Renomeado")
+        # Na volta do Redis a versão local (desconhecida) não confere e os dados são recarregados
+        self.assertIs(catalog_snapshot._version, catalog_snapshot.UNKNOWN)
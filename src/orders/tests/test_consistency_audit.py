@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from orders.models import Customer, Product, Order, StockMovement
+from orders.services import CreateOrderService, UpdateOrderStatusService, StockLedgerService
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+class ConsistencyAuditTestCase(TransactionTestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Cliente Auditoria", cpf_cnpj="68068068068", email="audit@teste.com")
+        self.products = [
+            Product.objects.create(sku=f"AUD-{i}", name=f"Produto Auditoria {i}", price=10, stock_quantity=50)
+            for i in range(4)
+        ]
+        StockLedgerService().record([
+            StockMovement(product=product, delta=50, reason=StockMovement.Reason.INITIAL) for product in self.products
+        ])
+
+        service = CreateOrderService()
+        self.orders = [
+            service.create_order(CreateOrderDTO(customer_id=self.customer.id, items=[
+                OrderItemDTO(product_id=self.products[i % 4].id, quantity=2),
+                OrderItemDTO(product_id=self.products[(i + 1) % 4].id, quantity=1),
+            ]))
+            for i in range(6)
+        ]
+        UpdateOrderStatusService().update_status(self.orders[2].id, 'CANCELADO')
+
+    def audit(self, **options):
+        out, err = StringIO(), StringIO()
+        call_command('audit_consistency', chunk_size=2, stdout=out, stderr=err, **options)
+        return [json.loads(line) for line in out.getvalue().splitlines()], err.getvalue()
+
+    def test_consistent_database_reports_nothing(self):
+        records, progress = self.audit(workers=2)
+        self.assertEqual(records, [])
+        self.assertIn('audit_consistency:product_stock concluído', progress)
+
+    def test_reports_mismatches_as_ndjson(self):
+        Order.objects.filter(id=self.orders[1].id).update(total_amount=Decimal('1.00'))
+        Product.objects.filter(id=self.products[3].id).update(stock_quantity=7)
+        StockMovement.objects.filter(order=self.orders[4]).delete()
+
+        records, _ = self.audit()
+
+        by_check = {}
+        for record in records:
+            by_check.setdefault(record['check'], []).append(record)
+
+        self.assertEqual(by_check['order_totals'], [{
+            'check': 'order_totals', 'id': self.orders[1].id, 'actual': '1.00', 'expected': '30.00', 'repaired': False
+        }])
+        [ledger] = by_check['order_ledger']
+        self.assertEqual((ledger['id'], ledger['actual'], ledger['expected']), (self.orders[4].id, 0, -3))
+
+        # Os movimentos apagados também descasam o estoque dos dois produtos do pedido
+        self.assertEqual(
+            [(record['id'], record['actual'] - record['expected']) for record in by_check['product_stock']],
+            [(self.products[0].id, -2), (self.products[1].id, -1), (self.products[3].id, 7 - 48)]
+        )
+
+    def test_repair_fixes_totals_and_completes_ledger(self):
+        Order.objects.filter(id=self.orders[0].id).update(total_amount=0)
+        Product.objects.filter(id=self.products[0].id).update(stock_quantity=40)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'audit.ndjson')
+            call_command(
+                'audit_consistency', check=['order_totals', 'product_stock'], repair=True,
+                output=path, stdout=StringIO()
+            )
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual({(record['check'], record['repaired']) for record in records}, {('order_totals', True), ('product_stock', True)})
+        self.assertEqual(Order.objects.get(id=self.orders[0].id).total_amount, Decimal('30.00'))
+
+        # A coluna fica como estava; o ledger recebe o ajuste que faltava
+        movement = StockMovement.objects.filter(product=self.products[0]).latest('id')
+        self.assertEqual(movement.reason, StockMovement.Reason.MANUAL)
+        self.assertEqual(Product.objects.get(id=self.products[0].id).stock_quantity, 40)
+
+        records, _ = self.audit()
+        self.assertEqual(records, [])
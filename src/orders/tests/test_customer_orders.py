@@ -0,0 +1,103 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product, Order, OrderItem
+
+class CustomerOrdersTestCase(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Cliente Histórico",
+            cpf_cnpj="78978978978",
+            email="historico@teste.com"
+        )
+        self.other = Customer.objects.create(
+            name="Outro Cliente",
+            cpf_cnpj="87687687687",
+            email="outro@teste.com"
+        )
+        self.product = Product.objects.create(sku="HIST-1", name="Produto Histórico", price=5.0, stock_quantity=10)
+
+        for i in range(5):
+            order = Order.objects.create(
+                customer=self.customer,
+                status=Order.Status.DELIVERED if i % 2 else Order.Status.PENDING
+            )
+            OrderItem.objects.create(order=order, product=self.product, quantity=1, unit_price=5, subtotal=5)
+            Order.objects.filter(id=order.id).update(created_at=timezone.now() - timedelta(days=i * 10))
+        Order.objects.create(customer=self.other)
+
+        self.url = f'/api/v1/customers/{self.customer.id}/orders/'
+
+    def test_cursor_pagination_without_count(self):
+        # Cliente (404/tenant) + select dos pedidos, sem COUNT
+        with self.assertNumQueries(2) as ctx:
+            response = self.client.get(self.url, {'page_size': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('COUNT(', ctx.captured_queries[-1]['sql'].upper())
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        # Percorre todas as páginas pelo cursor
+        seen = [order['id'] for order in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [order['id'] for order in response.data['results']]
+            next_url = response.data['next']
+
+        expected = list(
+            Order.objects.filter(customer=self.customer)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_keyset_breaks_timestamp_ties_by_id(self):
+        # Pedidos com o mesmo created_at não podem ser repetidos nem pulados entre páginas
+        tied_at = timezone.now() - timedelta(days=100)
+        for _ in range(3):
+            order = Order.objects.create(customer=self.customer)
+            Order.objects.filter(id=order.id).update(created_at=tied_at)
+
+        seen = []
+        next_url = f'{self.url}?page_size=2'
+        while next_url:
+            response = self.client.get(next_url)
+            seen += [order['id'] for order in response.data['results']]
+            next_url = response.data['next']
+
+        expected = list(
+            Order.objects.filter(customer=self.customer)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'lixo'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_or_malformed_customer_is_404(self):
+        for customer_id in ('abc', '999999'):
+            response = self.client.get(f'/api/v1/customers/{customer_id}/orders/')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_status_and_date_filters(self):
+        response = self.client.get(self.url, {'status': Order.Status.DELIVERED})
+        self.assertEqual(len(response.data['results']), 2)
+
+        created_after = (timezone.now() - timedelta(days=15)).isoformat()
+        response = self.client.get(self.url, {'created_after': created_after})
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.get(self.url, {'created_after': 'data-invalida'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expand_items_is_prefetched(self):
+        # Pedidos + itens em uma única consulta extra, independente da quantidade de pedidos
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'expand': 'items'})
+
+        self.assertEqual(len(response.data['results'][0]['items']), 1)
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from unittest.mock import patch
+import fakeredis
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from orders.models import Customer, Order
+from orders.services import UpdateOrderStatusService
+from orders.events import EVENTS_STREAM, broadcaster, publish_event, stream_events
+from orders.tenancy import tenant_registry
+
+TENANT_ID = 1
+
+class FakeRedisMixin:
+    def setUp(self):
+        super().setUp()
+        server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=server)
+        patches = [
+            patch('orders.redis_client.get_redis_client', return_value=self.redis),
+            patch('orders.redis_client.get_async_redis_client', side_effect=lambda: fakeredis.aioredis.FakeRedis(server=server)),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+def event(order_id, customer_id, new_status):
+    return {
+        "event": "order.status_changed",
+        "tenant_id": TENANT_ID,
+        "order_id": order_id,
+        "customer_id": customer_id,
+        "old_status": "PENDENTE",
+        "new_status": new_status,
+        "timestamp": "2026-01-01T00:00:00+00:00"
+    }
+
+def parse_sse(message):
+    fields = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+    return fields['id'], json.loads(fields['data'])
+
+class OrderEventsPublishTestCase(FakeRedisMixin, TestCase):
+    def test_status_change_is_published_after_commit(self):
+        customer = Customer.objects.create(name="Cliente SSE", cpf_cnpj="97397397397", email="sse@teste.com")
+        order = Order.objects.create(customer=customer)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UpdateOrderStatusService().update_status(order.id, 'CONFIRMADO')
+
+        entries = self.redis.xrange(EVENTS_STREAM)
+        self.assertEqual(len(entries), 1)
+        payload = json.loads(entries[0][1][b'data'])
+        self.assertEqual(payload['event'], 'order.status_changed')
+        self.assertEqual(payload['customer_id'], customer.id)
+        self.assertEqual(payload['new_status'], 'CONFIRMADO')
+
+class OrderEventsStreamTestCase(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        # Sem banco: o TenantMiddleware resolve o tenant padrão pelo registro
+        patcher = patch.object(tenant_registry, 'default_id', return_value=TENANT_ID)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_replay_then_live_with_filters(self):
+        first_id = publish_event(event(1, 10, 'CONFIRMADO'))
+        publish_event(event(2, 20, 'CONFIRMADO'))
+        replayed_id = publish_event(event(3, 10, 'CANCELADO'))
+
+        async def scenario():
+            stream = stream_events(last_event_id=first_id, filters={'customer': '10'})
+            replayed = await stream.__anext__()
+
+            # Evento de outro cliente é filtrado; o seguinte chega ao vivo
+            publish_event(event(4, 20, 'CONFIRMADO'))
+            live_id = publish_event(event(5, 10, 'ENVIADO'))
+            live = await asyncio.wait_for(stream.__anext__(), timeout=5)
+
+            await stream.aclose()
+            await asyncio.wait_for(broadcaster.wait_closed(), timeout=5)
+            return replayed, live, live_id
+
+        replayed, live, live_id = async_to_sync(scenario)()
+
+        self.assertEqual(parse_sse(replayed), (replayed_id, event(3, 10, 'CANCELADO')))
+        self.assertEqual(parse_sse(live), (live_id, event(5, 10, 'ENVIADO')))
+
+    def test_sse_endpoint_resumes_from_last_event_id(self):
+        first_id = publish_event(event(1, 10, 'CONFIRMADO'))
+        second_id = publish_event(event(1, 10, 'SEPARADO'))
+
+        async def scenario():
+            response = await AsyncClient().get('/api/v1/orders/events/', headers={'Last-Event-ID': first_id})
+            first_chunk = await response.streaming_content.__anext__()
+
+            # Encerrar a resposta (cliente desconectou) libera o ouvinte
+            response.close()
+            await asyncio.wait_for(broadcaster.wait_closed(), timeout=5)
+            return response, first_chunk
+
+        response, first_chunk = async_to_sync(scenario)()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(parse_sse(first_chunk.decode())[0], second_id)
+
+    def test_invalid_last_event_id_is_rejected_up_front(self):
+        async def scenario():
+            return await AsyncClient().get('/api/v1/orders/events/', headers={'Last-Event-ID': 'abc'})
+
+        response = async_to_sync(scenario)()
+        self.assertEqual(response.status_code, 400)
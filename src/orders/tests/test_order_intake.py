@@ -0,0 +1,141 @@
+import os
+import signal
+from io import StringIO
+from unittest.mock import patch
+import fakeredis
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from orders.models import Customer, Product, Order
+from orders import intake
+
+class OrderIntakeTestCase(TransactionTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch('orders.redis_client.get_redis_client', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+        self.client = APIClient()
+        self.customer = Customer.objects.create(name="Cliente Fila", cpf_cnpj="46846846846", email="fila@teste.com")
+        self.products = [
+            Product.objects.create(sku=f"FILA-{i}", name=f"Produto Fila {i}", price=10, stock_quantity=5)
+            for i in range(4)
+        ]
+
+    def _post(self, product_ids, quantity=1, key=None):
+        headers = {'HTTP_PREFER': 'respond-async'}
+        if key:
+            headers['HTTP_IDEMPOTENCY_KEY'] = key
+        return self.client.post('/api/v1/orders/', {
+            'customer': self.customer.id,
+            'items': [{'product': product_id, 'quantity': quantity} for product_id in product_ids]
+        }, format='json', **headers)
+
+    def test_enqueue_returns_202_and_workers_create_orders(self):
+        if connection.vendor == 'sqlite':
+            # Transações do SQLite começam como leitura: dois workers que passam a escrever se bloqueiam
+            self.skipTest('Workers escrevendo em paralelo exigem MySQL.')
+
+        a, b, c, d = [product.id for product in self.products]
+        payloads = [[a, b], [b], [c], [d], [c, d], [a]]
+        tickets = []
+        for product_ids in payloads:
+            response = self._post(product_ids)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            tickets.append(response.data['ticket'])
+
+        # Estoque insuficiente: rejeitado pelo serviço dentro do worker
+        tickets.append(self._post([a], quantity=50).data['ticket'])
+
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(self.client.get(f'/api/v1/orders/intake/{tickets[0]}/').data['status'], intake.QUEUED)
+
+        out = StringIO()
+        call_command('consume_order_intake', workers=2, once=True, stdout=out)
+        self.assertIn('7 pedidos processados em 2 grupos', out.getvalue())
+
+        results = [self.client.get(f'/api/v1/orders/intake/{ticket}/').data for ticket in tickets]
+        self.assertEqual([r['status'] for r in results], [intake.CREATED] * 6 + [intake.REJECTED])
+        self.assertEqual(Order.objects.count(), 6)
+        self.assertEqual(results[0]['order']['id'], Order.objects.order_by('id').filter(items__product_id=b).first().id)
+        self.assertEqual(self.redis.llen(intake.QUEUE_KEY), 0)
+
+    def test_idempotency_key_is_the_ticket(self):
+        first = self._post([self.products[0].id], key='chave-fila-1')
+        again = self._post([self.products[0].id], key='chave-fila-1')
+        self.assertEqual(first.data['ticket'], 'chave-fila-1')
+        self.assertEqual(again.data['ticket'], 'chave-fila-1')
+        self.assertEqual(self.redis.llen(intake.QUEUE_KEY), 1)
+
+        call_command('consume_order_intake', workers=1, once=True, stdout=StringIO())
+
+        # Retry síncrono com a mesma chave recebe o pedido criado pela fila
+        response = self.client.post('/api/v1/orders/', {
+            'customer': self.customer.id, 'items': [{'product': self.products[0].id, 'quantity': 1}]
+        }, format='json', HTTP_IDEMPOTENCY_KEY='chave-fila-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_invalid_shape_rejected_before_queue(self):
+        response = self.client.post('/api/v1/orders/', {'customer': self.customer.id, 'items': [{'product': 1}]},
+                                    format='json', HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.redis.llen(intake.QUEUE_KEY), 0)
+
+    def test_unacknowledged_batch_is_requeued(self):
+        self._post([self.products[0].id])
+        intake.claim('consumidor-1', 10)
+        self.assertEqual(self.redis.llen(intake.QUEUE_KEY), 0)
+
+        call_command('consume_order_intake', consumer='consumidor-1', workers=1, once=True, stdout=StringIO())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_crash_between_commit_and_ack_does_not_duplicate(self):
+        tickets = [self._post([product.id], quantity=2).data['ticket'] for product in self.products[:2]]
+
+        # Consumidor morre depois do commit dos pedidos, antes de gravar os resultados e esvaziar o processamento
+        with patch('orders.intake.acknowledge', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                call_command('consume_order_intake', consumer='consumidor-x', workers=1, once=True, stdout=StringIO())
+        self.assertEqual(Order.objects.count(), 2)
+
+        # Reinício com o mesmo nome devolve o lote à fila; os tickets já gravados não criam outro pedido
+        call_command('consume_order_intake', consumer='consumidor-x', workers=1, once=True, stdout=StringIO())
+
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual([p.stock_quantity for p in Product.objects.filter(id__in=[p.id for p in self.products[:2]])], [3, 3])
+        results = [self.client.get(f'/api/v1/orders/intake/{ticket}/').data for ticket in tickets]
+        self.assertEqual([r['status'] for r in results], [intake.CREATED] * 2)
+        self.assertEqual(sorted(r['order']['id'] for r in results), list(Order.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_sigterm_finishes_current_batch(self):
+        for product in self.products[:2]:
+            self._post([product.id])
+        process_group = intake.process_group
+
+        def terminated_mid_batch(entries):
+            os.kill(os.getpid(), signal.SIGTERM)
+            return process_group(entries)
+
+        out = StringIO()
+        with patch('orders.intake.process_group', side_effect=terminated_mid_batch):
+            call_command('consume_order_intake', consumer='consumidor-y', workers=1, batch_size=1, stdout=out)
+
+        # O lote em andamento é concluído e confirmado; o resto fica na fila para o próximo consumidor
+        self.assertIn('Encerrado por SIGTERM: 1 pedidos processados', out.getvalue())
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.redis.llen(intake.QUEUE_KEY), 1)
+        self.assertEqual(self.redis.llen(intake.PROCESSING_KEY % {'consumer': 'consumidor-y'}), 0)
+
+    def test_group_by_overlapping_products(self):
+        entries = [
+            {'ticket': str(i), 'order': {'customer_id': 1, 'items': [[p, 1] for p in products]}}
+            for i, products in enumerate([[1, 2], [3], [2, 4], [5], [4]])
+        ]
+        groups = intake.group_by_overlap(entries)
+        self.assertEqual([[e['ticket'] for e in group] for group in groups], [['0', '2', '4'], ['1'], ['3']])
@@ -0,0 +1,66 @@
+from io import StringIO
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product, Order, OrderItem
+from orders.services import CreateOrderService, UpdateOrderStatusService
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+class OrderSummaryTestCase(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Cliente Resumo",
+            cpf_cnpj="44455566677",
+            email="resumo@teste.com"
+        )
+        self.product_1 = Product.objects.create(sku="RES-1", name="Produto 1", price=10.0, stock_quantity=10)
+        self.product_2 = Product.objects.create(sku="RES-2", name="Produto 2", price=20.0, stock_quantity=10)
+
+    def test_services_keep_summary_columns(self):
+        """
+        O pedido criado já nasce com o resumo preenchido e a mudança de status atualiza a data.
+        """
+        dto = CreateOrderDTO(
+            customer_id=self.customer.id,
+            items=[
+                OrderItemDTO(product_id=self.product_1.id, quantity=2),
+                OrderItemDTO(product_id=self.product_2.id, quantity=3),
+            ]
+        )
+        order = CreateOrderService().create_order(dto)
+
+        self.assertEqual(order.item_count, 2)
+        self.assertEqual(order.total_quantity, 5)
+        self.assertIsNotNone(order.last_status_change_at)
+
+        created_change = order.last_status_change_at
+        order = UpdateOrderStatusService().update_status(order.id, Order.Status.CONFIRMED)
+        self.assertGreaterEqual(order.last_status_change_at, created_change)
+
+    def test_customer_orders_reads_only_order_table(self):
+        """
+        O histórico do cliente não deve fazer join com itens nem produtos.
+        """
+        Order.objects.create(customer=self.customer, item_count=3, total_quantity=7)
+
+        # Paginação por cursor: o cliente e o select dos pedidos
+        with self.assertNumQueries(2) as ctx:
+            response = self.client.get(f'/api/v1/customers/{self.customer.id}/orders/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['item_count'], 3)
+        self.assertEqual(response.data['results'][0]['total_quantity'], 7)
+        for query in ctx.captured_queries:
+            self.assertNotIn('orders_orderitem', query['sql'])
+
+    def test_backfill_command(self):
+        order = Order.objects.create(customer=self.customer)
+        OrderItem.objects.create(order=order, product=self.product_1, quantity=4, unit_price=10, subtotal=40)
+        OrderItem.objects.create(order=order, product=self.product_2, quantity=1, unit_price=20, subtotal=20)
+
+        call_command('backfill_order_summary', chunk_size=1, stdout=StringIO())
+
+        order.refresh_from_db()
+        self.assertEqual(order.item_count, 2)
+        self.assertEqual(order.total_quantity, 5)
+        self.assertEqual(order.last_status_change_at, order.created_at)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product, PriceList, PriceRule
+from orders.services import CreateOrderService
+from orders.pricing import pricing_engine
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+class PricingTestCase(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Cliente Tabela", cpf_cnpj="13513513513", email="tabela@teste.com")
+        self.other = Customer.objects.create(name="Cliente Balcão", cpf_cnpj="31531531531", email="balcao@teste.com")
+        self.product = Product.objects.create(sku="PRC-1", name="Produto Tabela", price="10.05", stock_quantity=1000)
+        self.plain = Product.objects.create(sku="PRC-2", name="Sem Regra", price="3.00", stock_quantity=1000)
+
+        negotiated = PriceList.objects.create(name="Contrato", customer=self.customer)
+        PriceRule.objects.create(price_list=negotiated, product=self.product, min_quantity=1, unit_price="9.50")
+        PriceRule.objects.create(price_list=negotiated, product=self.product, min_quantity=100, unit_price="8.00")
+
+        promotion = PriceList.objects.create(
+            name="Promoção", starts_at=timezone.now() - timedelta(days=1), ends_at=timezone.now() + timedelta(days=1)
+        )
+        PriceRule.objects.create(price_list=promotion, product=self.product, min_quantity=10, discount_percent="15")
+
+    def _create(self, customer, *lines):
+        dto = CreateOrderDTO(
+            customer_id=customer.id,
+            items=[OrderItemDTO(product_id=product.id, quantity=quantity) for product, quantity in lines]
+        )
+        return CreateOrderService().create_order(dto)
+
+    def test_best_applicable_price_per_line(self):
+        order = self._create(self.customer, (self.product, 2), (self.plain, 1))
+        prices = {item.product_id: item.unit_price for item in order.items.all()}
+        self.assertEqual(prices[self.product.id], Decimal('9.50'))
+        self.assertEqual(prices[self.plain.id], Decimal('3.00'))
+        self.assertEqual(order.total_amount, Decimal('22.00'))
+
+        # Faixa de volume do contrato vence a promoção geral
+        order = self._create(self.customer, (self.product, 100))
+        self.assertEqual(order.items.get().unit_price, Decimal('8.00'))
+        self.assertEqual(order.total_amount, Decimal('800.00'))
+
+    def test_promotion_rounds_half_up_to_cents(self):
+        # 10.05 * 0.85 = 8.5425 -> 8.54
+        order = self._create(self.other, (self.product, 10))
+        self.assertEqual(order.items.get().unit_price, Decimal('8.54'))
+        self.assertEqual(order.total_amount, Decimal('85.40'))
+
+        # Abaixo da faixa: preço de cadastro
+        order = self._create(self.other, (self.product, 9))
+        self.assertEqual(order.items.get().unit_price, Decimal('10.05'))
+
+    def test_rules_recompiled_on_change_and_priced_without_queries(self):
+        PriceList.objects.filter(name="Promoção").update(is_active=False)
+        PriceList.objects.get(name="Contrato").save()
+
+        lines = [(self.product.id, 10, Decimal("10.05"))]
+        pricing_engine.price(self.other.id, lines)
+        with self.assertNumQueries(0):
+            priced = pricing_engine.price(self.other.id, lines)
+        self.assertEqual(priced.total, Decimal('100.50'))
+
+    def test_rule_requires_price_or_discount(self):
+        price_list = PriceList.objects.get(name="Contrato")
+        response = self.client.post('/api/v1/price-rules/', {
+            "price_list": price_list.id, "product": self.plain.id, "min_quantity": 1,
+            "unit_price": "1.00", "discount_percent": "5"
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/v1/price-rules/', {
+            "price_list": price_list.id, "product": self.plain.id, "min_quantity": 1, "unit_price": "2.50"
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        order = self._create(self.customer, (self.plain, 2))
+        self.assertEqual(order.total_amount, Decimal('5.00'))
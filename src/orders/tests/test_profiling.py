@@ -0,0 +1,117 @@
+import threading
+import time
+from unittest.mock import patch
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django_redis.exceptions import ConnectionInterrupted
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product
+from orders.profiling import Profile, profiling_config, sampler, span, _NOOP_SPAN
+from orders.tests.test_throttling import RedisTestMixin
+
+class ProfilingEndpointTestCase(RedisTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        profiling_config.invalidate()
+        self.addCleanup(profiling_config.invalidate)
+        self.addCleanup(cache.delete, profiling_config.CACHE_KEY)
+
+        self.admin = User.objects.create_user('admin', password='x', is_staff=True)
+        customer = Customer.objects.create(name="Cliente Perfil", cpf_cnpj="98798798798", email="perfil@teste.com")
+        product = Product.objects.create(sku="PRF-1", name="Produto Perfil", price=10, stock_quantity=10)
+        self.payload = {"customer": customer.id, "items": [{"product": product.id, "quantity": 1}]}
+
+    def enable(self, **config):
+        self.client.force_authenticate(self.admin)
+        response = self.client.put('/api/v1/profiling/config/', {'enabled': True, **config}, format='json')
+        self.client.force_authenticate(None)
+        return response
+
+    def test_toggle_is_admin_only(self):
+        response = self.client.put('/api/v1/profiling/config/', {'enabled': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.enable(duration_seconds=10**6)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('duration_seconds', response.data)
+
+    def test_disabled_profiler_is_a_noop(self):
+        response = self.client.post('/api/v1/orders/', self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertIs(span('validate'), _NOOP_SPAN)
+
+    def test_sampled_request_records_service_spans(self):
+        self.assertEqual(self.enable(sample_rate=1.0, paths=['/api/v1/orders/']).status_code, status.HTTP_200_OK)
+
+        # Fora das rotas selecionadas não amostra
+        self.assertNotIn('X-Profile-Id', self.client.get('/api/v1/products/').headers)
+
+        response = self.client.post('/api/v1/orders/', self.payload, format='json', HTTP_IDEMPOTENCY_KEY='perfil-1')
+        profile_id = response.headers['X-Profile-Id']
+
+        self.client.force_authenticate(self.admin)
+        profiles = self.client.get('/api/v1/profiling/').data
+        self.assertEqual([p['id'] for p in profiles], [profile_id])
+        self.assertEqual(profiles[0]['status_code'], status.HTTP_201_CREATED)
+
+        spans = [s['name'] for s in profiles[0]['spans']]
+        for phase in ('create_order', 'validate', 'lock', 'write', 'serialize', 'cache'):
+            self.assertIn(phase, spans)
+        # Fases do service aninhadas no span do método
+        self.assertEqual({s['depth'] for s in profiles[0]['spans'] if s['name'] == 'lock'}, {1})
+
+        folded = self.client.get(f'/api/v1/profiling/{profile_id}/')
+        self.assertEqual(folded.status_code, status.HTTP_200_OK)
+        self.assertTrue(folded['Content-Type'].startswith('text/plain'))
+
+    def test_redis_outage_disables_profiler_without_failing_requests(self):
+        with patch('orders.profiling.cache.get', side_effect=ConnectionInterrupted(connection=None)) as cache_get:
+            self.assertEqual(self.client.get('/api/v1/health/').status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get('/api/v1/health/').status_code, status.HTTP_200_OK)
+
+        # Uma consulta por CHECK_INTERVAL, não uma por requisição
+        self.assertEqual(cache_get.call_count, 1)
+
+    def test_unwritable_output_dir_keeps_the_response(self):
+        self.enable(sample_rate=1.0)
+        profiling = {**settings.PROFILING, 'OUTPUT_DIR': '/caminho/inexistente'}
+        with override_settings(PROFILING=profiling):
+            response = self.client.post('/api/v1/orders/', self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('X-Profile-Id', response.headers)
+
+
+class StackSamplerTestCase(SimpleTestCase):
+    def test_samples_are_collapsed_stacks_of_the_profiled_thread(self):
+        profile = Profile('GET', '/teste/')
+
+        def busy_phase():
+            deadline = time.perf_counter() + 0.1
+            while time.perf_counter() < deadline:
+                pass
+
+        def run():
+            profile.thread_id = threading.get_ident()
+            profile.open_spans.append('write')
+            sampler.start(profile, 0.001)
+            try:
+                busy_phase()
+            finally:
+                sampler.stop(profile)
+
+        worker = threading.Thread(target=run)
+        worker.start()
+        worker.join()
+
+        self.assertTrue(profile.stacks)
+        stack, count = profile.folded().splitlines()[0].rsplit(' ', 1)
+        self.assertTrue(stack.startswith('span:write;'))
+        self.assertIn('busy_phase', stack)
+        self.assertGreater(int(count), 0)
@@ -0,0 +1,323 @@
+import difflib
+import inspect
+import io
+import json
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from orders import services
+from orders.catalog import catalog_snapshot
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+from orders.models import Customer, Product, PriceList, PriceRule, StockMovement, Warehouse
+from orders.pricing import pricing_engine
+from orders.services import (
+    StockLedgerService, CreateOrderService, UpdateOrderStatusService, ArchiveOrdersService, CatalogImportService,
+    StatusTimingService
+)
+from orders.tenancy import tenant_registry
+from orders.tests.test_throttling import RedisTestMixin
+
+SNAPSHOT_DIR = Path(__file__).parent / 'query_snapshots'
+
+# Rotas sem snapshot: sem acesso ao banco ou fora do ciclo request/response do cliente de teste
+UNSNAPSHOTTED_ROUTES = {'order-events', 'schema', 'swagger-ui'}
+
+# Amostragem do controle de admissão (só MySQL, a cada LOCK_WAIT_SAMPLE_INTERVAL): não é do endpoint
+IGNORED_QUERIES = re.compile(r'^SHOW ', re.IGNORECASE)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+VALUES_ROWS = re.compile(r'VALUES\s*\([^()]*\)(?:\s*,\s*\([^()]*\))*')
+SAVEPOINT_NAME = re.compile(r'\bs\d+_x\d+\b')
+
+
+def updating_snapshots() -> bool:
+    return os.environ.get('UPDATE_QUERY_SNAPSHOTS') == '1'
+
+
+def fingerprint(sql: str) -> str:
+    """
+    SQL normalizado: literais viram ?, listas (IN, VALUES) viram (...), espaços são colapsados.
+    IDs, datas e nomes de savepoint mudam a cada execução; a forma da query, não.
+    """
+    sql = SAVEPOINT_NAME.sub('savepoint', sql)
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = VALUES_ROWS.sub('VALUES (...)', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+def explain(sql: str) -> list:
+    """Plano no MySQL, linha a linha: tabela, tipo de acesso (ALL = full scan) e índice usado."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}')
+        columns = [column[0] for column in cursor.description]
+        return [
+            f"{row['table']}: {row['type']} ({row['key'] or 'sem índice'})"
+            for row in (dict(zip(columns, values)) for values in cursor.fetchall())
+        ]
+
+
+class QuerySnapshotMixin:
+    """
+    Compara as queries de um cenário com o snapshot versionado em query_snapshots/<banco>/<nome>.json:
+    quantidade e SQL normalizado de cada query, e no MySQL (QUERY_SNAPSHOT_EXPLAIN=1) o plano de cada SELECT.
+    UPDATE_QUERY_SNAPSHOTS=1 regrava os snapshots em vez de comparar.
+    """
+    def warm_caches(self):
+        # Caches em memória por processo: carregados antes da medição para a contagem não depender
+        # da ordem dos testes (um recarregamento no meio do cenário somaria queries)
+        tenant_registry.invalidate()
+        tenant_registry.default_id()
+        catalog_snapshot.invalidate()
+        catalog_snapshot._refresh(force_check=True)
+        pricing_engine.invalidate()
+        pricing_engine._refresh()
+
+    def assertQuerySnapshot(self, name, scenario):
+        vendor_dir = SNAPSHOT_DIR / connection.vendor
+        updating = updating_snapshots()
+        with_explain = connection.vendor == 'mysql' and os.environ.get('QUERY_SNAPSHOT_EXPLAIN') == '1'
+        if not vendor_dir.is_dir() and not updating:
+            self.skipTest(f'Sem snapshots de queries para {connection.vendor}.')
+
+        self.warm_caches()
+        with CaptureQueriesContext(connection) as captured:
+            result = scenario()
+
+        executed = [query['sql'] for query in captured.captured_queries if not IGNORED_QUERIES.match(query['sql'])]
+        current = {'count': len(executed), 'queries': [fingerprint(sql) for sql in executed]}
+        if with_explain:
+            current['explain'] = {
+                str(index): explain(sql) for index, sql in enumerate(executed) if sql.lstrip().upper().startswith('SELECT')
+            }
+
+        path = vendor_dir / f'{name}.json'
+        if updating:
+            vendor_dir.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(current, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+            return result
+
+        if not path.exists():
+            self.fail(f'Snapshot de queries {path.name} inexistente: gere com UPDATE_QUERY_SNAPSHOTS=1.')
+
+        expected = json.loads(path.read_text(encoding='utf-8'))
+        if not with_explain:
+            expected.pop('explain', None)
+        if current != expected:
+            self.fail(self._describe_regression(name, expected, current))
+        return result
+
+    def _describe_regression(self, name, expected, current):
+        def lines(snapshot):
+            rendered = [f"count: {snapshot['count']}"] + [f'[{i}] {sql}' for i, sql in enumerate(snapshot['queries'])]
+            for index, plan in snapshot.get('explain', {}).items():
+                rendered += [f'explain [{index}] {row}' for row in plan]
+            return rendered
+
+        diff = '\n'.join(difflib.unified_diff(lines(expected), lines(current), 'snapshot', 'atual', lineterm=''))
+        return (
+            f"Queries de '{name}' mudaram ({connection.vendor}): {expected['count']} -> {current['count']}.\n"
+            f"Se a mudança é intencional, regrave com UPDATE_QUERY_SNAPSHOTS=1.\n{diff}"
+        )
+
+
+class SnapshotFixturesMixin:
+    def create_fixtures(self):
+        ledger = StockLedgerService()
+        self.customer = Customer.objects.create(name="Cliente Snapshot", cpf_cnpj="31431431431", email="snap@teste.com")
+        self.products = []
+        for i in range(3):
+            product = Product.objects.create(sku=f"SNAP-{i}", name=f"Produto Snapshot {i}", price=10, stock_quantity=0)
+            ledger.adjust(product.id, 100, reason=StockMovement.Reason.INITIAL)
+            self.products.append(product)
+
+        price_list = PriceList.objects.create(name="Tabela Snapshot", customer=self.customer)
+        PriceRule.objects.create(price_list=price_list, product=self.products[0], min_quantity=1, discount_percent=10)
+        self.price_list = price_list
+
+        self.warehouse = Warehouse.objects.create(code="CD-SNAP", name="Centro Snapshot", region="SP")
+        ledger.adjust_warehouse(self.warehouse.id, self.products[0].id, 10)
+
+        self.order = CreateOrderService().create_order(self.order_dto())
+        UpdateOrderStatusService().update_status(self.order.id, 'CONFIRMADO')
+
+    def order_dto(self):
+        return CreateOrderDTO(customer_id=self.customer.id, items=[
+            OrderItemDTO(product_id=self.products[0].id, quantity=2),
+            OrderItemDTO(product_id=self.products[1].id, quantity=1),
+        ])
+
+
+class EndpointQuerySnapshotTestCase(QuerySnapshotMixin, SnapshotFixturesMixin, RedisTestMixin, APITestCase):
+    """
+    Um snapshot por rota de orders/urls.py e método. Nomes: '<nome da rota>.<método>[.<variante>]'.
+    """
+    def setUp(self):
+        super().setUp()
+        self.create_fixtures()
+
+    def request(self, name, method, url, data=None, expected_status=200):
+        def scenario():
+            return getattr(self.client, method.lower())(url, data, format='json')
+
+        response = self.assertQuerySnapshot(f'{name}.{method}', scenario)
+        self.assertEqual(response.status_code, expected_status, getattr(response, 'data', None))
+        return response
+
+    def test_root_and_health(self):
+        self.request('api-root', 'GET', '/api/v1/')
+        self.request('health_check', 'GET', '/api/v1/health/')
+
+    def test_customers(self):
+        self.request('customer-list', 'GET', '/api/v1/customers/')
+        self.request('customer-list', 'POST', '/api/v1/customers/', {
+            "name": "Cliente Novo", "cpf_cnpj": "42042042042", "email": "novo@teste.com",
+            "phone": "11999999999", "address": "Rua Snapshot, 1"
+        }, expected_status=201)
+        self.request('customer-detail', 'GET', f'/api/v1/customers/{self.customer.id}/')
+        self.request('customer-detail', 'PATCH', f'/api/v1/customers/{self.customer.id}/', {"name": "Cliente Renomeado"})
+        self.request('customer-orders', 'GET', f'/api/v1/customers/{self.customer.id}/orders/')
+
+        response = self.assertQuerySnapshot('customer-orders.GET.expand', lambda: self.client.get(
+            f'/api/v1/customers/{self.customer.id}/orders/', {'expand': 'items'}
+        ))
+        self.assertEqual(response.status_code, 200)
+
+    def test_products(self):
+        product = self.products[2]
+        self.request('product-list', 'GET', '/api/v1/products/')
+        self.request('product-list', 'POST', '/api/v1/products/', {
+            "sku": "SNAP-NOVO", "name": "Produto Novo", "price": "5.00", "stock_quantity": 3
+        }, expected_status=201)
+        self.request('product-detail', 'GET', f'/api/v1/products/{product.id}/')
+        self.request('product-detail', 'PATCH', f'/api/v1/products/{product.id}/', {"price": "12.00"})
+        self.request('product-update-stock', 'PATCH', f'/api/v1/products/{product.id}/stock/', {"stock_quantity": 90})
+        self.request('product-adjust-stock', 'POST', f'/api/v1/products/{product.id}/stock/adjust/', {"delta": -5})
+        self.request('product-stock-ledger', 'GET', f'/api/v1/products/{product.id}/stock/ledger/')
+
+    def test_product_import(self):
+        upload = io.BytesIO(b"sku,name,price,stock_quantity\nSNAP-0,Produto Snapshot 0,11.00,100\nSNAP-IMP,Importado,3.00,7\n")
+        upload.name = 'catalogo.csv'
+
+        response = self.assertQuerySnapshot('product-import-catalog.POST', lambda: self.client.post(
+            '/api/v1/products/import/', {'file': upload}, format='multipart'
+        ))
+        self.assertEqual(response.status_code, 200)
+
+    def test_orders(self):
+        payload = {"customer": self.customer.id, "items": [
+            {"product": self.products[0].id, "quantity": 1}, {"product": self.products[2].id, "quantity": 3}
+        ]}
+        self.request('order-list', 'GET', '/api/v1/orders/')
+        created = self.request('order-list', 'POST', '/api/v1/orders/', payload, expected_status=201)
+        self.request('order-detail', 'GET', f'/api/v1/orders/{self.order.id}/')
+        self.request('order-change-status', 'PATCH', f'/api/v1/orders/{self.order.id}/status/', {"status": "SEPARADO"})
+        self.request('order-history', 'GET', f'/api/v1/orders/{self.order.id}/history/')
+        self.request('order-status-timings', 'GET', '/api/v1/orders/status-timings/')
+        self.request('order-intake-status', 'GET', '/api/v1/orders/intake/inexistente/', expected_status=404)
+        self.request('order-detail', 'DELETE', f"/api/v1/orders/{created.data['id']}/", expected_status=204)
+
+    def test_status_changes_and_pricing(self):
+        self.request('status-change-list', 'GET', '/api/v1/status-changes/')
+        self.request('price-list-list', 'GET', '/api/v1/price-lists/')
+        self.request('price-list-detail', 'GET', f'/api/v1/price-lists/{self.price_list.id}/')
+        self.request('price-rule-list', 'GET', '/api/v1/price-rules/')
+        rule = self.price_list.rules.get()
+        self.request('price-rule-detail', 'GET', f'/api/v1/price-rules/{rule.id}/')
+
+    def test_profiling(self):
+        self.client.force_authenticate(User.objects.create_user('snapshot-admin', is_staff=True))
+        self.request('profiling-config', 'GET', '/api/v1/profiling/config/')
+        self.request('profiling-config', 'PUT', '/api/v1/profiling/config/', {"enabled": False})
+        self.request('profiling-list', 'GET', '/api/v1/profiling/')
+        self.request('profiling-detail', 'GET', '/api/v1/profiling/inexistente/', expected_status=404)
+
+    def test_every_route_has_a_snapshot(self):
+        if updating_snapshots():
+            self.skipTest('Snapshots sendo regravados.')
+
+        def names(patterns):
+            for pattern in patterns:
+                if isinstance(pattern, URLResolver):
+                    yield from names(pattern.url_patterns)
+                elif isinstance(pattern, URLPattern) and pattern.name:
+                    yield pattern.name
+
+        api = next(p for p in get_resolver().url_patterns if isinstance(p, URLResolver) and str(p.pattern) == 'api/v1/')
+        routes = set(names(api.url_patterns)) - UNSNAPSHOTTED_ROUTES
+        snapshotted = {path.stem.split('.')[0] for path in (SNAPSHOT_DIR / 'sqlite').glob('*.json')}
+        self.assertEqual(sorted(routes - snapshotted), [], 'Rotas sem snapshot de queries.')
+
+
+class ServiceQuerySnapshotTestCase(QuerySnapshotMixin, SnapshotFixturesMixin, RedisTestMixin, TestCase):
+    """
+    Um snapshot por método público dos services de orders/services.py. Nomes: '<Service>.<método>'.
+    """
+    def setUp(self):
+        super().setUp()
+        self.create_fixtures()
+
+    def test_stock_ledger_service(self):
+        ledger = StockLedgerService()
+        product_id = self.products[2].id
+
+        self.assertQuerySnapshot('StockLedgerService.record', lambda: ledger.record([
+            StockMovement(product_id=product_id, delta=1, reason=StockMovement.Reason.MANUAL)
+        ]))
+        self.assertQuerySnapshot('StockLedgerService.adjust', lambda: ledger.adjust(product_id, -3))
+        self.assertQuerySnapshot('StockLedgerService.adjust_warehouse', lambda: ledger.adjust_warehouse(
+            self.warehouse.id, self.products[0].id, 4
+        ))
+        self.assertQuerySnapshot('StockLedgerService.set_quantity', lambda: ledger.set_quantity(product_id, 80))
+        self.assertQuerySnapshot('StockLedgerService.stock_as_of', lambda: ledger.stock_as_of(product_id))
+
+        # Movimentos fora do horizonte, para o checkpoint ter o que consolidar
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        self.assertQuerySnapshot('StockLedgerService.take_snapshots', ledger.take_snapshots)
+
+    def test_order_services(self):
+        order = self.assertQuerySnapshot('CreateOrderService.create_order', lambda: CreateOrderService().create_order(
+            self.order_dto()
+        ))
+        self.assertQuerySnapshot('UpdateOrderStatusService.update_status', lambda: UpdateOrderStatusService().update_status(
+            order.id, 'CANCELADO'
+        ))
+        self.assertQuerySnapshot('StatusTimingService.record', lambda: StatusTimingService().record(
+            order, 'CONFIRMADO', 60.0
+        ))
+        self.assertQuerySnapshot('StatusTimingService.summary', StatusTimingService().summary)
+        self.assertQuerySnapshot('ArchiveOrdersService.archive_chunk', lambda: ArchiveOrdersService().archive_chunk(
+            timezone.now() + timedelta(days=1)
+        ))
+
+    def test_catalog_import_service(self):
+        rows = [
+            {'sku': 'SNAP-0', 'name': 'Produto Snapshot 0', 'price': '11.00'},
+            {'sku': 'SNAP-IMP', 'name': 'Importado', 'price': '3.00', 'stock_quantity': '7'},
+        ]
+        self.assertQuerySnapshot('CatalogImportService.run', lambda: CatalogImportService().run(rows))
+
+    def test_every_service_method_has_a_snapshot(self):
+        if updating_snapshots():
+            self.skipTest('Snapshots sendo regravados.')
+
+        methods = {
+            f'{name}.{method}'
+            for name, cls in inspect.getmembers(services, inspect.isclass)
+            if name.endswith('Service') and cls.__module__ == services.__name__
+            for method, _ in inspect.getmembers(cls, inspect.isfunction)
+            if not method.startswith('_')
+        }
+        snapshotted = {path.stem for path in (SNAPSHOT_DIR / 'sqlite').glob('*.json')}
+        self.assertEqual(sorted(methods - snapshotted), [], 'Métodos de service sem snapshot de queries.')
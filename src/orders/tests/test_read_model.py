@@ -0,0 +1,60 @@
+import json
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from orders.models import Customer, Product, Order
+from orders.read_model import iter_order_batches, iter_orders, order_row_to_representation
+from orders.serializers import OrderSerializer
+from orders.services import CreateOrderService, UpdateOrderStatusService
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+class ReadModelTestCase(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Cliente Leitura", cpf_cnpj="79179179179", email="leitura@teste.com")
+        self.products = [
+            Product.objects.create(sku=f"READ-{i}", name=f"Produto Leitura {i}", price=f"{i + 1}.50", stock_quantity=100)
+            for i in range(3)
+        ]
+
+        service = CreateOrderService()
+        self.orders = [
+            service.create_order(CreateOrderDTO(customer_id=self.customer.id, items=[
+                OrderItemDTO(product_id=product.id, quantity=i + 1) for product in self.products[:i % 3 + 1]
+            ]))
+            for i in range(5)
+        ]
+        UpdateOrderStatusService().update_status(self.orders[3].id, 'CONFIRMADO')
+        Order.objects.create(customer=self.customer, total_amount=0)
+
+    def test_representation_matches_serializer(self):
+        rows = list(iter_orders(chunk_size=2))
+        orders = Order.objects.prefetch_related('items').order_by('id')
+
+        self.assertEqual(len(rows), 6)
+        for row, order in zip(rows, orders):
+            self.assertEqual(
+                json.dumps(order_row_to_representation(row)),
+                json.dumps(OrderSerializer(order).data)
+            )
+
+    def test_batches_are_keyset_chunks_with_few_queries(self):
+        queryset = Order.objects.filter(status='PENDENTE')
+        with self.assertNumQueries(2 * 3 + 1):
+            batches = list(iter_order_batches(queryset, chunk_size=2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertNotIn(self.orders[3].id, [row.id for batch in batches for row in batch])
+
+        # Sem itens: uma consulta por lote
+        with self.assertNumQueries(4):
+            rows = list(iter_orders(queryset, chunk_size=2, with_items=False))
+        self.assertEqual(rows[0].items, [])
+
+    def test_export_command_writes_ndjson(self):
+        out, err = StringIO(), StringIO()
+        call_command('export_orders', customer=self.customer.id, status='CONFIRMADO', stdout=out, stderr=err)
+
+        [line] = out.getvalue().splitlines()
+        self.assertEqual(json.loads(line)['id'], self.orders[3].id)
+        self.assertEqual(len(json.loads(line)['items']), 1)
+        self.assertIn('1 pedidos exportados', err.getvalue())
@@ -0,0 +1,39 @@
+import tempfile
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from orders.startup import measure_boot, BOOT_BUDGET_MS, FIRST_REQUEST_BUDGET_MS
+
+class ColdStartTestCase(TransactionTestCase):
+    def test_worker_boot_and_first_request_within_budget(self):
+        # O subprocesso abre a própria conexão: precisa do banco de teste, com as tabelas e o tenant padrão
+        result = measure_boot(database=connection.settings_dict['NAME'])
+
+        self.assertEqual(result['status_code'], 200)
+        self.assertLess(result['boot_ms'], BOOT_BUDGET_MS)
+        self.assertLess(result['first_request_ms'], FIRST_REQUEST_BUDGET_MS)
+
+        # O gerador de schema só é importado quando /schema/ ou /docs/ são acessados
+        self.assertNotIn('drf_spectacular.views', result['modules'])
+        self.assertNotIn('drf_spectacular.generators', result['modules'])
+
+
+class StartupTestCase(SimpleTestCase):
+    def test_schema_served_from_prebuilt_artifact(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.yaml') as f:
+            f.write('openapi: 3.0.3\ninfo:\n  title: Artefato\n')
+            f.flush()
+
+            with override_settings(OPENAPI_SCHEMA_FILE=f.name):
+                response = self.client.get('/api/v1/schema/')
+
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'title: Artefato', b''.join(response.streaming_content))
+
+    @override_settings(OPENAPI_SCHEMA_FILE='')
+    def test_schema_generated_on_demand_without_artifact(self):
+        response = self.client.get('/api/v1/schema/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'/api/v1/orders/', response.content)
+
+        response = self.client.get('/api/v1/docs/')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Order, OrderStatusTiming, Product, OrderItem
+from orders.services import UpdateOrderStatusService
+from orders.state_machine import OrderStateMachine
+
+class OrderStateMachineTestCase(TestCase):
+    def setUp(self):
+        self.machine = OrderStateMachine()
+        customer = Customer.objects.create(name="Cliente Máquina", cpf_cnpj="12312312312", email="maquina@teste.com")
+        self.order = Order.objects.create(customer=customer, total_amount=0)
+
+    def test_transitions_are_compiled_to_frozensets(self):
+        self.assertEqual(self.machine.allowed(Order.Status.PENDING), frozenset({Order.Status.CONFIRMED, Order.Status.CANCELED}))
+        self.assertEqual(self.machine.final_statuses, frozenset({Order.Status.DELIVERED, Order.Status.CANCELED}))
+
+        with self.assertRaisesMessage(ValueError, "Status 'STATUS_LOUCO' inválido."):
+            self.machine.validate(Order.Status.PENDING, 'STATUS_LOUCO')
+        with self.assertRaisesMessage(ValueError, "de 'PENDENTE' para 'ENVIADO'"):
+            self.machine.validate(Order.Status.PENDING, Order.Status.SHIPPED)
+
+    def test_guards_and_hooks_run_only_for_their_transitions(self):
+        calls = []
+
+        @self.machine.guard(Order.Status.CONFIRMED)
+        def needs_items(order, user=None):
+            if not order.item_count:
+                raise ValueError("Pedido sem itens não pode ser confirmado.")
+
+        @self.machine.on_enter(Order.Status.CANCELED, source=Order.Status.CONFIRMED)
+        def notify(order, user=None):
+            calls.append(order.status)
+
+        service = UpdateOrderStatusService(state_machine=self.machine)
+        with self.assertRaisesMessage(ValueError, "Pedido sem itens"):
+            service.update_status(self.order.id, Order.Status.CONFIRMED)
+
+        Order.objects.filter(id=self.order.id).update(item_count=1)
+        service.update_status(self.order.id, Order.Status.CONFIRMED)
+        service.update_status(self.order.id, Order.Status.CANCELED)
+        self.assertEqual(calls, [Order.Status.CONFIRMED])
+
+        # Registrar em uma transição inexistente é erro de configuração
+        with self.assertRaises(ValueError):
+            self.machine.on_enter(Order.Status.SHIPPED, source=Order.Status.PENDING)
+
+    def test_cancel_hook_restores_stock(self):
+        product = Product.objects.create(sku="MAQ-1", name="Produto Máquina", price=10, stock_quantity=5)
+        OrderItem.objects.create(order=self.order, product=product, quantity=2, unit_price=10)
+
+        UpdateOrderStatusService().update_status(self.order.id, Order.Status.CANCELED)
+
+        product.refresh_from_db()
+        self.assertEqual(product.stock_quantity, 7)
+
+
+class StatusTimingTestCase(APITestCase):
+    def setUp(self):
+        customer = Customer.objects.create(name="Cliente SLA", cpf_cnpj="32132132132", email="sla@teste.com")
+        self.orders = [Order.objects.create(customer=customer, total_amount=0) for _ in range(3)]
+
+    def move(self, order, new_status, hours_ago):
+        # Simula a permanência no status atual antes da transição
+        Order.objects.filter(id=order.id).update(last_status_change_at=timezone.now() - timedelta(hours=hours_ago))
+        UpdateOrderStatusService().update_status(order.id, new_status)
+
+    def test_transitions_feed_the_per_status_aggregate(self):
+        for order, hours in zip(self.orders, (1, 2, 3)):
+            self.move(order, Order.Status.CONFIRMED, hours)
+        self.move(self.orders[0], Order.Status.SEPARATED, 4)
+
+        response = self.client.get('/api/v1/orders/status-timings/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        timings = {row['status']: row for row in response.data}
+        self.assertEqual(set(timings), {Order.Status.PENDING, Order.Status.CONFIRMED})
+        self.assertEqual(timings[Order.Status.PENDING]['transitions'], 3)
+        self.assertAlmostEqual(timings[Order.Status.PENDING]['avg_seconds'], 2 * 3600, delta=5)
+        self.assertAlmostEqual(timings[Order.Status.PENDING]['max_seconds'], 3 * 3600, delta=5)
+        self.assertEqual(timings[Order.Status.CONFIRMED]['transitions'], 1)
+
+        # Cada pedido cai em um slot: o agregado não concentra as transições em uma linha só
+        self.assertEqual(OrderStatusTiming.objects.filter(status=Order.Status.PENDING).count(), 3)
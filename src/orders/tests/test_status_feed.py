@@ -0,0 +1,77 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Order, OrderStatusHistory
+
+class StatusFeedTestCase(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Cliente Feed",
+            cpf_cnpj="35735735735",
+            email="feed@teste.com"
+        )
+        self.order = Order.objects.create(customer=self.customer)
+        self.other_order = Order.objects.create(customer=self.customer)
+
+        # Alguns registros com o mesmo changed_at para exercitar o desempate por id
+        base = timezone.now() - timedelta(hours=1)
+        transitions = [
+            (self.order, 'PENDENTE', 'CONFIRMADO', base),
+            (self.other_order, 'PENDENTE', 'CONFIRMADO', base),
+            (self.order, 'CONFIRMADO', 'SEPARADO', base + timedelta(minutes=1)),
+            (self.order, 'SEPARADO', 'ENVIADO', base + timedelta(minutes=2)),
+            (self.other_order, 'CONFIRMADO', 'CANCELADO', base + timedelta(minutes=2)),
+        ]
+        for order, old, new, changed_at in transitions:
+            entry = OrderStatusHistory.objects.create(order=order, old_status=old, new_status=new)
+            OrderStatusHistory.objects.filter(id=entry.id).update(changed_at=changed_at)
+
+    def test_order_timeline_is_chronological(self):
+        response = self.client.get(f'/api/v1/orders/{self.order.id}/history/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([entry['new_status'] for entry in response.data], ['CONFIRMADO', 'SEPARADO', 'ENVIADO'])
+
+    def test_global_feed_keyset_sync(self):
+        seen = []
+        cursor = None
+
+        while True:
+            params = {'page_size': 2}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get('/api/v1/status-changes/', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            seen += [entry['id'] for entry in response.data['results']]
+            cursor = response.data['next_cursor']
+            if not response.data['has_more']:
+                break
+
+        expected = list(OrderStatusHistory.objects.order_by('changed_at', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+        # Mudança recente fica fora do feed até passar a janela de commit
+        new_entry = OrderStatusHistory.objects.create(order=self.order, old_status='ENVIADO', new_status='ENTREGUE')
+        response = self.client.get('/api/v1/status-changes/', {'cursor': cursor})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['next_cursor'], cursor)
+
+        # ...e aparece na próxima sincronização a partir do mesmo cursor
+        OrderStatusHistory.objects.filter(id=new_entry.id).update(changed_at=timezone.now() - timedelta(seconds=10))
+        response = self.client.get('/api/v1/status-changes/', {'cursor': cursor})
+        self.assertEqual([entry['id'] for entry in response.data['results']], [new_entry.id])
+
+        # Sem novidades o cursor volta igual
+        cursor = response.data['next_cursor']
+        response = self.client.get('/api/v1/status-changes/', {'cursor': cursor})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['next_cursor'], cursor)
+
+    def test_feed_filters_and_invalid_cursor(self):
+        response = self.client.get('/api/v1/status-changes/', {'status': 'CANCELADO'})
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get('/api/v1/status-changes/', {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,117 @@
+import importlib
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.apps import apps
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product, StockMovement, StockSnapshot
+from orders.services import CreateOrderService, UpdateOrderStatusService, StockLedgerService
+from orders.dtos import CreateOrderDTO, OrderItemDTO
+
+class StockLedgerTestCase(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            name="Cliente Ledger",
+            cpf_cnpj="24624624624",
+            email="ledger@teste.com"
+        )
+        response = self.client.post('/api/v1/products/', {
+            "sku": "LED-1", "name": "Produto Ledger", "price": "10.00", "stock_quantity": 10
+        }, format='json')
+        self.product = Product.objects.get(id=response.data['id'])
+        self.ledger = StockLedgerService()
+
+    def test_relative_adjust_is_recorded(self):
+        url = f'/api/v1/products/{self.product.id}/stock/adjust/'
+
+        response = self.client.post(url, {"delta": -3, "observation": "Avaria"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_quantity'], 7)
+
+        # Saída maior que o saldo é recusada sem alterar nada
+        response = self.client.post(url, {"delta": -8}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock_quantity, 7)
+        self.assertEqual(
+            list(StockMovement.objects.filter(product=self.product).order_by('id').values_list('reason', 'delta')),
+            [(StockMovement.Reason.INITIAL, 10), (StockMovement.Reason.MANUAL, -3)]
+        )
+
+    def test_orders_cancellations_and_absolute_updates_keep_ledger_in_sync(self):
+        dto = CreateOrderDTO(customer_id=self.customer.id, items=[OrderItemDTO(product_id=self.product.id, quantity=4)])
+        order = CreateOrderService().create_order(dto)
+        UpdateOrderStatusService().update_status(order.id, 'CANCELADO')
+
+        response = self.client.patch(f'/api/v1/products/{self.product.id}/stock/', {"stock_quantity": 15}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reasons = list(StockMovement.objects.filter(product=self.product).order_by('id').values_list('reason', 'delta', 'order_id'))
+        self.assertEqual(reasons, [
+            (StockMovement.Reason.INITIAL, 10, None),
+            (StockMovement.Reason.ORDER, -4, order.id),
+            (StockMovement.Reason.CANCELLATION, 4, order.id),
+            (StockMovement.Reason.MANUAL, 5, None),
+        ])
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.ledger.stock_as_of(self.product.id), self.product.stock_quantity)
+
+    @patch.object(StockLedgerService, 'SNAPSHOT_HORIZON', timedelta(0))
+    def test_snapshots_and_stock_as_of(self):
+        self.ledger.adjust(self.product.id, -2)
+        call_command('snapshot_stock', stdout=StringIO())
+        checkpoint = timezone.now()
+
+        self.ledger.adjust(self.product.id, 5)
+        call_command('snapshot_stock', stdout=StringIO())
+        self.ledger.adjust(self.product.id, -1)
+
+        self.assertEqual(self.ledger.stock_as_of(self.product.id), 12)
+        self.assertEqual(self.ledger.stock_as_of(self.product.id, checkpoint), 8)
+
+        response = self.client.get(f'/api/v1/products/{self.product.id}/stock/ledger/')
+        self.assertEqual(response.data['stock_quantity'], 12)
+
+    def test_snapshot_skips_movements_inside_commit_horizon(self):
+        # Movimentos recentes podem ter IDs menores ainda não commitados: ficam para o próximo corte
+        self.assertEqual(self.ledger.take_snapshots(), 0)
+
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        self.ledger.adjust(self.product.id, 4)
+        self.assertEqual(self.ledger.take_snapshots(), 1)
+
+        snapshot = StockSnapshot.objects.get(product=self.product)
+        self.assertEqual(snapshot.quantity, 10)
+        self.assertEqual(self.ledger.stock_as_of(self.product.id), 14)
+
+    def test_product_update_cannot_overwrite_stock(self):
+        url = f'/api/v1/products/{self.product.id}/'
+
+        response = self.client.patch(url, {"stock_quantity": 999, "name": "Renomeado"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_quantity'], 10)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, "Renomeado")
+        self.assertEqual(self.product.stock_quantity, 10)
+
+    def test_backfill_migration_opens_legacy_products(self):
+        # Produto anterior ao ledger: estoque sem nenhum movimento
+        legacy = Product.objects.create(sku="LED-OLD", name="Legado", price="1.00", stock_quantity=30)
+        self.ledger.adjust(legacy.id, -5)
+
+        migration = importlib.import_module('orders.migrations.0008_backfill_initial_stock_movements')
+        migration.backfill_initial_movements(apps, None)
+
+        opening = StockMovement.objects.get(product=legacy, reason=StockMovement.Reason.INITIAL)
+        self.assertEqual(opening.delta, 30)
+        self.assertEqual(opening.created_at, legacy.created_at)
+        self.assertEqual(self.ledger.stock_as_of(legacy.id), 25)
+
+        # Produtos já consistentes não ganham movimento extra
+        self.assertEqual(StockMovement.objects.filter(product=self.product, reason=StockMovement.Reason.INITIAL).count(), 1)
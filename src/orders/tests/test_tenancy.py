@@ -0,0 +1,103 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product, Order, Tenant
+from orders.events import matches
+from orders.tenancy import tenant_context
+from orders.tests.test_throttling import RedisTestMixin
+
+class TenantIsolationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.acme = Tenant.objects.create(code="acme", name="Acme")
+        self.globex = Tenant.objects.create(code="globex", name="Globex")
+
+        with tenant_context(self.acme.id):
+            self.customer = Customer.objects.create(name="Cliente Acme", cpf_cnpj="11122233344", email="acme@teste.com")
+            self.product = Product.objects.create(sku="TEN-1", name="Produto Acme", price=10, stock_quantity=10)
+
+    def test_data_of_one_tenant_is_invisible_to_another(self):
+        acme = self.client.get('/api/v1/customers/', HTTP_X_TENANT='acme')
+        globex = self.client.get('/api/v1/customers/', HTTP_X_TENANT='globex')
+
+        self.assertEqual([c['id'] for c in acme.data['results']], [self.customer.id])
+        self.assertEqual(globex.data['results'], [])
+        self.assertEqual(
+            self.client.get(f'/api/v1/products/{self.product.id}/', HTTP_X_TENANT='globex').status_code,
+            status.HTTP_404_NOT_FOUND
+        )
+        # Sem header: tenant padrão, que também não enxerga a Acme
+        self.assertEqual(self.client.get('/api/v1/customers/').data['results'], [])
+
+    def test_unknown_tenant_is_rejected(self):
+        response = self.client.get('/api/v1/customers/', HTTP_X_TENANT='inexistente')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unique_fields_are_per_tenant(self):
+        payload = {"sku": "TEN-1", "name": "Produto Globex", "price": "5.00", "stock_quantity": 1}
+
+        response = self.client.post('/api/v1/products/', payload, format='json', HTTP_X_TENANT='globex')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Product.all_objects.get(id=response.data['id']).tenant_id, self.globex.id)
+
+        response = self.client.post('/api/v1/products/', payload, format='json', HTTP_X_TENANT='acme')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sku', response.data)
+
+    def test_order_cannot_reference_another_tenants_records(self):
+        payload = {"customer": self.customer.id, "items": [{"product": self.product.id, "quantity": 1}]}
+
+        response = self.client.post('/api/v1/orders/', payload, format='json', HTTP_X_TENANT='globex')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/v1/orders/', payload, format='json', HTTP_X_TENANT='acme')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.all_objects.get(id=response.data['id']).tenant_id, self.acme.id)
+
+    def test_idempotency_keys_do_not_cross_tenants(self):
+        with tenant_context(self.globex.id):
+            customer = Customer.objects.create(name="Cliente Globex", cpf_cnpj="11122233344", email="acme@teste.com")
+            product = Product.objects.create(sku="TEN-1", name="Produto Globex", price=10, stock_quantity=10)
+
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'mesma-chave'}
+        acme = self.client.post('/api/v1/orders/', {
+            "customer": self.customer.id, "items": [{"product": self.product.id, "quantity": 1}]
+        }, format='json', HTTP_X_TENANT='acme', **headers)
+        globex = self.client.post('/api/v1/orders/', {
+            "customer": customer.id, "items": [{"product": product.id, "quantity": 1}]
+        }, format='json', HTTP_X_TENANT='globex', **headers)
+
+        self.assertEqual((acme.status_code, globex.status_code), (status.HTTP_201_CREATED, status.HTTP_201_CREATED))
+        self.assertNotEqual(acme.data['id'], globex.data['id'])
+
+    def test_events_are_filtered_by_tenant(self):
+        payload = {"tenant_id": self.acme.id, "customer_id": self.customer.id, "new_status": "CONFIRMADO"}
+        self.assertTrue(matches(payload, {'tenant': self.acme.id}))
+        self.assertFalse(matches(payload, {'tenant': self.globex.id}))
+
+
+class TenantAdmissionTestCase(RedisTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.fixtures = {}
+        for code in ("acme", "globex"):
+            tenant = Tenant.objects.create(code=code, name=code)
+            with tenant_context(tenant.id):
+                customer = Customer.objects.create(name=f"Cliente {code}", cpf_cnpj="55566677788", email="adm@teste.com")
+                product = Product.objects.create(sku="ADM-T", name=f"Produto {code}", price=10, stock_quantity=10)
+            self.fixtures[code] = (tenant, {"customer": customer.id, "items": [{"product": product.id, "quantity": 1}]})
+
+    def test_busy_tenant_does_not_take_other_tenants_slots(self):
+        acme, payload = self.fixtures["acme"]
+        # A Acme já ocupa toda a sua fatia de transações em andamento
+        self.redis.zadd(f'tenant:{acme.id}:admission:order_create:in_flight', {'t1': 9e9, 't2': 9e9})
+
+        config = {**settings.ADMISSION_CONTROL, 'MAX_IN_FLIGHT': 10, 'MAX_IN_FLIGHT_PER_TENANT': 2}
+        with override_settings(ADMISSION_CONTROL=config):
+            busy = self.client.post('/api/v1/orders/', payload, format='json', HTTP_X_TENANT='acme')
+            other = self.client.post('/api/v1/orders/', self.fixtures["globex"][1], format='json', HTTP_X_TENANT='globex')
+
+        self.assertEqual(busy.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(other.status_code, status.HTTP_201_CREATED)
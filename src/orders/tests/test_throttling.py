@@ -0,0 +1,89 @@
+from unittest.mock import patch
+import fakeredis
+from django.conf import settings
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+from orders.models import Customer, Product, Order
+from orders.admission import order_admission
+from orders.checks import redis_cache_check
+
+def throttle_rates(**rates):
+    return {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+    }
+
+class RedisTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch('orders.redis_client.get_redis_client', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+class TokenBucketThrottleTestCase(RedisTestMixin, APITestCase):
+    def test_client_budget_returns_429_with_retry_after(self):
+        with override_settings(REST_FRAMEWORK=throttle_rates(anon='2/minute')):
+            responses = [self.client.get('/api/v1/products/') for _ in range(3)]
+
+        self.assertEqual([r.status_code for r in responses[:2]], [status.HTTP_200_OK] * 2)
+        self.assertEqual(responses[2].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', responses[2].headers)
+
+    def test_endpoint_budget_is_separate_per_action(self):
+        product = Product.objects.create(sku="THR-1", name="Produto Throttle", price=1.0, stock_quantity=1)
+
+        with override_settings(REST_FRAMEWORK=throttle_rates(**{'product.list': '1/minute'})):
+            first = self.client.get('/api/v1/products/')
+            second = self.client.get('/api/v1/products/')
+            detail = self.client.get(f'/api/v1/products/{product.id}/')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(detail.status_code, status.HTTP_200_OK)
+
+class AdmissionControlTestCase(RedisTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        customer = Customer.objects.create(name="Cliente Admissão", cpf_cnpj="13213213213", email="adm@teste.com")
+        product = Product.objects.create(sku="ADM-1", name="Produto Admissão", price=10.0, stock_quantity=10)
+        self.payload = {"customer": customer.id, "items": [{"product": product.id, "quantity": 1}]}
+
+    def test_sheds_load_when_in_flight_limit_reached(self):
+        config = {**settings.ADMISSION_CONTROL, 'MAX_IN_FLIGHT': 0}
+        with override_settings(ADMISSION_CONTROL=config):
+            response = self.client.post('/api/v1/orders/', self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response.headers)
+        self.assertEqual(Order.objects.count(), 0)
+
+    def test_sheds_load_on_lock_waits(self):
+        with patch.object(order_admission, 'current_lock_waits', return_value=10**6):
+            response = self.client.post('/api/v1/orders/', self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_admitted_request_releases_slot(self):
+        response = self.client.post('/api/v1/orders/', self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.redis.zcard(order_admission.key), 0)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class NonRedisCacheTestCase(APITestCase):
+    def test_fails_open_without_django_redis(self):
+        customer = Customer.objects.create(name="Cliente LocMem", cpf_cnpj="32132132132", email="locmem@teste.com")
+        product = Product.objects.create(sku="LOC-1", name="Produto", price=1.0, stock_quantity=5)
+
+        response = self.client.post(
+            '/api/v1/orders/',
+            {'customer': customer.id, 'items': [{'product': product.id, 'quantity': 1}]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_startup_check_warns(self):
+        self.assertEqual([w.id for w in redis_cache_check(None)], ['orders.W001'])
@@ -0,0 +1,151 @@
+import logging
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework.throttling import BaseThrottle
+from . import redis_client
+from .tenancy import get_current_tenant
+
+logger = logging.getLogger(__name__)
+
+# Verifica e consome N buckets de forma atômica no Redis.
+# KEYS: um bucket por chave. ARGV: pares (capacidade, tokens por segundo).
+# Só consome se TODOS os buckets tiverem saldo; senão devolve o maior tempo de espera.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local states = {}
+local wait = 0
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+    states[i] = {tokens, capacity, rate}
+end
+
+local allowed = 1
+if wait > 0 then
+    allowed = 0
+end
+
+for i, key in ipairs(KEYS) do
+    local tokens = states[i][1] - allowed
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil(states[i][2] / states[i][3] * 1000) + 1000)
+end
+
+return {allowed, tostring(wait)}
+"""
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Converte '100/day' em (capacidade, tokens por segundo), no mesmo formato das taxas do DRF.
+    """
+    num, period = rate.split('/')
+    num_requests = int(num)
+    return num_requests, num_requests / RATE_PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle por token bucket atômico no Redis (um único EVALSHA por requisição).
+
+    Cada requisição consome um token de dois buckets do cliente:
+    - Orçamento geral do cliente: escopos 'anon' / 'user' de DEFAULT_THROTTLE_RATES.
+    - Orçamento por endpoint: escopo '<basename>.<action>' (ex: 'order.create'), se configurado.
+    E, com o escopo 'tenant' configurado, de um bucket compartilhado pelo tenant inteiro.
+    Os buckets do cliente também são por tenant: o mesmo IP (gateway) em dois tenants não divide saldo.
+
+    A taxa '100/day' vira um bucket com capacidade 100 e reposição contínua de 100 tokens por dia.
+    Se o Redis estiver indisponível, a requisição é liberada (fail-open) e o erro é logado.
+    """
+    cache_format = 'throttle:tb:%(scope)s:%(ident)s'
+    _script = None
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_rates(self):
+        return settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})
+
+    def get_client_scope(self, request):
+        return 'user' if request.user and request.user.is_authenticated else 'anon'
+
+    def get_client_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            ident = str(request.user.pk)
+        else:
+            ident = self.get_ident(request)
+
+        tenant_id = get_current_tenant()
+        return ident if tenant_id is None else f'{tenant_id}:{ident}'
+
+    def get_endpoint_scope(self, view):
+        basename = getattr(view, 'basename', None)
+        action = getattr(view, 'action', None)
+        if basename and action:
+            return f'{basename}.{action}'
+        return getattr(view, 'throttle_scope', None)
+
+    def get_buckets(self, request, view):
+        rates = self.get_rates()
+        ident = self.get_client_ident(request)
+        buckets = []
+
+        for scope in (self.get_client_scope(request), self.get_endpoint_scope(view)):
+            rate = rates.get(scope) if scope else None
+            if not rate:
+                continue
+
+            capacity, refill_rate = parse_rate(rate)
+            key = self.cache_format % {'scope': scope, 'ident': ident}
+            buckets.append((key, capacity, refill_rate))
+
+        tenant_id = get_current_tenant()
+        if tenant_id is not None and rates.get('tenant'):
+            capacity, refill_rate = parse_rate(rates['tenant'])
+            buckets.append((self.cache_format % {'scope': 'tenant', 'ident': tenant_id}, capacity, refill_rate))
+
+        return buckets
+
+    @classmethod
+    def get_script(cls, client):
+        if cls._script is None:
+            cls._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        return cls._script
+
+    def allow_request(self, request, view):
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+
+        keys = [key for key, _, _ in buckets]
+        args = []
+        for _, capacity, refill_rate in buckets:
+            args += [capacity, refill_rate]
+
+        try:
+            client = redis_client.get_redis_client()
+            allowed, wait = self.get_script(client)(keys=keys, args=args, client=client)
+        except RedisError:
+            logger.warning('Throttle indisponível (Redis), liberando requisição.', exc_info=True)
+            return True
+
+        if int(allowed):
+            return True
+
+        self.wait_seconds = float(wait)
+        return False
+
+    def wait(self):
+        return self.wait_seconds
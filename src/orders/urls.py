@@ -1,8 +1,11 @@
 from django.urls import path, include
 from django.http import JsonResponse # Import necessário para o Health Check
 from rest_framework.routers import DefaultRouter
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
-from .views import OrderViewSet, ProductViewSet, CustomerViewSet
+from .schema import schema_view, docs_view
+from .views import (
+    OrderViewSet, ProductViewSet, CustomerViewSet, StatusChangeFeedViewSet, PriceListViewSet, PriceRuleViewSet,
+    ProfilingViewSet, order_events_stream
+)
 
 # Função simples para o health check 
 def health_check(request):
@@ -12,14 +15,21 @@ router = DefaultRouter()
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'customers', CustomerViewSet, basename='customer')
+router.register(r'status-changes', StatusChangeFeedViewSet, basename='status-change')
+router.register(r'price-lists', PriceListViewSet, basename='price-list')
+router.register(r'price-rules', PriceRuleViewSet, basename='price-rule')
+router.register(r'profiling', ProfilingViewSet, basename='profiling')
 
 urlpatterns = [
     path('health/', health_check, name='health_check'),
 
+    # Stream SSE (antes do router, senão 'events' casa com orders/{pk}/)
+    path('orders/events/', order_events_stream, name='order-events'),
+
     # Rotas da API
     path('', include(router.urls)),
 
-    #  OpenAPI/Swagger
-    path('schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    #  OpenAPI/Swagger (views carregadas sob demanda, ver orders/schema.py)
+    path('schema/', schema_view, name='schema'),
+    path('docs/', docs_view, name='swagger-ui'),
 ]
\ No newline at end of file
@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+from django.core.cache import cache
+from .redis_client import CACHE_ERRORS
+from .tenancy import unscoped
+
+logger = logging.getLogger(__name__)
+
+
+class VersionedCache:
+    """
+    Dados compilados em memória por processo, com a versão no cache compartilhado (Redis).
+    Escritas chamam `bump_version` e os demais processos recarregam na próxima verificação,
+    feita no máximo a cada CHECK_INTERVAL.
+
+    Com o Redis fora, segue servindo o que já carregou (ou carrega do banco, se ainda não carregou):
+    o cache de versão é uma otimização e não pode derrubar a criação de pedidos. Na volta do Redis,
+    a versão não confere com a local e os dados são recarregados, cobrindo escritas feitas no intervalo.
+
+    Subclasses definem VERSION_KEY e `_load(now)`, que roda sob lock e sem escopo de tenant
+    (os dados são indexados por ID, os mesmos para qualquer requisição).
+    """
+    VERSION_KEY = None
+
+    # Intervalo mínimo entre consultas da versão no cache (segundos)
+    CHECK_INTERVAL = 1.0
+
+    # Versão local quando o Redis não respondeu: nunca é igual à do cache
+    UNKNOWN = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._stale = False
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        """Força a recarga dos dados locais no próximo uso."""
+        self._stale = True
+
+    def bump_version(self):
+        """Sinaliza a todos os processos que os dados mudaram."""
+        try:
+            cache.add(self.VERSION_KEY, 0, timeout=None)
+            try:
+                cache.incr(self.VERSION_KEY)
+            except ValueError:
+                # Chave expirada entre o add e o incr
+                cache.set(self.VERSION_KEY, 1, timeout=None)
+        except CACHE_ERRORS:
+            logger.warning('Redis indisponível: versão de %s não incrementada.', self.VERSION_KEY)
+        self.invalidate()
+
+    def _refresh(self, force_check=False):
+        now = time.monotonic()
+        if self._loaded and not self._stale and not force_check and now - self._checked_at < self.CHECK_INTERVAL:
+            return
+
+        try:
+            version = cache.get(self.VERSION_KEY)
+        except CACHE_ERRORS:
+            logger.warning('Redis indisponível: %s segue com os dados já carregados.', self.VERSION_KEY)
+            version = self.UNKNOWN
+            if self._loaded and not self._stale:
+                self._checked_at = now
+                self._version = version
+                return
+
+        self._checked_at = now
+        if self._loaded and not self._stale and version == self._version:
+            return
+
+        with self._lock, unscoped():
+            self._stale = False
+            self._load(now)
+            self._version = version
+            self._loaded = True
+
+    def _load(self, now):
+        raise NotImplementedError
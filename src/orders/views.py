@@ -1,38 +1,238 @@
-from rest_framework import viewsets, status
+import io
+from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import Throttled, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.reverse import reverse
+from redis.exceptions import RedisError
+from django.conf import settings
 from django.core.cache import cache
-from .models import Customer, Product, Order
-from .serializers import CustomerSerializer, ProductSerializer, OrderSerializer
-from .services import CreateOrderService, UpdateOrderStatusService
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import (
+    Customer, Product, Order, ArchivedOrder, StockMovement, OrderStatusHistory, PriceList, PriceRule, Warehouse
+)
+from .serializers import (
+    CustomerSerializer, ProductSerializer, OrderSerializer, OrderSummarySerializer, OrderStatusHistorySerializer,
+    PriceListSerializer, PriceRuleSerializer, ProfilingConfigSerializer
+)
+from .services import (
+    CreateOrderService, UpdateOrderStatusService, CatalogImportService, StockLedgerService, StatusTimingService
+)
 from .dtos import CreateOrderDTO, OrderItemDTO
+from .filters import OrderFilter
+from .pagination import CustomerOrderCursorPagination, StatusChangeKeysetPagination
+from .admission import order_admission
+from .catalog import catalog_snapshot
+from .importers import iter_catalog_rows, detect_format
+from .events import stream_events, is_valid_event_id
+from .tenancy import scope_to_tenant
+from .profiling import profiling_config, profile_store, span
+from . import intake
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class TenantScopedMixin:
+    """
+    Restringe o queryset da view ao tenant da requisição.
+    O `queryset` de classe é montado uma vez, na importação da URLConf, que o Django faz sob demanda
+    dentro da primeira requisição: o filtro de tenant do manager ficaria preso ao tenant dela.
+    Por isso ele só indica o model, e o queryset é refeito a cada requisição.
+    """
+    tenant_lookup = 'tenant_id'
+
+    def get_queryset(self):
+        return scope_to_tenant(self.queryset.model._default_manager.all(), self.tenant_lookup)
+
+class CustomerViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
 
-class ProductViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'], url_path='orders')
+    def orders(self, request, pk=None):
+        """
+        Histórico de pedidos do cliente com paginação por cursor.
+        Rota: GET /api/v1/customers/{id}/orders/?status=&created_after=&created_before=&expand=items
+        """
+        # 404 para ID inválido, inexistente ou de outro tenant
+        customer = self.get_object()
+        queryset = Order.objects.filter(customer=customer)
+
+        filterset = OrderFilter(request.query_params, queryset=queryset)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        queryset = filterset.qs
+
+        # Por padrão responde só com as colunas de resumo do pedido, sem join com itens
+        serializer_class = OrderSummarySerializer
+        if request.query_params.get('expand') == 'items':
+            queryset = queryset.prefetch_related('items')
+            serializer_class = OrderSerializer
+
+        paginator = CustomerOrderCursorPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = serializer_class(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+class ProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
 
+    def perform_create(self, serializer):
+        product = serializer.save()
+        if product.stock_quantity:
+            StockLedgerService().record([StockMovement(
+                product=product, delta=product.stock_quantity, reason=StockMovement.Reason.INITIAL,
+                user=self.request.user if self.request.user.is_authenticated else None
+            )])
+
+    def _stock_warehouse(self, request):
+        """
+        Centro de distribuição do ajuste de estoque: (id ou None, resposta de erro ou None).
+        Com MULTI_WAREHOUSE o campo é obrigatório: ajustar só o total do produto deixaria
+        WarehouseStock, de onde os pedidos são alocados, fora de sincronia.
+        """
+        warehouse_id = request.data.get('warehouse')
+        if warehouse_id is None:
+            if settings.INVENTORY['MULTI_WAREHOUSE']:
+                return None, Response({'error': 'O campo warehouse é obrigatório no modo multi-centro.'}, status=status.HTTP_400_BAD_REQUEST)
+            return None, None
+
+        try:
+            warehouse_id = int(warehouse_id)
+        except (TypeError, ValueError):
+            return None, Response({'error': 'O campo warehouse deve ser um inteiro.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not Warehouse.objects.filter(id=warehouse_id, is_active=True).exists():
+            return None, Response({'error': 'Centro de distribuição não encontrado.'}, status=status.HTTP_400_BAD_REQUEST)
+        return warehouse_id, None
+
     @action(detail=True, methods=['patch'], url_path='stock')
     def update_stock(self, request, pk=None):
+        """
+        Define o estoque absoluto (ex: inventário físico). A diferença é registrada no ledger.
+        Com `warehouse`, define o saldo daquele centro de distribuição (obrigatório no modo multi-centro).
+        Rota: PATCH /api/v1/products/{id}/stock/
+        """
         product = self.get_object()
         new_stock = request.data.get('stock_quantity')
         
         if new_stock is None:
             return Response({'error': 'O campo stock_quantity é obrigatório.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        warehouse_id, error = self._stock_warehouse(request)
+        if error is not None:
+            return error
             
         try:
-            product.stock_quantity = int(new_stock)
-            product.save()
-            return Response({'status': 'Estoque atualizado', 'stock_quantity': product.stock_quantity}, status=status.HTTP_200_OK)
-        except ValueError:
+            user = request.user if request.user.is_authenticated else None
+            quantity = StockLedgerService().set_quantity(
+                product.id, int(new_stock), user=user, observation=request.data.get('observation', ''),
+                warehouse_id=warehouse_id
+            )
+        except (TypeError, ValueError):
             return Response({'error': 'Quantidade inválida.'}, status=status.HTTP_400_BAD_REQUEST)
 
-class OrderViewSet(viewsets.ModelViewSet):
+        if warehouse_id is None:
+            return Response({'status': 'Estoque atualizado', 'stock_quantity': quantity}, status=status.HTTP_200_OK)
+
+        product.refresh_from_db(fields=['stock_quantity'])
+        return Response({
+            'status': 'Estoque atualizado',
+            'stock_quantity': product.stock_quantity,
+            'warehouse_quantity': quantity,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], url_path='stock/adjust')
+    def adjust_stock(self, request, pk=None):
+        """
+        Ajuste relativo de estoque (delta com sinal), aplicado atomicamente no banco.
+        Com `warehouse`, o ajuste é no saldo daquele centro de distribuição (e no total do produto);
+        no modo multi-centro o campo é obrigatório.
+        Rota: POST /api/v1/products/{id}/stock/adjust/
+        """
+        product = self.get_object()
+
+        try:
+            delta = int(request.data.get('delta'))
+        except (TypeError, ValueError):
+            return Response({'error': 'O campo delta deve ser um inteiro.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        warehouse_id, error = self._stock_warehouse(request)
+        if error is not None:
+            return error
+
+        try:
+            user = request.user if request.user.is_authenticated else None
+            ledger = StockLedgerService()
+            observation = request.data.get('observation', '')
+            if warehouse_id is None:
+                stock_quantity = ledger.adjust(product.id, delta, user=user, observation=observation)
+                return Response({'status': 'Estoque ajustado', 'stock_quantity': stock_quantity}, status=status.HTTP_200_OK)
+
+            warehouse_quantity = ledger.adjust_warehouse(warehouse_id, product.id, delta, user=user, observation=observation)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        product.refresh_from_db(fields=['stock_quantity'])
+        return Response({
+            'status': 'Estoque ajustado',
+            'stock_quantity': product.stock_quantity,
+            'warehouse_quantity': warehouse_quantity,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='stock/ledger')
+    def stock_ledger(self, request, pk=None):
+        """
+        Estoque calculado pelo ledger, atual ou em uma data (?as_of=2026-01-01T00:00:00Z).
+        Rota: GET /api/v1/products/{id}/stock/ledger/
+        """
+        product = self.get_object()
+
+        as_of = request.query_params.get('as_of')
+        when = parse_datetime(as_of) if as_of else None
+        if as_of and when is None:
+            return Response({'error': 'Data as_of inválida.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'product': product.id,
+            'as_of': when or timezone.now(),
+            'stock_quantity': StockLedgerService().stock_as_of(product.id, when),
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_catalog(self, request):
+        """
+        Importa o catálogo do fornecedor (CSV ou NDJSON) enviado no campo 'file'.
+        Rota: POST /api/v1/products/import/
+        """
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response({'error': 'O arquivo (campo file) é obrigatório.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('format') or detect_format(uploaded.name)
+
+        try:
+            # Lê o upload em streaming (arquivos grandes ficam em disco, não em memória)
+            stream = io.TextIOWrapper(uploaded.file, encoding='utf-8', newline='')
+            result = CatalogImportService().run(iter_catalog_rows(stream, file_format))
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'created': result.created,
+            'updated': result.updated,
+            'unchanged': result.unchanged,
+            'errors': result.errors,
+            'elapsed_seconds': round(result.elapsed_seconds, 3),
+            'rows_per_second': round(result.rows_per_second, 1),
+        }, status=status.HTTP_200_OK)
+
+class OrderViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    filterset_class = OrderFilter
 
     def create(self, request, *args, **kwargs):
         # captura a chave de idempotencia do cabecalho da requisicao
@@ -40,7 +240,7 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # Se a chave existir, verifica a resposta no redis
         if idempotency_key:
-            cache_key = f"idempotency_order_{idempotency_key}"
+            cache_key = intake.idempotency_cache_key(idempotency_key)
             cached_response = cache.get(cache_key)
             
             # Retorna exatamente o pedido criado antes (Status 200)
@@ -48,33 +248,94 @@ class OrderViewSet(viewsets.ModelViewSet):
                 return Response(cached_response, status=status.HTTP_200_OK)
 
         try:
-            customer_id = request.data.get('customer')
-            items_data = request.data.get('items', [])
-            
-            item_dtos = [
-                OrderItemDTO(product_id=item['product'], quantity=item['quantity'])
-                for item in items_data
-            ]
-            
-            dto = CreateOrderDTO(customer_id=customer_id, items=item_dtos)
-            
-            service = CreateOrderService() 
-            order = service.create_order(dto)
+            dto = self._build_create_dto(request.data)
+
+            # Pedidos certamente inválidos não ocupam vaga na admissão nem na fila
+            catalog_snapshot.pre_validate(dto)
+
+            if intake.is_async_request(request):
+                return self._enqueue(dto, idempotency_key)
+
+            # Já pré-validado acima
+            service = CreateOrderService(pre_validate=False)
+
+            # Recusa com 429 antes de abrir a transação se o banco estiver saturado
+            with order_admission.admit():
+                order = service.create_order(dto)
             
-            serializer = self.get_serializer(order)
-            response_data = serializer.data
+            with span('serialize'):
+                response_data = self.get_serializer(order).data
             
             # Pedido criado 
             if idempotency_key:
-                cache.set(cache_key, response_data, timeout=86400) 
+                with span('cache'):
+                    cache.set(cache_key, response_data, timeout=86400) 
                 
             return Response(response_data, status=status.HTTP_201_CREATED)
             
+        except Throttled:
+            raise
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': 'Erro interno no servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _build_create_dto(self, data) -> CreateOrderDTO:
+        try:
+            items = [
+                OrderItemDTO(product_id=int(item['product']), quantity=int(item['quantity']))
+                for item in data.get('items', [])
+            ]
+            return CreateOrderDTO(customer_id=int(data.get('customer')), items=items)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Payload inválido: informe customer e items com product e quantity.")
+
+    def _enqueue(self, dto: CreateOrderDTO, idempotency_key: str = None):
+        """
+        Modo assíncrono: enfileira e responde 202 com a URL de acompanhamento.
+        Um reenvio com a mesma Idempotency-Key devolve o mesmo ticket.
+        """
+        try:
+            ticket, _ = intake.enqueue(dto, idempotency_key)
+        except RedisError:
+            return Response({'error': 'Fila de pedidos indisponível.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        status_url = reverse('order-intake-status', kwargs={'ticket': ticket}, request=self.request)
+        return Response(
+            {'ticket': ticket, 'status': intake.QUEUED, 'status_url': status_url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': status_url}
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'intake/(?P<ticket>[\w-]+)', url_name='intake-status')
+    def intake_status(self, request, ticket=None):
+        """
+        Situação de um pedido enviado no modo assíncrono: queued, created (com o pedido), rejected ou failed.
+        Rota: GET /api/v1/orders/intake/{ticket}/
+        """
+        try:
+            result = intake.get_result(ticket)
+        except RedisError:
+            return Response({'error': 'Fila de pedidos indisponível.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if result is None:
+            raise Http404
+        return Response({'ticket': ticket, **result}, status=status.HTTP_200_OK)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Busca o pedido nas tabelas quentes e, se não existir, no arquivo morto.
+        """
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            try:
+                archived = scope_to_tenant(ArchivedOrder.objects, 'customer__tenant_id').get(pk=kwargs.get('pk'))
+            except (ArchivedOrder.DoesNotExist, ValueError):
+                raise Http404
+
+            return Response({**archived.payload, 'archived': True}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['patch'], url_path='status')
     def change_status(self, request, pk=None):
         """
@@ -109,6 +370,25 @@ class OrderViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': 'Erro interno no servidor'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['get'], url_path='history')
+    def history(self, request, pk=None):
+        """
+        Linha do tempo de status do pedido, da mais antiga para a mais recente.
+        Rota: GET /api/v1/orders/{id}/history/
+        """
+        order = self.get_object()
+        entries = OrderStatusHistory.objects.filter(order=order).order_by('changed_at', 'id')
+        serializer = OrderStatusHistorySerializer(entries, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], url_path='status-timings')
+    def status_timings(self, request):
+        """
+        Lead time por status (transições, média e máximo em segundos), lido do agregado incremental.
+        Rota: GET /api/v1/orders/status-timings/
+        """
+        return Response(StatusTimingService().summary(), status=status.HTTP_200_OK)
+
     def destroy(self, request, *args, **kwargs):
         """
         No ERP, 'deletar' um pedido significa Cancelá-lo.
@@ -128,4 +408,122 @@ class OrderViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
             
         except ValueError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+class StatusChangeFeedViewSet(TenantScopedMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Feed global de mudanças de status para sincronização incremental.
+    Rota: GET /api/v1/status-changes/?cursor=<next_cursor>&since=<ISO 8601>&status=<novo status>
+    """
+    queryset = OrderStatusHistory.objects.all()
+    serializer_class = OrderStatusHistorySerializer
+    pagination_class = StatusChangeKeysetPagination
+    tenant_lookup = 'order__tenant_id'
+
+    # A ordenação é fixa (keyset), então filtros de ordenação/busca do DRF não se aplicam aqui
+    filter_backends = []
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        since = self.request.query_params.get('since')
+        if since:
+            since_dt = parse_datetime(since)
+            if since_dt is None:
+                raise ValidationError({'since': 'Data inválida.'})
+            queryset = queryset.filter(changed_at__gte=since_dt)
+
+        new_status = self.request.query_params.get('status')
+        if new_status:
+            queryset = queryset.filter(new_status=new_status)
+
+        return queryset
+
+
+class PriceListViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    """
+    Tabelas de preço (por cliente ou gerais/promocionais).
+    Rota: /api/v1/price-lists/
+    """
+    queryset = PriceList.objects.all()
+    serializer_class = PriceListSerializer
+    filterset_fields = ['customer', 'is_active']
+
+
+class PriceRuleViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    """
+    Regras de preço por produto e faixa de quantidade.
+    Rota: /api/v1/price-rules/?price_list=&product=
+    """
+    queryset = PriceRule.objects.all()
+    tenant_lookup = 'price_list__tenant_id'
+    serializer_class = PriceRuleSerializer
+    filterset_fields = ['price_list', 'product']
+
+
+class ProfilingViewSet(viewsets.ViewSet):
+    """
+    Profiler por amostragem sob demanda, só para administradores.
+    Rotas: GET|PUT /api/v1/profiling/config/, GET /api/v1/profiling/ (perfis recentes)
+    e GET /api/v1/profiling/{id}/ (pilhas colapsadas, para flamegraph.pl ou speedscope).
+    """
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        try:
+            profiles = profile_store.recent()
+        except RedisError:
+            return Response({'error': 'Redis indisponível.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(profiles, status=status.HTTP_200_OK)
+
+    def retrieve(self, request, pk=None):
+        try:
+            profile = profile_store.get(pk)
+        except RedisError:
+            return Response({'error': 'Redis indisponível.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if profile is None:
+            raise Http404
+        return HttpResponse(profile['folded'], content_type='text/plain; charset=utf-8')
+
+    @action(detail=False, methods=['get', 'put'], url_path='config')
+    def config(self, request):
+        if request.method == 'GET':
+            return Response(profiling_config.get(), status=status.HTTP_200_OK)
+
+        serializer = ProfilingConfigSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(profiling_config.set(**serializer.validated_data), status=status.HTTP_200_OK)
+
+
+async def order_events_stream(request):
+    """
+    Stream SSE com os eventos order.status_changed (mesmo payload do evento de domínio).
+    Aceita filtros ?status=<novo status>&customer=<id> e retoma a partir do header Last-Event-ID.
+    Rota: GET /api/v1/orders/events/ (servido pelo ASGI, serviço 'events' do docker-compose)
+    """
+    filters = {
+        'status': request.GET.get('status'),
+        'customer': request.GET.get('customer'),
+        # Resolvido pelo TenantMiddleware: o stream é do tenant da conexão
+        'tenant': request.tenant_id,
+    }
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+
+    # Stream infinito: sob WSGI o Django consumiria o iterador inteiro antes de responder
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'O stream de eventos é servido apenas pelo serviço ASGI (events).'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+
+    if last_event_id and not is_valid_event_id(last_event_id):
+        return JsonResponse({'error': 'Last-Event-ID inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        stream_events(last_event_id=last_event_id, filters=filters),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Desliga o buffering de proxies (nginx) para o evento sair na hora
+    response['X-Accel-Buffering'] = 'no'
+    return response